@@ -0,0 +1,168 @@
+import hashlib
+import logging
+import os
+import time
+
+from sqlite_util import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = 'index.sqlite3'
+CACHE_EXTENSION = '.opus'
+MAX_INDEX_ENTRIES = 10000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracks (
+    key TEXT PRIMARY KEY,
+    play_count INTEGER NOT NULL DEFAULT 0,
+    filename TEXT,
+    size INTEGER,
+    last_used_at REAL NOT NULL
+);
+"""
+
+
+class AudioCache(SQLiteStore):
+    """Disk cache of Ogg/Opus copies of frequently played tracks, capped by total size.
+
+    Tracks are identified by an opaque key (e.g. "youtube:<video id>"). Every play is
+    counted; once a track has been played more than min_plays times, should_store()
+    asks the caller to transcode it and hand the finished file to store(). The least
+    recently played files are deleted when the cache grows beyond max_bytes, except
+    files that are playing; a file that cannot be deleted is retried on the next
+    eviction. Play counts of uncached tracks are kept for the max_index_entries most
+    recently played ones. All rows are mirrored in memory, so lookup(), play_count()
+    and should_store() are cheap enough for the event loop; record_play() and store()
+    write the index (store() also moves and deletes files) and belong in a worker thread.
+    """
+
+    def __init__(self, directory, max_bytes, min_plays, clock=time.time, max_index_entries=MAX_INDEX_ENTRIES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.min_plays = min_plays
+        self.max_index_entries = max_index_entries
+        self._clock = clock
+        os.makedirs(directory, exist_ok=True)
+        super().__init__(os.path.join(directory, INDEX_FILENAME), _SCHEMA)
+
+        self._tracks = {}
+        for row in self._conn.execute("SELECT * FROM tracks"):
+            entry = {key: row[key] for key in ('play_count', 'filename', 'size', 'last_used_at')}
+            if entry['filename'] and not os.path.exists(os.path.join(directory, entry['filename'])):
+                entry['filename'] = None
+                entry['size'] = None
+                self._save(row['key'], entry)
+            self._tracks[row['key']] = entry
+
+    @staticmethod
+    def filename_for(key):
+        """Return the cache file name for key (a hash, so any key is filesystem-safe)."""
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()[:24] + CACHE_EXTENSION
+
+    def temp_path_for(self, key):
+        """Path a transcode should write to before calling store()."""
+        return os.path.join(self.directory, self.filename_for(key) + '.part')
+
+    def total_bytes(self):
+        """Return the combined size of all cached files."""
+        return sum(entry['size'] or 0 for entry in list(self._tracks.values()) if entry['filename'])
+
+    def lookup(self, key):
+        """Return the cached file path for key, or None on a miss."""
+        entry = self._tracks.get(key)
+        if not entry or not entry['filename']:
+            return None
+        return os.path.join(self.directory, entry['filename'])
+
+    def play_count(self, key):
+        entry = self._tracks.get(key)
+        return entry['play_count'] if entry else 0
+
+    def record_play(self, key):
+        """Count one play of key and mark it most recently used; return the new play count."""
+        with self._lock:
+            entry = self._tracks.get(key)
+            if entry is None:
+                entry = {'play_count': 0, 'filename': None, 'size': None, 'last_used_at': 0.0}
+                self._tracks[key] = entry
+            entry['play_count'] += 1
+            entry['last_used_at'] = self._clock()
+            self._save(key, entry)
+            if len(self._tracks) > self.max_index_entries:
+                self._prune()
+            return entry['play_count']
+
+    def should_store(self, key):
+        """Return True when key is popular enough to cache and has no cached file yet."""
+        entry = self._tracks.get(key)
+        return bool(entry) and not entry['filename'] and entry['play_count'] > self.min_plays
+
+    def store(self, key, temp_path, in_use=()):
+        """Move a finished transcode into the cache, then evict least recently used files.
+
+        Files for the keys in in_use (tracks being played) are never evicted.
+        Returns the list of keys whose files were evicted.
+        """
+        filename = self.filename_for(key)
+        final_path = os.path.join(self.directory, filename)
+        os.replace(temp_path, final_path)
+        size = os.path.getsize(final_path)
+        with self._lock:
+            entry = self._tracks.setdefault(
+                key, {'play_count': 0, 'filename': None, 'size': None, 'last_used_at': self._clock()}
+            )
+            entry['filename'] = filename
+            entry['size'] = size
+            entry['last_used_at'] = self._clock()
+            self._save(key, entry)
+            return self._evict(set(in_use))
+
+    def _save(self, key, entry):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO tracks (key, play_count, filename, size, last_used_at) VALUES (?, ?, ?, ?, ?)",
+            (key, entry['play_count'], entry['filename'], entry['size'], entry['last_used_at']),
+        )
+
+    def _remove_file(self, key, entry):
+        """Delete a cached file; return False (keeping the entry) if it cannot be deleted yet."""
+        try:
+            os.remove(os.path.join(self.directory, entry['filename']))
+        except FileNotFoundError:
+            pass
+        except OSError as remove_exc:
+            # e.g. still open by a player on Windows; the next eviction tries again.
+            logger.warning("Could not evict cached audio file for %s: %s", key, remove_exc)
+            return False
+        entry['filename'] = None
+        entry['size'] = None
+        self._save(key, entry)
+        return True
+
+    def _evict(self, in_use):
+        cached = sorted(
+            ((entry['last_used_at'], key) for key, entry in self._tracks.items() if entry['filename']),
+        )
+        total = sum(self._tracks[key]['size'] or 0 for _, key in cached)
+        evicted = []
+        for _, key in cached:
+            if total <= self.max_bytes:
+                break
+            if key in in_use:
+                continue
+            entry = self._tracks[key]
+            size = entry['size'] or 0
+            if self._remove_file(key, entry):
+                total -= size
+                evicted.append(key)
+        return evicted
+
+    def _prune(self):
+        """Forget the least recently played uncached tracks, keeping about 90% of max_index_entries."""
+        uncached = sorted(
+            (entry['last_used_at'], key) for key, entry in self._tracks.items() if not entry['filename']
+        )
+        excess = len(self._tracks) - int(self.max_index_entries * 0.9)
+        stale = [key for _, key in uncached[:max(0, excess)]]
+        for key in stale:
+            del self._tracks[key]
+        self._conn.executemany("DELETE FROM tracks WHERE key = ?", [(key,) for key in stale])
@@ -0,0 +1,82 @@
+"""Compare blacklist title matching: per-pattern loop vs BlacklistMatcher.
+
+loop:      what is_blacklisted_title used to do (pattern.search for every pattern).
+matcher:   BlacklistMatcher with its verdict cache disabled (literal prefilter,
+           then one alternation for patterns without a required literal).
+cached:    BlacklistMatcher with the default LRU cache, over a corpus where titles
+           repeat (search results for the same queries come back many times).
+
+Patterns are the blacklist_patterns from config.yaml plus --extra-patterns
+synthetic word patterns, approximating a moderator-grown list.
+
+Usage: python benchmarks/bench_blacklist.py [--titles 50000] [--extra-patterns 200] [--unique 0.3]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+import yaml
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from blacklist_matcher import BlacklistMatcher  # noqa: E402
+
+WORDS = (
+    'official', 'music', 'video', 'lyrics', 'live', 'remix', 'acoustic', 'nhạc', 'trẻ', 'tình',
+    'yêu', 'mưa', 'chiều', 'hôm', 'nay', 'em', 'anh', 'love', 'night', 'summer', 'audio', 'mv',
+    'hoàng', 'hôn', 'người', 'lạ', 'ơi', 'feat', 'ft', 'version', 'full', 'album', 'đêm', 'trăng',
+    'cover', 'karaoke', 'banned7 word',
+)
+
+
+def load_config_patterns():
+    with open(os.path.join(ROOT, 'config.yaml'), encoding='utf-8') as handle:
+        config = yaml.safe_load(handle)
+    return list((config.get('youtube') or {}).get('blacklist_patterns') or [])
+
+
+def make_titles(count, unique_ratio, rng):
+    unique = [
+        ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 9))).title()
+        for _ in range(max(1, int(count * unique_ratio)))
+    ]
+    return [rng.choice(unique) for _ in range(count)]
+
+
+def run(label, fn, titles):
+    started = time.perf_counter()
+    hits = sum(1 for title in titles if fn(title))
+    elapsed = time.perf_counter() - started
+    print(f"{label:<9} {elapsed * 1000:9.1f} ms total  {elapsed / len(titles) * 1e6:7.2f} us/title  ({hits} blacklisted)")
+    return hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--titles', type=int, default=50000)
+    parser.add_argument('--extra-patterns', type=int, default=200)
+    parser.add_argument('--unique', type=float, default=0.3, help='fraction of distinct titles in the corpus')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    patterns = load_config_patterns()
+    patterns += [rf"(?i)\bbanned{index}\s*word\b" for index in range(args.extra_patterns)]
+    titles = make_titles(args.titles, args.unique, rng)
+    print(f"{len(patterns)} patterns, {len(titles)} titles ({len(set(titles))} distinct)")
+
+    compiled = [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+    uncached = BlacklistMatcher(patterns, cache_size=0)
+    cached = BlacklistMatcher(patterns)
+
+    expected = run('loop', lambda title: any(p.search(title) for p in compiled), titles)
+    assert run('matcher', uncached.is_blacklisted, titles) == expected
+    assert run('cached', cached.is_blacklisted, titles) == expected
+
+
+if __name__ == '__main__':
+    main()
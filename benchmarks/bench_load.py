@@ -0,0 +1,485 @@
+"""Offline load test: drive bot.py commands across many fake guilds with a fake yt-dlp.
+
+Nothing talks to Discord or YouTube. Guilds, members, contexts and voice
+clients are small stand-ins; "playback" is a timer that fires the after
+callback when the track ends, so play_next runs exactly as it does live.
+yt-dlp is replaced by a client with configurable latency and failure rate,
+plugged into the real ResolverPool. FFmpeg is never started.
+
+Each guild issues --commands commands (yt/play/skip/remove, weighted) in
+concurrent bursts of --burst with --think-ms between bursts; a skip or remove
+that would be invalid at that moment (nothing playing, queue too short) is
+sent as a yt instead, so every command should succeed. Reported: per-command
+latency, enqueue-to-audio latency (Song creation to voice_client.play), event
+loop lag and peak RSS.
+
+The run exits 1 when it is broken: no track started, a dequeued track never
+started, any command replied with ❌, or bot.py logged an error.
+--max-p99-ms additionally fails it when any command p99 or the audio-start
+p99 exceeds the budget, for use in CI.
+
+Requires discord.py (imported by bot.py) and a config.yaml; no token or network.
+
+Usage: python benchmarks/bench_load.py [--guilds 1000] [--commands 20] [--burst 4] [--extract-ms 300]
+                                       [--failure-rate 0.05] [--track-seconds 5] [--max-p99-ms 0]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+import zlib
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import settings  # noqa: E402
+
+WATCH_URL = 'https://www.youtube.com/watch?v='
+COMMAND_WEIGHTS = (('yt', 50), ('play', 20), ('skip', 15), ('remove', 15))
+SEARCH_TERMS = (
+    'son tung mtp', 'lofi hip hop', 'den vau', 'chill piano', 'vu cat tuong', 'synthwave mix',
+    'hoang dung', 'jazz cafe', 'imagine dragons', 'ha anh tuan', 'classical focus', 'noo phuoc thinh',
+)
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class FakeExtractor:
+    """Stands in for yt_dlp.YoutubeDL: sleeps like a network call and sometimes fails."""
+
+    def __init__(self, options, extract_ms, failure_rate, track_seconds):
+        self.options = options
+        self.extract_ms = extract_ms
+        self.failure_rate = failure_rate
+        self.track_seconds = track_seconds
+
+    def extract_info(self, url, download=False):
+        time.sleep(self.extract_ms * random.uniform(0.5, 1.5) / 1000)
+        if url.startswith('ytsearch'):
+            count, _, term = url[len('ytsearch'):].partition(':')
+            video_ids = [f"{zlib.crc32(f'{term}#{rank}'.encode()):011d}" for rank in range(int(count or 1))]
+            return {'entries': [
+                {'id': video_id, 'title': f"{term} #{rank}", 'webpage_url': WATCH_URL + video_id}
+                for rank, video_id in enumerate(video_ids)
+            ]}
+        if random.random() < self.failure_rate:
+            raise RuntimeError("Video unavailable (simulated)")
+        video_id = url.rsplit('=', 1)[-1]
+        return {
+            'id': video_id,
+            'title': f"Video {video_id}",
+            'webpage_url': url,
+            'url': f"https://rr1.googlevideo.invalid/{video_id}",
+            'format_id': '251',
+            'ext': 'webm',
+            'acodec': 'opus',
+            'duration': self.track_seconds,
+        }
+
+
+class FakeAudioSource:
+    def __init__(self, source_path):
+        self.source_path = source_path
+
+    def is_opus(self):
+        return True
+
+    def cleanup(self):
+        pass
+
+
+class FakeVoiceClient:
+    """Plays for a fixed time, then calls after(None) like discord.py's player thread would."""
+
+    def __init__(self, channel, track_seconds, on_play):
+        self.channel = channel
+        self.track_seconds = track_seconds
+        self.source = None
+        self._on_play = on_play
+        self._connected = True
+        self._timer = None
+        self._after = None
+
+    def is_connected(self):
+        return self._connected
+
+    def is_playing(self):
+        return self._timer is not None
+
+    def is_paused(self):
+        return False
+
+    def play(self, source, after=None):
+        self.source = source
+        self._after = after
+        self._timer = asyncio.get_running_loop().call_later(self.track_seconds, self._finish)
+        self._on_play(self.channel.guild)
+
+    def _finish(self, error=None):
+        self._timer, after = None, self._after
+        self._after = None
+        if after is not None:
+            after(error)
+
+    def stop(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._finish()
+
+    async def disconnect(self, force=False):
+        self._connected = False
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+
+class FakeChannel:
+    def __init__(self, guild, track_seconds, on_play):
+        self.guild = guild
+        self.members = []
+        self._track_seconds = track_seconds
+        self._on_play = on_play
+
+    async def connect(self, timeout=None, reconnect=True):
+        self.guild.voice_client = FakeVoiceClient(self, self._track_seconds, self._on_play)
+        return self.guild.voice_client
+
+
+class FakePermissions:
+    def __init__(self, administrator=False):
+        self.administrator = administrator
+
+
+class FakeVoiceState:
+    def __init__(self, channel):
+        self.channel = channel
+
+
+class FakeMember:
+    def __init__(self, member_id, guild, channel, administrator=False):
+        self.id = member_id
+        self.guild = guild
+        self.bot = False
+        self.mention = f"<@{member_id}>"
+        self.guild_permissions = FakePermissions(administrator)
+        self.voice = FakeVoiceState(channel)
+
+    def __str__(self):
+        return f"user{self.id}"
+
+
+class FakeTextChannel:
+    def __init__(self, channel_id):
+        self.id = channel_id
+
+
+class FakeGuild:
+    def __init__(self, guild_id):
+        self.id = guild_id
+        self.voice_client = None
+        # Commands reply here; play_next records it as the channel a restored queue reports to.
+        self.text_channel = FakeTextChannel(guild_id + 1)
+
+
+class FakeContext:
+    def __init__(self, guild, author, on_reply=None):
+        self.guild = guild
+        self.author = author
+        self.channel = guild.text_channel
+        self.sent = 0
+        self.failed = 0  # ❌ replies; commands like yt report failures this way instead of raising
+        self._on_reply = on_reply
+
+    @property
+    def voice_client(self):
+        return self.guild.voice_client
+
+    async def send(self, content=None, **kwargs):
+        self.sent += 1
+        if content and content.startswith('❌'):
+            self.failed += 1
+        if self._on_reply is not None:
+            self._on_reply(content)
+
+
+class LoadTest:
+    def __init__(self, bot_module, args, media_files):
+        self.bot = bot_module
+        self.args = args
+        self.media_files = media_files
+        self.rng = random.Random(args.seed)
+        self.latencies = {name: [] for name, _ in COMMAND_WEIGHTS}
+        self.errors = {name: 0 for name, _ in COMMAND_WEIGHTS}
+        self.audio_latencies = []
+        self.loop_lag = []
+        self.enqueued = set()  # queue_ids of every Song the commands created
+        self.started = set()
+        self.removed = set()
+        self.missing = set()
+        self.failed_replies = []
+        self.logged_errors = []
+
+    def on_play(self, guild):
+        song = self.bot.guild_players.get(guild.id).current_song
+        if song is not None:
+            self.started.add(song.queue_id)
+            self.audio_latencies.append((time.perf_counter() - song.enqueued_perf) * 1000)
+
+    def on_reply(self, content):
+        if content and content.startswith('❌'):
+            self.failed_replies.append(content)
+
+    def instrument(self):
+        """Record every Song created and every error bot.py logs."""
+        make_song, log_error = self.bot.make_song, self.bot.logger.error
+
+        def recording_make_song(*args, **kwargs):
+            song = make_song(*args, **kwargs)
+            self.enqueued.add(song.queue_id)
+            return song
+
+        def recording_error(message, *args, **kwargs):
+            self.logged_errors.append(str(message) % args if args else str(message))
+            return log_error(message, *args, **kwargs)
+
+        self.bot.make_song = recording_make_song
+        self.bot.logger.error = recording_error
+
+    def missing_audio(self):
+        """Return queue_ids that left the queue for playback (not via !remove) but never started."""
+        pending = set()
+        for player in self.bot.guild_players:
+            pending.update(song.queue_id for song in player.queue)
+            if player.current_song is not None:
+                pending.add(player.current_song.queue_id)  # still being started when the run ended
+        return self.enqueued - pending - self.removed - self.started
+
+    def make_guild(self, index):
+        guild = FakeGuild(10 ** 17 + index)
+        channel = FakeChannel(guild, self.args.track_seconds, self.on_play)
+        members = [FakeMember(10 ** 6 * (index + 1) + slot, guild, channel, administrator=(slot == 0))
+                   for slot in range(self.args.members)]
+        channel.members = members
+        return guild, members
+
+    async def invoke(self, name, ctx):
+        # Decided right before the call: commands check their preconditions before their first await.
+        queue = self.bot.guild_players.get(ctx.guild.id).queue
+        if name == 'skip' and not (ctx.voice_client and ctx.voice_client.is_playing()):
+            name = 'yt'
+        elif name == 'remove' and not queue:
+            name = 'yt'
+        target = None
+        command = self.bot.bot.get_command(name)
+        started = time.perf_counter()
+        try:
+            if name == 'yt':
+                await command.callback(ctx, query=self.rng.choice(SEARCH_TERMS))
+            elif name == 'play':
+                await command.callback(ctx, query=self.rng.choice(self.media_files))
+            elif name == 'remove':
+                index = self.rng.randint(1, min(3, len(queue)))
+                target = queue[index - 1]
+                await command.callback(ctx, index)
+            else:
+                await command.callback(ctx)
+        except Exception:
+            self.errors[name] += 1
+        self.errors[name] += ctx.failed
+        self.latencies[name].append((time.perf_counter() - started) * 1000)
+        if target is not None and target not in queue and target.queue_id not in self.started:
+            self.removed.add(target.queue_id)
+
+    async def run_guild(self, index):
+        guild, members = self.make_guild(index)
+        names = [name for name, _ in COMMAND_WEIGHTS]
+        weights = [weight for _, weight in COMMAND_WEIGHTS]
+        # The first command connects the voice client, as a real session would.
+        await self.invoke('yt', FakeContext(guild, members[0], self.on_reply))
+        remaining = self.args.commands - 1
+        while remaining > 0:
+            burst = min(self.args.burst, remaining)
+            remaining -= burst
+            await asyncio.gather(*(
+                self.invoke(
+                    self.rng.choices(names, weights)[0], FakeContext(guild, self.rng.choice(members), self.on_reply)
+                )
+                for _ in range(burst)
+            ))
+            await asyncio.sleep(self.args.think_ms * self.rng.uniform(0.5, 1.5) / 1000)
+        return guild
+
+    async def monitor_loop_lag(self, interval=0.05):
+        expected = time.perf_counter() + interval
+        while True:
+            await asyncio.sleep(interval)
+            now = time.perf_counter()
+            self.loop_lag.append(max(0.0, (now - expected) * 1000))
+            expected = now + interval
+
+    async def run(self):
+        lag_task = asyncio.ensure_future(self.monitor_loop_lag())
+        started = time.perf_counter()
+        guilds = await asyncio.gather(*(self.run_guild(index) for index in range(self.args.guilds)))
+        elapsed = time.perf_counter() - started
+        lag_task.cancel()
+        self.missing = self.missing_audio()
+        for guild in guilds:
+            if guild.voice_client is not None:
+                await guild.voice_client.disconnect()
+        return elapsed
+
+    def report(self, elapsed):
+        total = sum(len(values) for values in self.latencies.values())
+        print(f"{self.args.guilds} guilds, {total} commands in {elapsed:.1f} s ({total / elapsed:.0f} commands/s)")
+        print(f"{'command':<10} {'count':>7} {'errors':>7} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+        rows = dict(self.latencies)
+        rows['audio'] = self.audio_latencies
+        summary = {}
+        for name, values in rows.items():
+            p50, p99 = percentile(values, 0.5), percentile(values, 0.99)
+            summary[name] = {'count': len(values), 'p50_ms': p50, 'p99_ms': p99}
+            print(f"{name:<10} {len(values):7d} {self.errors.get(name, 0):7d} "
+                  f"{p50:9.1f} {p99:9.1f} {max(values, default=0):9.1f}")
+        lag_p99 = percentile(self.loop_lag, 0.99)
+        print(f"loop lag   p50 {percentile(self.loop_lag, 0.5):.1f} ms  p99 {lag_p99:.1f} ms  "
+              f"max {max(self.loop_lag, default=0):.1f} ms")
+        rss = peak_rss_mb()
+        if rss is not None:
+            print(f"peak RSS   {rss:.1f} MB")
+        print(f"tracks     {len(self.started)} started of {len(self.enqueued)} enqueued, "
+              f"{len(self.missing)} dequeued but never started")
+        print(f"failures   {len(self.failed_replies)} ❌ replies, {len(self.logged_errors)} logged errors")
+        for text in (self.failed_replies + self.logged_errors)[:5]:
+            print(f"  {text[:160]}")
+        summary['loop_lag'] = {'p99_ms': lag_p99}
+        summary['peak_rss_mb'] = rss
+        summary['tracks'] = {
+            'enqueued': len(self.enqueued), 'started': len(self.started), 'missing': len(self.missing),
+        }
+        summary['failed_replies'] = len(self.failed_replies)
+        summary['logged_errors'] = len(self.logged_errors)
+        return summary
+
+
+def import_bot(media_folder):
+    """Import bot.py with storage, caches and the log file pointed away from the working tree."""
+    os.environ.setdefault(settings.TOKEN_ENV_VAR, 'offline-benchmark')
+    settings.MEDIA_FOLDER = media_folder
+    settings.RESOLVER_CACHE_FILE = ''
+    settings.MEDIA_METADATA_CACHE_FILE = ''
+    settings.AUDIO_CACHE_DIR = ''
+    settings.QUEUE_STATE_FILE = ''
+    settings.PLAYBACK_DEBUG_METRICS = False
+    settings.LOG_FILE = os.devnull
+    import bot
+    logging.disable(logging.CRITICAL)
+    return bot
+
+
+async def main_async(args, bot_module, media_files):
+    settings.CONNECTION_STABILIZE_DELAY = args.connect_delay_ms / 1000
+
+    async def no_status(*_args, **_kwargs):
+        pass
+
+    bot_module.update_bot_status = no_status
+    bot_module.clear_bot_status = no_status
+    bot_module.create_audio_source = lambda source_path, volume, **kwargs: FakeAudioSource(source_path)
+    bot_module.resolver_pool = bot_module.ResolverPool(
+        settings.YT_RESOLVER_WORKERS,
+        {'default': settings.YTDL_OPTIONS, 'search': bot_module.search_ytdl_options},
+        client_factory=lambda options: FakeExtractor(
+            options, args.extract_ms, args.failure_rate, args.track_seconds
+        ),
+        metric_callback=bot_module.log_playback_metric,
+    )
+    async with bot_module.bot:
+        load_test = LoadTest(bot_module, args, media_files)
+        load_test.instrument()
+        elapsed = await load_test.run()
+        summary = load_test.report(elapsed)
+        for task in asyncio.all_tasks():
+            if task is not asyncio.current_task():
+                task.cancel()
+    bot_module.resolver_pool.shutdown()
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--guilds', type=int, default=1000)
+    parser.add_argument('--commands', type=int, default=20, help='commands per guild')
+    parser.add_argument('--burst', type=int, default=4, help='commands a guild sends at once')
+    parser.add_argument('--think-ms', type=float, default=500, help='mean pause between bursts')
+    parser.add_argument('--members', type=int, default=5, help='listeners per guild (member 0 is an admin)')
+    parser.add_argument('--extract-ms', type=float, default=300, help='mean fake yt-dlp latency')
+    parser.add_argument('--failure-rate', type=float, default=0.05, help='fraction of video lookups that fail')
+    parser.add_argument('--track-seconds', type=float, default=5, help='simulated track length')
+    parser.add_argument('--connect-delay-ms', type=float, default=0, help='overrides connection_stabilize_delay')
+    parser.add_argument('--media-files', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help='also write the summary to this file')
+    parser.add_argument('--max-p99-ms', type=float, default=0,
+                        help='exit 1 if any command or audio-start p99 exceeds this (0 = off)')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    with tempfile.TemporaryDirectory() as media_folder:
+        media_files = []
+        for index in range(args.media_files):
+            name = f"artist {index % 97}/track {index:05d}.mp3"
+            os.makedirs(os.path.join(media_folder, os.path.dirname(name)), exist_ok=True)
+            open(os.path.join(media_folder, name), 'wb').close()
+            media_files.append(name)
+        bot_module = import_bot(media_folder)
+        bot_module.media_index.refresh()
+        summary = asyncio.run(main_async(args, bot_module, media_files))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as handle:
+            json.dump(summary, handle, indent=2)
+    failures = []
+    if summary['audio']['count'] == 0:
+        failures.append("no track started")
+    if summary['tracks']['missing']:
+        failures.append(f"{summary['tracks']['missing']} dequeued track(s) never started")
+    if summary['failed_replies']:
+        failures.append(f"{summary['failed_replies']} ❌ replies")
+    if summary['logged_errors']:
+        failures.append(f"{summary['logged_errors']} errors logged")
+    if args.max_p99_ms:
+        slow = [name for name in [name for name, _ in COMMAND_WEIGHTS] + ['audio']
+                if summary[name]['p99_ms'] > args.max_p99_ms]
+        if slow:
+            failures.append(f"p99 over {args.max_p99_ms} ms for {', '.join(slow)}")
+    if failures:
+        print(f"FAIL: {'; '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
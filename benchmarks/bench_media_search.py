@@ -0,0 +1,120 @@
+"""Compare local-media fuzzy lookup: trigram MediaIndex vs the old difflib path.
+
+A synthetic library of empty files named from random word combinations is
+written to a temporary directory (optionally split into subdirectories), then
+indexed with MediaIndex. Queries are misspelled versions of existing names, so
+neither exact nor substring matching applies and the fuzzy path is measured.
+
+old:      difflib.get_close_matches(query, all_names, n=1, cutoff=0.5),
+          i.e. what find_best_match did on every !play.
+trigram:  MediaIndex.suggest(query, limit=5), the ranked candidates behind
+          fuzzy matches and "did you mean" suggestions.
+
+Usage: python benchmarks/bench_media_search.py [--files 50000] [--queries 50] [--difflib-queries 5]
+"""
+import argparse
+import difflib
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from media_index import MediaIndex  # noqa: E402
+
+WORDS = (
+    'love', 'night', 'summer', 'river', 'dream', 'light', 'heart', 'fire', 'rain', 'city',
+    'blue', 'golden', 'broken', 'wild', 'silent', 'electric', 'midnight', 'ocean', 'shadow', 'star',
+    'dance', 'road', 'home', 'winter', 'echo', 'paper', 'glass', 'storm', 'sugar', 'velvet',
+    'remix', 'live', 'acoustic', 'version', 'part', 'intro', 'theme', 'song', 'ballad', 'anthem',
+)
+
+
+def make_names(count, rng):
+    names = set()
+    while len(names) < count:
+        words = rng.sample(WORDS, rng.randint(2, 5))
+        names.add(f"{' '.join(words).title()} {rng.randint(1, 9999)}.mp3")
+    return sorted(names)
+
+
+def misspell(name, rng):
+    stem = os.path.splitext(name)[0].lower()
+    chars = list(stem)
+    for _ in range(2):
+        position = rng.randrange(len(chars))
+        if chars[position] != ' ':
+            chars[position] = rng.choice('aeioulnrst')
+    return ''.join(chars)
+
+
+def build_library(root, names, subdirs):
+    for index, name in enumerate(names):
+        directory = os.path.join(root, f'dir{index % subdirs:03d}') if subdirs else root
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, name), 'wb'):
+            pass
+
+
+def time_queries(fn, queries):
+    timings = []
+    results = []
+    for query in queries:
+        started = time.perf_counter()
+        results.append(fn(query))
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings, results
+
+
+def report(label, timings):
+    print(f"{label:<10} median {statistics.median(timings):9.2f} ms   max {max(timings):9.2f} ms   (n={len(timings)})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=50000)
+    parser.add_argument('--subdirs', type=int, default=100, help='spread files over this many folders (0 = flat)')
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--difflib-queries', type=int, default=5, help='difflib is slow; time fewer queries')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    names = make_names(args.files, rng)
+    targets = [rng.choice(names) for _ in range(args.queries)]
+    queries = [misspell(name, rng) for name in targets]
+
+    with tempfile.TemporaryDirectory() as root:
+        started = time.perf_counter()
+        build_library(root, names, args.subdirs)
+        print(f"created {len(names)} files in {time.perf_counter() - started:.1f} s")
+
+        index = MediaIndex(root)
+        started = time.perf_counter()
+        index.refresh()
+        print(f"initial scan + index build: {(time.perf_counter() - started) * 1000:.0f} ms")
+        started = time.perf_counter()
+        index.refresh()
+        print(f"no-change refresh:          {(time.perf_counter() - started) * 1000:.1f} ms")
+
+        trigram_timings, trigram_results = time_queries(lambda q: index.suggest(q, limit=5), queries)
+        difflib_count = min(args.difflib_queries, len(queries))
+        difflib_timings, difflib_results = time_queries(
+            lambda q: difflib.get_close_matches(q, names, n=1, cutoff=0.5), queries[:difflib_count]
+        )
+
+    report('trigram', trigram_timings)
+    report('difflib', difflib_timings)
+
+    top1 = sum(1 for target, ranked in zip(targets, trigram_results) if ranked and ranked[0][0].endswith(target))
+    top5 = sum(1 for target, ranked in zip(targets, trigram_results) if any(p.endswith(target) for p, _ in ranked))
+    difflib_hits = sum(1 for target, result in zip(targets, difflib_results) if result and result[0] == target)
+    print(f"trigram accuracy: top-1 {top1}/{len(queries)}, top-5 {top5}/{len(queries)}")
+    print(f"difflib accuracy: {difflib_hits}/{difflib_count}")
+
+
+if __name__ == '__main__':
+    main()
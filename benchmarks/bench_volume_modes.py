@@ -0,0 +1,112 @@
+"""Compare CPU cost per stream of the two playback volume modes.
+
+transformer: FFmpeg decodes to PCM and Python scales every 20 ms frame
+             (what PCMVolumeTransformer does), then encodes Opus when
+             discord.py's libopus binding is available.
+ffmpeg:      FFmpeg applies a volume filter and encodes Opus itself; Python
+             only reads the encoded bytes.
+
+Audio comes from FFmpeg's lavfi sine generator, so no media files or network
+are needed. Requires ffmpeg on PATH; child CPU time is read with the Unix-only
+resource module.
+
+Usage: python benchmarks/bench_volume_modes.py [--streams 4] [--seconds 60] [--volume 0.5]
+"""
+import argparse
+import resource
+import subprocess
+import threading
+import time
+
+try:
+    import audioop
+except ImportError:  # Python 3.13+ without audioop-lts
+    audioop = None
+
+FRAME_BYTES = 3840  # 20 ms of 48 kHz stereo s16le, as discord.py reads it
+
+
+def _load_opus_encoder():
+    try:
+        from discord import opus
+        if not opus.is_loaded():
+            opus._load_default()
+        return opus.Encoder() if opus.is_loaded() else None
+    except Exception:
+        return None
+
+
+def _input_args(seconds):
+    return ['-f', 'lavfi', '-i', f'sine=frequency=440:sample_rate=48000:duration={seconds}', '-ac', '2']
+
+
+def run_transformer_stream(seconds, volume):
+    process = subprocess.Popen(
+        ['ffmpeg', '-loglevel', 'error', *_input_args(seconds), '-f', 's16le', '-ar', '48000', 'pipe:1'],
+        stdout=subprocess.PIPE,
+    )
+    encoder = _load_opus_encoder()
+    while True:
+        frame = process.stdout.read(FRAME_BYTES)
+        if len(frame) < FRAME_BYTES:
+            break
+        frame = audioop.mul(frame, 2, min(volume, 2.0))
+        if encoder is not None:
+            encoder.encode(frame, encoder.SAMPLES_PER_FRAME)
+    process.wait()
+
+
+def run_ffmpeg_stream(seconds, volume):
+    process = subprocess.Popen(
+        ['ffmpeg', '-loglevel', 'error', *_input_args(seconds), '-filter:a', f'volume={volume:.3f}',
+         '-c:a', 'libopus', '-b:a', '128k', '-ar', '48000', '-f', 'opus', 'pipe:1'],
+        stdout=subprocess.PIPE,
+    )
+    while process.stdout.read(4096):
+        pass
+    process.wait()
+
+
+def measure(mode, stream_fn, streams, seconds, volume):
+    children_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    python_before = time.process_time()
+    wall_before = time.perf_counter()
+
+    threads = [threading.Thread(target=stream_fn, args=(seconds, volume)) for _ in range(streams)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    wall_sec = time.perf_counter() - wall_before
+    python_sec = time.process_time() - python_before
+    children_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    ffmpeg_sec = (children_after.ru_utime - children_before.ru_utime) + (children_after.ru_stime - children_before.ru_stime)
+
+    audio_minutes = streams * seconds / 60.0
+    print(
+        f"{mode:<12} python_cpu={python_sec:7.2f}s ffmpeg_cpu={ffmpeg_sec:7.2f}s wall={wall_sec:6.2f}s "
+        f"cpu_per_stream_minute={(python_sec + ffmpeg_sec) / audio_minutes:6.3f}s "
+        f"(python {python_sec / audio_minutes:6.3f}s)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--streams', type=int, default=4)
+    parser.add_argument('--seconds', type=int, default=60)
+    parser.add_argument('--volume', type=float, default=0.5)
+    args = parser.parse_args()
+
+    if audioop is None:
+        raise SystemExit("audioop is unavailable; install audioop-lts to benchmark the transformer mode.")
+    if _load_opus_encoder() is None:
+        print("note: discord.py libopus binding not available; transformer mode excludes the Opus encode cost")
+
+    print(f"{args.streams} concurrent streams x {args.seconds}s of audio at volume {args.volume}")
+    measure('transformer', run_transformer_stream, args.streams, args.seconds, args.volume)
+    measure('ffmpeg', run_ffmpeg_stream, args.streams, args.seconds, args.volume)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+import functools
+import re
+
+try:
+    from re import _parser as _sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse as _sre_parse
+
+DEFAULT_CACHE_SIZE = 4096
+
+# Non-ASCII characters that re.IGNORECASE treats as equal to an ASCII letter but
+# str.lower() does not map to it (dotless i, capital I with dot, long s).
+_FOLD_TABLE = {0x131: 'i', 0x130: 'i', 0x17F: 's'}
+
+# A leading global inline flag group such as "(?i)".
+_LEADING_FLAGS = re.compile(r'^\(\?([aiLmsux]+)\)')
+# Constructs whose meaning depends on group numbering/naming and would break inside one alternation.
+_GROUP_SENSITIVE = re.compile(r'\\[1-9]|\(\?P[<=]|\(\?\(')
+
+
+def to_scoped_pattern(pattern):
+    """Turn a leading global flag group into a scoped one: '(?i)abc' -> '(?i:abc)'.
+
+    Returns None when the pattern cannot be embedded in a larger alternation
+    (backreferences, named groups, conditionals, flags placed mid-pattern, or
+    flags that cannot be scoped).
+    """
+    if _GROUP_SENSITIVE.search(pattern):
+        return None
+    match = _LEADING_FLAGS.match(pattern)
+    if match:
+        flags = match.group(1)
+        body = pattern[match.end():]
+        if re.search(r'\(\?[aiLmsux]+\)', body):
+            return None
+        # a, L and u cannot be scoped, and a scoped verbose body could comment out the closing paren.
+        if set(flags) - set('ims'):
+            return None
+        return f"(?{flags}:{body})"
+    if re.search(r'\(\?[aiLmsux]+\)', pattern):
+        return None
+    return f"(?:{pattern})"
+
+
+def fold_title(title):
+    """Lowercase a title so ASCII literals can be tested with `in` under re.IGNORECASE semantics."""
+    return title.translate(_FOLD_TABLE).lower()
+
+
+def _collect_literal_runs(items, runs):
+    current = []
+    for op, av in items:
+        if op == _sre_parse.LITERAL and av < 128:
+            current.append(chr(av).lower())
+            continue
+        if op == _sre_parse.AT:  # zero-width (\b, ^, $): neighbouring literals stay adjacent
+            continue
+        if current:
+            runs.append(''.join(current))
+            current = []
+        if op == _sre_parse.SUBPATTERN:
+            _collect_literal_runs(av[-1], runs)
+        elif op in (_sre_parse.MAX_REPEAT, _sre_parse.MIN_REPEAT) and av[0] >= 1:
+            _collect_literal_runs(av[2], runs)
+    if current:
+        runs.append(''.join(current))
+
+
+def required_literal(pattern, flags=re.IGNORECASE):
+    """Return the longest lowercased ASCII literal that every match of pattern contains, or None.
+
+    Only literals outside alternations and optional parts count, so a title that
+    does not contain the literal (after fold_title) can never match the pattern.
+    """
+    try:
+        parsed = _sre_parse.parse(pattern, flags)
+    except Exception:
+        return None
+    runs = []
+    _collect_literal_runs(parsed, runs)
+    return max(runs, key=len, default=None) or None
+
+
+class BlacklistMatcher:
+    """Matches titles against many blacklist regexes without running every regex per title.
+
+    Patterns with a required ASCII literal (e.g. "cover" in r"(?i)\bcover\b") are
+    only run when that literal occurs in the folded title; a substring test is far
+    cheaper than a case-insensitive regex search. Patterns without one are joined
+    into a single alternation, except those that cannot be embedded (see
+    to_scoped_pattern), which are searched individually. Verdicts are memoized per
+    title in an LRU cache. Invalid patterns are skipped and listed in `invalid`.
+    """
+
+    def __init__(self, patterns, flags=re.IGNORECASE, cache_size=DEFAULT_CACHE_SIZE):
+        self.patterns = []
+        self.invalid = []
+        self.prefiltered = {}  # required literal -> compiled patterns
+        self.fallback = []
+        scoped = []
+        for pattern in patterns:
+            try:
+                compiled = re.compile(pattern, flags)
+            except re.error as e:
+                self.invalid.append((pattern, str(e)))
+                continue
+            self.patterns.append(pattern)
+            literal = required_literal(pattern, flags)
+            if literal:
+                self.prefiltered.setdefault(literal, []).append(compiled)
+                continue
+            embedded = to_scoped_pattern(pattern)
+            if embedded is None:
+                self.fallback.append(compiled)
+            else:
+                scoped.append((embedded, compiled))
+
+        self.combined = None
+        if scoped:
+            try:
+                self.combined = re.compile("|".join(embedded for embedded, _ in scoped), flags)
+            except re.error:
+                self.fallback.extend(compiled for _, compiled in scoped)
+        self._cached_match = functools.lru_cache(maxsize=cache_size)(self._match)
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def _match(self, title):
+        if self.prefiltered:
+            folded = fold_title(title)
+            for literal, compiled_patterns in self.prefiltered.items():
+                if literal in folded and any(pattern.search(title) for pattern in compiled_patterns):
+                    return True
+        if self.combined is not None and self.combined.search(title):
+            return True
+        return any(pattern.search(title) for pattern in self.fallback)
+
+    def is_blacklisted(self, title):
+        """Return True if any pattern matches the title."""
+        if not title or not self.patterns:
+            return False
+        return self._cached_match(title)
+
+    def cache_info(self):
+        """Return the verdict cache statistics (functools.lru_cache CacheInfo)."""
+        return self._cached_match.cache_info()
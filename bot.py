@@ -1,18 +1,48 @@
+import atexit
+import time
+from startup_profile import StartupProfiler
+
+# Started before the heavy imports so --startup-profile can time them.
+startup_profiler = StartupProfiler()
+
 import discord
 from discord.ext import commands
+startup_profiler.mark("import discord.py")
 import os
 import asyncio
-import yt_dlp
-import difflib
 import re
+import sys
 from dotenv import load_dotenv
 import settings
+startup_profiler.mark("load settings (config.yaml)")
 import logging
 import importlib
 import math
-import time
+import shlex
 from datetime import datetime, timedelta, timezone
-from yt_query_logic import is_probable_url, is_youtube_link, normalize_yt_search_term
+from yt_query_logic import (
+    extract_youtube_video_id,
+    is_probable_url,
+    is_youtube_link,
+    make_search_cache_key,
+    normalize_yt_search_term,
+    playlist_track,
+)
+from audio_cache import AudioCache
+from blacklist_matcher import BlacklistMatcher
+from guild_player import GuildPlayerRegistry, format_position, parse_seek_position
+from media_index import MediaIndex
+from media_metadata import MediaMetadataCache
+from ogg_opus import OGG_OPUS_EXTENSIONS, OPUS_SILENCE_FRAME, OggError, OggOpusFile, is_discord_ready_ogg_opus
+from resolver_cache import ResolverCache
+from song import Song
+from resolver_pool import PRIORITY_PLAYBACK, PRIORITY_PREFETCH, PRIORITY_SEARCH, ResolverPool
+from metrics import PlaybackMetrics, start_metrics_server
+from queue_store import QueueStore
+from single_flight import SingleFlight
+startup_profiler.mark("import bot modules")
+
+STARTUP_PROFILE = '--startup-profile' in sys.argv
 
 # Configure logging
 logging.basicConfig(
@@ -44,56 +74,100 @@ intents = discord.Intents.all()
 
 bot = commands.Bot(command_prefix=settings.COMMAND_PREFIX, intents=intents)
 
-ytdl = yt_dlp.YoutubeDL(settings.YTDL_OPTIONS)
 search_ytdl_options = dict(settings.YTDL_OPTIONS)
 search_ytdl_options['ignoreerrors'] = True
-search_ytdl = yt_dlp.YoutubeDL(search_ytdl_options)
+# Flat listing: playlist entries come back as id/title/url/duration only, with no per-track extraction.
+playlist_ytdl_options = dict(settings.YTDL_OPTIONS)
+playlist_ytdl_options.update({
+    'noplaylist': False,
+    'extract_flat': 'in_playlist',
+    'lazy_playlist': True,
+    'playlistend': settings.YT_PLAYLIST_MAX_TRACKS,
+    'ignoreerrors': True,
+})
+resolver_pool = None  # Created in setup_hook
+playback_metrics = PlaybackMetrics() if settings.METRICS_ENABLED else None
+metrics_server = None  # Started in setup_hook
+yt_lookup_flights = SingleFlight()
+
+resolver_cache = None
+if settings.RESOLVER_CACHE_FILE:
+    resolver_cache = ResolverCache(
+        settings.RESOLVER_CACHE_FILE,
+        settings.RESOLVER_CACHE_TTL_SECONDS,
+        settings.RESOLVER_CACHE_MAX_ENTRIES,
+    )
+
+media_index = MediaIndex(settings.MEDIA_FOLDER)
+media_metadata = None
+if settings.MEDIA_METADATA_CACHE_FILE:
+    media_metadata = MediaMetadataCache(settings.MEDIA_METADATA_CACHE_FILE)
+
+queue_store = None
+if settings.QUEUE_STATE_FILE:
+    queue_store = QueueStore(settings.QUEUE_STATE_FILE)
+    # A clean shutdown stops the resume position at exit rather than at the last save.
+    atexit.register(queue_store.touch)
+
+audio_cache = None
+if settings.AUDIO_CACHE_DIR:
+    audio_cache = AudioCache(
+        settings.AUDIO_CACHE_DIR,
+        settings.AUDIO_CACHE_MAX_MB * 1024 * 1024,
+        settings.AUDIO_CACHE_MIN_PLAYS,
+    )
 
 # GLOBAL VARIABLES
-song_queue = []
-current_volume = settings.DEFAULT_VOLUME
-play_next_lock = asyncio.Lock()
-votes_by_guild = {}
+guild_players = GuildPlayerRegistry(settings.DEFAULT_VOLUME)
 next_queue_id = 1
-current_song = None  # Track the currently playing song for status display
 empty_voice_leave_tasks = {}
 EMPTY_VOICE_LEAVE_DELAY_SECONDS = 10
 playback_monitor_tasks = {}
+stream_prefetch_tasks = {}
+stream_resolve_tasks = {}
+source_prespawn_tasks = {}
+audio_cache_tasks = {}
+audio_cache_transcode_slots = None
 loop_lag_monitor_task = None
+media_index_watch_task = None
+resolver_warmup_task = None
+queue_persist_task = None
+queue_restore_task = None
+_saved_queue_signatures = {}
 
-# Cache blacklist patterns at module level (load once on startup)
-_blacklist_patterns = []
+# Cache blacklist matcher at module level (load once on startup)
+_blacklist_matcher = BlacklistMatcher([])
 
 def load_yt_blacklist_patterns():
-    """Load regex blacklist patterns from config.yaml."""
-    patterns = []
+    """Load regex blacklist patterns from config.yaml into a combined matcher."""
     pattern_strings = settings.YT_BLACKLIST_PATTERNS
-    
+
     if not pattern_strings:
         logger.info("No YouTube blacklist patterns configured.")
-        return patterns
-    
-    for raw_pattern in pattern_strings:
-        if not raw_pattern or raw_pattern.strip().startswith('#'):
-            continue
-        try:
-            patterns.append(re.compile(raw_pattern.strip(), re.IGNORECASE))
-            logger.debug(f"Loaded blacklist pattern: {raw_pattern[:50]}")
-        except re.error as e:
-            logger.warning(f"Invalid regex pattern in config: {raw_pattern} ({e})")
-    
-    return patterns
+        return BlacklistMatcher([])
+
+    patterns = [
+        raw_pattern.strip()
+        for raw_pattern in pattern_strings
+        if raw_pattern and not raw_pattern.strip().startswith('#')
+    ]
+    matcher = BlacklistMatcher(patterns)
+    for raw_pattern, error in matcher.invalid:
+        logger.warning(f"Invalid regex pattern in config: {raw_pattern} ({error})")
+    logger.debug(
+        f"Loaded {len(matcher)} blacklist patterns ({len(matcher.fallback)} matched individually)."
+    )
+    return matcher
 
 def is_blacklisted_title(title):
-    """Return True if the title matches any blacklist regex pattern (uses cached patterns)."""
-    for pattern in _blacklist_patterns:
-        if pattern.search(title):
-            return True
-    return False
+    """Return True if the title matches any blacklist regex pattern (uses the cached matcher)."""
+    return _blacklist_matcher.is_blacklisted(title)
 
 
 def log_playback_metric(event_name, **kwargs):
-    """Emit structured playback telemetry when debug metrics are enabled."""
+    """Record playback telemetry in the metrics registry, and log it when debug metrics are enabled."""
+    if playback_metrics is not None:
+        playback_metrics.record(event_name, kwargs)
     if not settings.PLAYBACK_DEBUG_METRICS:
         return
 
@@ -105,6 +179,25 @@ def log_playback_metric(event_name, **kwargs):
     logger.info("PLAYBACK_METRIC %s", " ".join(fields))
 
 
+def create_resolver_pool():
+    """Build the yt-dlp resolver pool from config.
+
+    Called from setup_hook rather than at import time: in 'process' mode worker
+    processes may re-import this module, and must not start pools of their own.
+    """
+    return ResolverPool(
+        settings.YT_RESOLVER_WORKERS,
+        {'default': settings.YTDL_OPTIONS, 'search': search_ytdl_options, 'playlist': playlist_ytdl_options},
+        mode=settings.YT_RESOLVER_MODE,
+        metric_callback=log_playback_metric,
+    )
+
+
+def get_guild_player(ctx):
+    """Return the playback state for the guild a command was invoked in."""
+    return guild_players.get(ctx.guild.id if ctx.guild else None)
+
+
 def cancel_playback_monitor(guild_id):
     """Cancel heartbeat monitor for one guild if active."""
     task = playback_monitor_tasks.pop(guild_id, None)
@@ -112,7 +205,7 @@ def cancel_playback_monitor(guild_id):
         task.cancel()
 
 
-def start_playback_monitor(ctx, song, playback_started_perf):
+def start_playback_monitor(ctx, song, playback_started_perf, start_offset=0.0):
     """Start periodic playback heartbeat logs while current song is active."""
     if not ctx.guild:
         return
@@ -120,10 +213,10 @@ def start_playback_monitor(ctx, song, playback_started_perf):
     guild_id = ctx.guild.id
     cancel_playback_monitor(guild_id)
 
-    queue_id = song.get('queue_id')
+    queue_id = song.queue_id
     expected_duration_ms = None
-    if song.get('duration'):
-        expected_duration_ms = int(float(song.get('duration')) * 1000)
+    if song.duration:
+        expected_duration_ms = int((float(song.duration) - start_offset) * 1000)
 
     async def monitor():
         try:
@@ -134,8 +227,8 @@ def start_playback_monitor(ctx, song, playback_started_perf):
                 if not voice_client or not voice_client.is_connected():
                     break
 
-                active_song = current_song
-                if not active_song or active_song.get('queue_id') != queue_id:
+                active_song = guild_players.get(guild_id).current_song
+                if not active_song or active_song.queue_id != queue_id:
                     break
 
                 elapsed_ms = int((time.perf_counter() - playback_started_perf) * 1000)
@@ -147,8 +240,9 @@ def start_playback_monitor(ctx, song, playback_started_perf):
                     "playback_heartbeat",
                     guild_id=guild_id,
                     queue_id=queue_id,
-                    source_type=song.get('type'),
+                    source_type=song.type,
                     elapsed_ms=elapsed_ms,
+                    position_ms=int(start_offset * 1000) + elapsed_ms,
                     expected_duration_ms=expected_duration_ms,
                     state=state,
                     latency_ms=latency_ms,
@@ -164,6 +258,184 @@ def start_playback_monitor(ctx, song, playback_started_perf):
     playback_monitor_tasks[guild_id] = bot.loop.create_task(monitor())
 
 
+async def _extract_youtube_stream(song, trigger, min_ttl_remaining):
+    """Refresh the song's stream URL unless the cached one stays valid for min_ttl_remaining seconds."""
+    ttl_remaining = song.stream_ttl_remaining()
+    if ttl_remaining is not None and ttl_remaining >= min_ttl_remaining:
+        log_playback_metric(
+            "yt_stream_cache_hit",
+            queue_id=song.queue_id,
+            trigger=trigger,
+            cache='memory',
+            cache_age_ms=int((settings.YT_STREAM_CACHE_TTL_SECONDS - ttl_remaining) * 1000),
+        )
+        return song.stream_url
+
+    video_id = song.video_id
+    if resolver_cache and video_id:
+        cached_stream = await asyncio.to_thread(resolver_cache.get_stream, video_id)
+        if cached_stream and cached_stream['expires_at'] - time.time() >= min_ttl_remaining:
+            song.apply_stream_info(cached_stream, cached_stream['expires_at'])
+            log_playback_metric(
+                "yt_stream_cache_hit",
+                queue_id=song.queue_id,
+                trigger=trigger,
+                cache='disk',
+                cache_age_ms=int((settings.YT_STREAM_CACHE_TTL_SECONDS - song.stream_ttl_remaining()) * 1000),
+            )
+            return song.stream_url
+
+    priority = PRIORITY_PREFETCH if trigger == 'prefetch' else PRIORITY_PLAYBACK
+    yt_extract_start = time.perf_counter()
+    data = await resolver_pool.extract_info(song.webpage_url, priority=priority)
+    yt_extract_ms = int((time.perf_counter() - yt_extract_start) * 1000)
+    log_playback_metric(
+        "yt_stream_extract",
+        queue_id=song.queue_id,
+        trigger=trigger,
+        extract_ms=yt_extract_ms,
+        cache_age_ms=(
+            int((settings.YT_STREAM_CACHE_TTL_SECONDS - ttl_remaining) * 1000) if ttl_remaining is not None else None
+        ),
+    )
+
+    if 'entries' in data:
+        data = data['entries'][0]
+
+    if not data['url']:
+        raise ValueError("YouTube extractor returned empty stream URL")
+
+    song.apply_stream_info(data, time.time() + settings.YT_STREAM_CACHE_TTL_SECONDS)
+    await remember_stream(song)
+    return song.stream_url
+
+
+async def lookup_cached_video(cache_key, query_type):
+    """Return cached metadata for a video ID (URL queries) or normalized search term, or None."""
+    if not resolver_cache or not cache_key:
+        return None
+    if query_type == 'search':
+        return await asyncio.to_thread(resolver_cache.get_by_query, cache_key)
+    return await asyncio.to_thread(resolver_cache.get_by_video_id, cache_key)
+
+
+async def remember_video(video_data, blacklisted, search_key=None):
+    """Persist freshly extracted YouTube metadata so repeated requests skip yt-dlp."""
+    if not resolver_cache or not video_data.get('id'):
+        return
+    try:
+        await asyncio.to_thread(
+            resolver_cache.put,
+            video_data['id'],
+            video_data.get('title') or "Unknown title",
+            video_data.get('duration'),
+            video_data.get('webpage_url') or video_data.get('url'),
+            blacklisted,
+            search_key,
+        )
+    except Exception as cache_exc:
+        logger.warning("Failed to write resolver cache entry: %s", cache_exc)
+
+
+async def remember_stream(song):
+    """Persist a song's resolved stream URL with its expiry for reuse across guilds."""
+    if not resolver_cache or not song.video_id or not song.stream_url:
+        return
+    try:
+        await asyncio.to_thread(
+            resolver_cache.put_stream,
+            song.video_id,
+            song.stream_url,
+            song.format_id,
+            song.ext,
+            song.stream_expires_at,
+            song.acodec,
+        )
+    except Exception as cache_exc:
+        logger.warning("Failed to write stream cache entry: %s", cache_exc)
+
+
+async def remember_blacklist_verdict(video_id, blacklisted):
+    """Store a recomputed blacklist verdict for a cached video."""
+    if not resolver_cache:
+        return
+    try:
+        await asyncio.to_thread(resolver_cache.set_blacklisted, video_id, blacklisted)
+    except Exception as cache_exc:
+        logger.warning("Failed to update cached blacklist verdict: %s", cache_exc)
+
+
+async def reset_cached_blacklist_verdicts():
+    """Invalidate cached blacklist verdicts after the pattern list changes."""
+    if resolver_cache:
+        await asyncio.to_thread(resolver_cache.reset_blacklist_verdicts)
+
+
+async def resolve_youtube_stream(song, trigger='play', min_ttl_remaining=0):
+    """Return a playable stream URL for a queued YouTube song.
+
+    Concurrent callers for the same queue entry (e.g. prefetch racing play_next)
+    share one extraction instead of resolving twice.
+    """
+    queue_id = song.queue_id
+    task = stream_resolve_tasks.get(queue_id)
+    if task is None:
+        task = asyncio.ensure_future(_extract_youtube_stream(song, trigger, min_ttl_remaining))
+        stream_resolve_tasks[queue_id] = task
+        task.add_done_callback(lambda _: stream_resolve_tasks.pop(queue_id, None))
+    return await asyncio.shield(task)
+
+
+def cancel_stream_prefetch(guild_id):
+    """Cancel pending stream prefetch for one guild if active."""
+    task = stream_prefetch_tasks.pop(guild_id, None)
+    if task and not task.done():
+        task.cancel()
+
+
+def schedule_stream_prefetch(player, song, start_offset=0.0):
+    """Re-resolve upcoming YouTube stream URLs shortly before the current song ends.
+
+    Driven by the current song's known duration; songs without a duration are not prefetched.
+    """
+    guild_id = player.guild_id
+    cancel_stream_prefetch(guild_id)
+
+    depth = settings.YT_PREFETCH_DEPTH
+    lead_sec = settings.YT_PREFETCH_LEAD_SECONDS
+    if depth <= 0 or not song.duration:
+        return
+
+    delay_sec = max(0.0, float(song.duration) - start_offset - lead_sec)
+
+    async def prefetch():
+        try:
+            await asyncio.sleep(delay_sec)
+            if player.current_song is not song:
+                return
+
+            # Seconds until each upcoming track is expected to start.
+            starts_in_sec = float(lead_sec)
+            for upcoming in list(player.queue[:depth]):
+                if starts_in_sec >= settings.YT_STREAM_CACHE_TTL_SECONDS:
+                    break
+                if upcoming.type == 'youtube' and not get_audio_cache_path(upcoming):
+                    try:
+                        await resolve_youtube_stream(upcoming, trigger='prefetch', min_ttl_remaining=starts_in_sec)
+                    except Exception as prefetch_exc:
+                        logger.warning("Stream prefetch failed for '%s': %s", upcoming.title, prefetch_exc)
+                if not upcoming.duration:
+                    break
+                starts_in_sec += float(upcoming.duration)
+        except asyncio.CancelledError:
+            return
+        finally:
+            if stream_prefetch_tasks.get(guild_id) is asyncio.current_task():
+                stream_prefetch_tasks.pop(guild_id, None)
+
+    stream_prefetch_tasks[guild_id] = bot.loop.create_task(prefetch())
+
+
 def ensure_loop_lag_monitor():
     """Start a lightweight event-loop lag monitor once."""
     global loop_lag_monitor_task
@@ -180,6 +452,8 @@ def ensure_loop_lag_monitor():
             lag_ms = int((now - expected) * 1000)
             if lag_ms > threshold_ms:
                 log_playback_metric("event_loop_lag", lag_ms=lag_ms)
+            elif playback_metrics is not None:
+                playback_metrics.record("event_loop_lag", {'lag_ms': max(0, lag_ms)})
             expected = now + interval
 
     loop_lag_monitor_task = bot.loop.create_task(monitor_loop_lag())
@@ -205,80 +479,358 @@ async def clear_bot_status():
         logger.warning(f"Failed to clear bot status: {e}")
 
 def find_best_match(query):
-    """Smart search for local files."""
-    if not os.path.exists(settings.MEDIA_FOLDER):
-        os.makedirs(settings.MEDIA_FOLDER)
-        return None
+    """Smart search for local files (exact, then partial, then fuzzy) against the media index."""
+    return media_index.find(query)
+
+
+async def refresh_media_index():
+    """Pick up added/removed media files; only changed directories are listed again."""
+    started = time.perf_counter()
+    changed = await asyncio.to_thread(media_index.refresh)
+    if changed:
+        log_playback_metric(
+            "media_index_refresh",
+            files=len(media_index),
+            duration_ms=int((time.perf_counter() - started) * 1000),
+        )
+    return changed
 
-    files = [f for f in os.listdir(settings.MEDIA_FOLDER) if f.endswith(('.mp3', '.mp4'))]
-    query = query.lower()
 
-    # 1. Exact Match
-    for f in files:
-        if query == f.lower(): return f
-    # 2. Partial Match
-    for f in files:
-        if query in f.lower(): return f
-    # 3. Fuzzy Match
-    close_matches = difflib.get_close_matches(query, files, n=1, cutoff=0.5)
-    return close_matches[0] if close_matches else None
+async def scan_media_metadata(dirs=None):
+    """Probe new or changed media files with ffprobe and feed their tags into the media index.
+
+    With dirs, only files in those media-relative directories are checked.
+    """
+    global media_metadata
+    if media_metadata is None or (dirs is not None and not dirs):
+        return 0
+    started = time.perf_counter()
+    try:
+        changes = await asyncio.to_thread(media_metadata.scan, settings.MEDIA_FOLDER, media_index.paths, dirs)
+    except FileNotFoundError:
+        logger.warning("ffprobe not found on PATH; local media metadata will not be collected.")
+        media_metadata = None
+        return 0
+    if changes:
+        await asyncio.to_thread(media_index.set_tags, media_metadata.search_tags())
+        log_playback_metric(
+            "media_metadata_scan",
+            changes=changes,
+            files=len(media_metadata),
+            duration_ms=int((time.perf_counter() - started) * 1000),
+        )
+    return changes
+
+
+def ensure_media_index_watcher():
+    """Start the media folder task once: probe metadata, then poll the folder for changes."""
+    global media_index_watch_task
+    if media_index_watch_task and not media_index_watch_task.done():
+        return
+
+    async def watch_media_folder():
+        # The first pass checks every file; later ones only directories whose mtime changed.
+        media_index.take_changed_dirs()
+        changed_dirs = None
+        while True:
+            try:
+                await scan_media_metadata(changed_dirs)
+            except Exception as e:
+                logger.warning(f"Media metadata scan failed: {e}")
+            if settings.MEDIA_INDEX_POLL_SECONDS <= 0:
+                return
+            await asyncio.sleep(settings.MEDIA_INDEX_POLL_SECONDS)
+            try:
+                await refresh_media_index()
+            except Exception as e:
+                logger.warning(f"Media index refresh failed: {e}")
+            changed_dirs = media_index.take_changed_dirs()
+
+    media_index_watch_task = bot.loop.create_task(watch_media_folder())
+
+
+def collect_queue_changes():
+    """Return ([(guild_id, save args or None for delete)], signatures) for guilds whose queue changed.
+
+    The current song is saved first with the wall-clock time its track started, so a
+    restart can resume mid-track. Guilds that are briefly without a voice channel
+    (reconnecting) keep their last snapshot.
+    """
+    changes = []
+    signatures = {}
+    live_guild_ids = set()
+    for player in guild_players:
+        guild_id = player.guild_id
+        if guild_id is None:
+            continue
+        live_guild_ids.add(guild_id)
+        songs = list(player.queue)
+        current = player.current_song
+        playing = current is not None and not (songs and songs[0] is current)
+        if playing:
+            songs.insert(0, current)
+        if not songs:
+            if guild_id in _saved_queue_signatures:
+                changes.append((guild_id, None))
+                signatures[guild_id] = None
+            continue
+
+        guild = bot.get_guild(guild_id)
+        channel = getattr(guild.voice_client, 'channel', None) if guild else None
+        if channel is None:
+            continue
+        signature = (
+            channel.id,
+            player.text_channel_id,
+            player.volume,
+            player.track_started_perf if playing else None,
+            tuple(song.queue_id for song in songs),
+        )
+        if _saved_queue_signatures.get(guild_id) == signature:
+            continue
+        position = player.position() if playing else None
+        started_at = time.time() - position if position is not None else None
+        changes.append((
+            guild_id,
+            (channel.id, player.text_channel_id, player.volume, [song.to_dict() for song in songs], started_at),
+        ))
+        signatures[guild_id] = signature
+
+    for guild_id in _saved_queue_signatures:
+        if guild_id not in live_guild_ids:
+            changes.append((guild_id, None))
+            signatures[guild_id] = None
+    return changes, signatures
+
+
+def write_queue_changes(changes):
+    """Apply collected queue changes to the store and refresh its heartbeat (blocking)."""
+    for guild_id, save_args in changes:
+        if save_args is None:
+            queue_store.delete(guild_id)
+        else:
+            queue_store.save(guild_id, *save_args)
+    queue_store.touch()
+
+
+def ensure_queue_persister():
+    """Start the task that saves changed guild queues every queue_save_interval_seconds (once)."""
+    global queue_persist_task
+    if queue_store is None or settings.QUEUE_SAVE_INTERVAL_SECONDS <= 0:
+        return
+    if queue_persist_task and not queue_persist_task.done():
+        return
+
+    async def persist_queues():
+        while True:
+            await asyncio.sleep(settings.QUEUE_SAVE_INTERVAL_SECONDS)
+            changes, signatures = collect_queue_changes()
+            try:
+                await asyncio.to_thread(write_queue_changes, changes)
+            except Exception as e:
+                logger.warning(f"Failed to save queue state: {e}")
+                continue
+            for guild_id, signature in signatures.items():
+                if signature is None:
+                    _saved_queue_signatures.pop(guild_id, None)
+                else:
+                    _saved_queue_signatures[guild_id] = signature
+
+    queue_persist_task = bot.loop.create_task(persist_queues())
+
+
+async def restore_guild_queue(saved):
+    """Reconnect to a saved guild's voice channel and resume its queue. Returns False if it cannot be resumed."""
+    guild = bot.get_guild(saved['guild_id'])
+    if guild is None:
+        return False
+    voice_channel = guild.get_channel(saved['voice_channel_id'])
+    text_channel = guild.get_channel(saved['text_channel_id']) if saved['text_channel_id'] else None
+    if voice_channel is None or text_channel is None:
+        return False
+    if not any(not member.bot for member in voice_channel.members):
+        return False  # Nobody is left to listen.
+
+    player = guild_players.get(guild.id)
+    if player.current_song is not None or player.queue:
+        return True  # Someone started a new queue while we were restoring others.
+
+    # Connect before touching the player, so a failed connect leaves nothing half-restored.
+    if guild.voice_client is None:
+        await voice_channel.connect(timeout=settings.CONNECTION_TIMEOUT, reconnect=True)
+        await asyncio.sleep(settings.CONNECTION_STABILIZE_DELAY)
+    if player.current_song is not None or player.queue:
+        return True  # A command queued something while we were connecting.
+
+    songs = [restore_song(data) for data in saved['songs']]
+    if saved['position'] is not None:
+        songs[0].start_offset = saved['position']
+    player.volume = saved['volume']
+    player.text_channel_id = text_channel.id
+    player.queue.extend(songs)
+
+    ctx = RestoredContext(guild, text_channel)
+    async with player.lock:
+        if ctx.voice_client and not (ctx.voice_client.is_playing() or ctx.voice_client.is_paused()):
+            await play_next(ctx)
+    log_playback_metric(
+        "queue_restored",
+        guild_id=guild.id,
+        songs=len(songs),
+        position_ms=(int(saved['position'] * 1000) if saved['position'] is not None else None),
+    )
+    await text_channel.send(f"♻️ Resumed the queue after a restart ({len(songs)} track(s)).")
+    return True
+
+
+async def restore_saved_queues():
+    """Resume the queues saved before the last shutdown, one guild at a time.
+
+    Guilds are spaced queue_restore_stagger_seconds apart so a restart resolves one
+    current track at a time instead of flooding yt-dlp; the rest of each queue
+    resolves lazily as usual.
+    """
+    try:
+        saved_queues = await asyncio.to_thread(queue_store.load_all, settings.QUEUE_RESTORE_MAX_AGE_SECONDS)
+    except Exception as e:
+        logger.error(f"Failed to load saved queues: {e}")
+        return
+    restored = 0
+    for saved in saved_queues:
+        try:
+            resumed = await restore_guild_queue(saved)
+        except Exception as e:
+            logger.warning("Failed to restore queue in guild %s: %s", saved['guild_id'], e)
+            continue
+        if not resumed:
+            await asyncio.to_thread(queue_store.delete, saved['guild_id'])
+            continue
+        restored += 1
+        await asyncio.sleep(settings.QUEUE_RESTORE_STAGGER_SECONDS)
+    if saved_queues:
+        logger.info("Restored %s of %s saved queues.", restored, len(saved_queues))
+
+
+async def start_metrics_endpoint():
+    """Expose the metrics registry at /metrics on the configured local port (once)."""
+    global metrics_server
+    if metrics_server is not None or playback_metrics is None or settings.METRICS_PORT <= 0:
+        return
+    try:
+        metrics_server = await start_metrics_server(
+            playback_metrics.render, settings.METRICS_HOST, settings.METRICS_PORT
+        )
+        logger.info("Metrics endpoint listening on http://%s:%s/metrics", settings.METRICS_HOST, settings.METRICS_PORT)
+    except OSError as e:
+        logger.error(f"Failed to start metrics endpoint: {e}")
+
+
+def maybe_log_startup_profile():
+    """With --startup-profile, log the startup table once the gateway is ready and yt-dlp is warm."""
+    if not STARTUP_PROFILE or startup_profiler.has("startup complete"):
+        return
+    if not (startup_profiler.has("gateway ready") and startup_profiler.has("yt-dlp warm-up")):
+        return
+    startup_profiler.mark("startup complete")
+    logger.info("Startup profile:\n%s", startup_profiler.report())
+
+
+def start_resolver_warmup():
+    """Import yt-dlp and build extractor clients in the background instead of on the first !yt.
+
+    Warm-up jobs sit at the head of the resolver queue, so requests made
+    meanwhile wait for them rather than constructing clients themselves.
+    """
+    global resolver_warmup_task
+
+    async def warm_up():
+        started = time.perf_counter()
+        try:
+            await resolver_pool.warm_up()
+        except Exception as e:
+            logger.warning(f"Resolver warm-up failed: {e}")
+            return
+        duration_sec = time.perf_counter() - started
+        startup_profiler.record("yt-dlp warm-up", duration_sec)
+        logger.info("Resolver warm-up finished in %.0f ms.", duration_sec * 1000)
+        maybe_log_startup_profile()
+
+    resolver_warmup_task = bot.loop.create_task(warm_up())
 
 
 async def get_playable_search_result(search_term, max_results=10):
     """Resolve a search term to the first playable YouTube result.
 
     Uses ignoreerrors for search listing so restricted/unavailable results are skipped,
-    then validates each candidate with the main yt-dlp options.
+    then validates candidates with the main yt-dlp options. Up to YT_SEARCH_PARALLELISM
+    candidates are validated concurrently; the first playable one in rank order wins.
     """
     search_expr = f"ytsearch{max_results}:{search_term}"
-    data = await asyncio.to_thread(search_ytdl.extract_info, search_expr, False)
+    data = await resolver_pool.extract_info(search_expr, priority=PRIORITY_SEARCH, profile='search')
     entries = []
     if data and isinstance(data, dict):
         entries = data.get('entries') or []
 
-    skip_count = 0
-    last_error = None
-
-    for entry in entries:
+    # (rank, title, url) for entries worth validating; rank is the position in the listing.
+    candidates = []
+    for rank, entry in enumerate(entries):
         if not entry:
-            skip_count += 1
             continue
 
         title = entry.get('title') or "Unknown title"
         if is_blacklisted_title(title):
             logger.info("Skipping blacklisted YouTube title from search: %s", title)
-            skip_count += 1
             continue
 
         candidate_url = entry.get('webpage_url') or entry.get('url')
         if not candidate_url:
-            skip_count += 1
             continue
 
-        try:
-            candidate_data = await asyncio.to_thread(ytdl.extract_info, candidate_url, False)
-        except Exception as exc:
-            # Restricted, age-gated, private, or unavailable result. Try next.
-            last_error = exc
-            skip_count += 1
-            logger.warning("Skipping unavailable/restricted YouTube result '%s': %s", title, exc)
-            continue
-
-        if candidate_data and isinstance(candidate_data, dict) and 'entries' in candidate_data:
-            nested_entries = candidate_data.get('entries') or []
-            candidate_data = next((item for item in nested_entries if item), None)
-
-        if not candidate_data:
-            skip_count += 1
-            continue
+        candidates.append((rank, title, candidate_url))
 
-        stream_url = candidate_data.get('url')
-        webpage_url = candidate_data.get('webpage_url') or candidate_url
-        if not stream_url and not webpage_url:
-            skip_count += 1
-            continue
+    parallelism = max(1, settings.YT_SEARCH_PARALLELISM)
+    pending = {}
+    next_to_start = 0
+    last_error = None
 
-        return candidate_data, skip_count
+    try:
+        for index, (rank, title, candidate_url) in enumerate(candidates):
+            # Keep a bounded window of lookups in flight, always including the current rank.
+            while next_to_start < len(candidates) and next_to_start < index + parallelism:
+                pending[next_to_start] = resolver_pool.extract_info(
+                    candidates[next_to_start][2], priority=PRIORITY_SEARCH
+                )
+                next_to_start += 1
+
+            try:
+                candidate_data = await pending.pop(index)
+            except Exception as exc:
+                # Restricted, age-gated, private, or unavailable result. Try next.
+                last_error = exc
+                logger.warning("Skipping unavailable/restricted YouTube result '%s': %s", title, exc)
+                continue
+
+            if candidate_data and isinstance(candidate_data, dict) and 'entries' in candidate_data:
+                nested_entries = candidate_data.get('entries') or []
+                candidate_data = next((item for item in nested_entries if item), None)
+
+            if not candidate_data:
+                continue
+
+            stream_url = candidate_data.get('url')
+            webpage_url = candidate_data.get('webpage_url') or candidate_url
+            if not stream_url and not webpage_url:
+                continue
+
+            # Every listing entry ranked above the winner was skipped.
+            return candidate_data, rank
+    finally:
+        for task in pending.values():
+            if task.done():
+                if not task.cancelled():
+                    task.exception()  # Mark as retrieved; the result is no longer needed.
+            else:
+                task.cancel()
 
     if last_error:
         raise last_error
@@ -311,36 +863,55 @@ async def ensure_voice_connected(ctx):
         return False
 
 
-def make_song(song_type, title, data, requester):
+def make_song(song_type, title, webpage_url, requester, **fields):
     """Create a queue song object with requester metadata."""
     global next_queue_id
-    song = {
-        'queue_id': next_queue_id,
-        'type': song_type,
-        'title': title,
-        'data': data,
-        'requester_id': requester.id,
-        'requester_mention': requester.mention,
-        'requester_handle': str(requester),
-        'enqueued_perf': time.perf_counter(),
-    }
+    song = Song(
+        next_queue_id,
+        song_type,
+        title,
+        webpage_url,
+        requester_id=requester.id,
+        requester_mention=requester.mention,
+        requester_handle=str(requester),
+        **fields,
+    )
+    next_queue_id += 1
+    return song
+
+
+def restore_song(data):
+    """Rebuild a song saved with Song.to_dict under a fresh queue ID."""
+    global next_queue_id
+    song = Song.from_dict(next_queue_id, data)
     next_queue_id += 1
     return song
 
 
+class RestoredContext:
+    """Stand-in for commands.Context so play_next can resume a saved queue without a command."""
+
+    def __init__(self, guild, channel):
+        self.guild = guild
+        self.channel = channel
+        self.author = None
+
+    @property
+    def voice_client(self):
+        return self.guild.voice_client
+
+    async def send(self, *args, **kwargs):
+        return await self.channel.send(*args, **kwargs)
+
+
 def is_admin_member(member):
     """Return True if the Discord member has Administrator permission."""
     return bool(getattr(member.guild_permissions, 'administrator', False))
 
 
 def get_command_mode(command_name):
-    """Get normalized command permission mode from config."""
-    mode = settings.get_command_permission_mode(command_name)
-    valid_modes = {'open', 'admin_only', 'vote_if_non_admin'}
-    if mode not in valid_modes:
-        logger.warning(f"Invalid mode '{mode}' for command '{command_name}', using 'open'")
-        return 'open'
-    return mode
+    """Get normalized command permission mode (validated once when the permissions snapshot is built)."""
+    return settings.get_permissions_snapshot().command_modes.get(command_name, 'open')
 
 
 async def enforce_command_access(ctx, command_name):
@@ -373,33 +944,19 @@ def enforce_user_access(ctx):
     if not ctx.author:
         return True
 
-    allowed_ids = settings.get_allowed_user_ids()
+    snapshot = settings.get_permissions_snapshot()
+    allowed_ids = snapshot.allowed_user_ids
     if allowed_ids:
         if ctx.author.id not in allowed_ids:
             raise WhitelistOnlyError(f"User {ctx.author.id} is not in whitelist")
         return True
 
-    if ctx.author.id in settings.get_blocked_user_ids():
+    if ctx.author.id in snapshot.blocked_user_ids:
         raise BlockedUserError(f"User {ctx.author.id} is blocked")
 
     return True
 
 
-def clear_votes(guild_id, action_key=None):
-    """Clear votes for one guild, or one action if action_key is provided."""
-    if action_key is None:
-        votes_by_guild.pop(guild_id, None)
-        return
-
-    guild_votes = votes_by_guild.get(guild_id)
-    if not guild_votes:
-        return
-
-    guild_votes.pop(action_key, None)
-    if not guild_votes:
-        votes_by_guild.pop(guild_id, None)
-
-
 def get_non_bot_voice_member_count(voice_client):
     """Count non-bot users in the bot's current voice channel."""
     if not voice_client or not voice_client.channel:
@@ -431,7 +988,6 @@ def ensure_empty_voice_leave_timer(guild):
         return
 
     async def leave_if_still_empty():
-        global current_song
         try:
             await asyncio.sleep(EMPTY_VOICE_LEAVE_DELAY_SECONDS)
             fresh_voice_client = guild.voice_client
@@ -440,10 +996,11 @@ def ensure_empty_voice_leave_timer(guild):
             if get_non_bot_voice_member_count(fresh_voice_client) > 0:
                 return
 
-            current_song = None
-            song_queue.clear()
-            clear_votes(guild_id)
-            fresh_voice_client.stop()
+            player = guild_players.get(guild_id)
+            player.reset()
+            cancel_stream_prefetch(guild_id)
+            cancel_source_prespawn(guild_id)
+            player.stop(fresh_voice_client)
             await fresh_voice_client.disconnect()
             await clear_bot_status()
             logger.info(
@@ -498,15 +1055,6 @@ def get_skip_vote_required_count(ctx):
     return required, member_count
 
 
-def register_vote(guild_id, action_key, user_id):
-    """Register one vote for a guild/action and return the updated vote set."""
-    guild_votes = votes_by_guild.setdefault(guild_id, {})
-    votes = guild_votes.setdefault(action_key, set())
-    already_voted = user_id in votes
-    votes.add(user_id)
-    return votes, already_voted
-
-
 def validate_command_permissions_config():
     """Ensure every registered command has an explicit permissions config entry."""
     permissions_cfg = settings.get_permissions_config()
@@ -529,9 +1077,379 @@ def validate_command_permissions_config():
             ", ".join(extra)
         )
 
+class OggOpusFileAudio(discord.AudioSource):
+    """Plays a local Ogg Opus file by handing its packets straight to Discord.
+
+    The file is memory-mapped and parsed page by page: no FFmpeg process, no pipe
+    and no re-encode. Only used for files whose packets are 20 ms long.
+    """
+
+    def __init__(self, path, start_offset=0):
+        self.path = path
+        self._reader = OggOpusFile(path)
+        if start_offset:
+            self._reader.seek(start_offset)
+
+    def read(self):
+        try:
+            packet = self._reader.read_packet()
+        except OggError as e:
+            logger.warning(f"Stopping Ogg Opus playback of {self.path}: {e}")
+            return b''
+        if packet is None:
+            return b''
+        # b'' would end playback, so an empty packet in the file is sent as a silent frame.
+        return packet or OPUS_SILENCE_FRAME
+
+    def is_opus(self):
+        return True
+
+    def cleanup(self):
+        self._reader.close()
+
+
+def create_audio_source(source_path, volume, opus_input=False, remote=True, start_offset=0, duration=None):
+    """Create the playback source for a media file or stream URL.
+
+    Opus input played at 100% volume is passed through untouched when opus_passthrough
+    is enabled: no PCM decode, no per-frame volume scaling and no Opus re-encode.
+    Local Ogg Opus files are read directly from a memory map without spawning FFmpeg.
+    In 'ffmpeg' volume mode FFmpeg applies the volume filter and encodes Opus itself.
+    Otherwise the stream is decoded to PCM and wrapped in PCMVolumeTransformer.
+    Decoded sources get the configured crossfade as FFmpeg fade-in/fade-out filters.
+    """
+    if opus_input and settings.OPUS_PASSTHROUGH and volume == 1.0:
+        if not remote:
+            # Local files that are not 20 ms Ogg Opus (e.g. Ogg Vorbis) fall through to a decoding source.
+            if is_discord_ready_ogg_opus(source_path):
+                return OggOpusFileAudio(source_path, start_offset=start_offset)
+        else:
+            ffmpeg_options = settings.get_ffmpeg_options(start_offset=start_offset, remote=remote)
+            return discord.FFmpegOpusAudio(
+                source_path,
+                codec='copy',
+                before_options=ffmpeg_options['before_options'],
+                options='-vn',
+            )
+
+    fade_sec = settings.CROSSFADE_MS / 1000
+    fade_out_at = None
+    if fade_sec and duration:
+        fade_out_at = max(0.0, float(duration) - float(start_offset or 0) - fade_sec)
+
+    if settings.VOLUME_MODE == 'ffmpeg':
+        ffmpeg_options = settings.get_ffmpeg_options(
+            volume=volume,
+            start_offset=start_offset,
+            remote=remote,
+            fade_sec=fade_sec,
+            fade_out_at=fade_out_at,
+        )
+        return discord.FFmpegOpusAudio(source_path, **ffmpeg_options)
+
+    ffmpeg_options = settings.get_ffmpeg_options(
+        start_offset=start_offset,
+        remote=remote,
+        fade_sec=fade_sec,
+        fade_out_at=fade_out_at,
+    )
+    source = discord.PCMVolumeTransformer(discord.FFmpegPCMAudio(source_path, **ffmpeg_options))
+    source.volume = volume
+    return source
+
+
+def restart_current_song(ctx, player, position=None, reason='restart'):
+    """Restart the current song so a new source picks up changed settings or a new position.
+
+    position defaults to the current playback position; !seek passes its target.
+    Returns the position in seconds the song restarts from, or None when the song
+    cannot be restarted (nothing playing, or a stream of unknown length that cannot be seeked).
+    """
+    song = player.current_song
+    current_position = player.position()
+    voice_client = ctx.voice_client
+    if song is None or current_position is None or not voice_client:
+        return None
+    if position is None:
+        position = current_position
+    if not (voice_client.is_playing() or voice_client.is_paused()):
+        return None
+    if song.type == 'url' and not song.duration:
+        return None
+
+    song.start_offset = position
+    player.queue.insert(0, song)
+    log_playback_metric(
+        "playback_restart",
+        guild_id=player.guild_id,
+        queue_id=song.queue_id,
+        reason=reason,
+        position_ms=int(position * 1000),
+    )
+    # The after-callback starts play_next, which picks the song back up at start_offset.
+    player.stop(voice_client)
+    return position
+
+
+def audio_cache_key(song):
+    """Return the audio cache key for a song, or None if it cannot be cached."""
+    if song.type == 'youtube' and song.video_id:
+        return f"youtube:{song.video_id}"
+    return None
+
+
+def get_audio_cache_path(song):
+    """Return the cached Ogg/Opus file for a song, or None on a miss or when the cache is disabled."""
+    if audio_cache is None:
+        return None
+    key = audio_cache_key(song)
+    return audio_cache.lookup(key) if key else None
+
+
+async def transcode_to_audio_cache(song, key):
+    """Write an Ogg/Opus copy of a song's stream into the audio cache (Opus streams are remuxed, not re-encoded)."""
+    stream_url = await resolve_youtube_stream(song, trigger='audio_cache')
+    temp_path = audio_cache.temp_path_for(key)
+    if song.is_opus():
+        codec_args = ['-c:a', 'copy']
+    else:
+        codec_args = ['-c:a', 'libopus', '-b:a', '128k', '-ar', '48000', '-ac', '2']
+    before_options = settings.get_ffmpeg_options(remote=True)['before_options']
+    started = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        'ffmpeg', '-nostdin', '-loglevel', 'error', '-y',
+        *shlex.split(before_options),
+        '-i', stream_url,
+        '-map', '0:a:0', '-vn', *codec_args,
+        '-f', 'ogg', temp_path,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        _, stderr = await process.communicate()
+    except asyncio.CancelledError:
+        process.kill()
+        await process.wait()
+        raise
+    finally:
+        if process.returncode != 0 and os.path.exists(temp_path):
+            os.remove(temp_path)
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg exited with {process.returncode}: {stderr.decode(errors='replace')[:200]}")
+
+    evicted = await asyncio.to_thread(audio_cache.store, key, temp_path, audio_cache_keys_in_use())
+    log_playback_metric(
+        "audio_cache_store",
+        queue_id=song.queue_id,
+        transcode_ms=int((time.perf_counter() - started) * 1000),
+        remuxed=song.is_opus(),
+        evicted=len(evicted),
+        cache_bytes=audio_cache.total_bytes(),
+    )
+
+
+def audio_cache_keys_in_use():
+    """Return the audio cache keys of songs playing or about to play (never evicted)."""
+    keys = set()
+    for player in guild_players:
+        for song in (player.current_song, player.queue[0] if player.queue else None):
+            key = audio_cache_key(song) if song is not None else None
+            if key:
+                keys.add(key)
+    return keys
+
+
+def record_audio_cache_play(song):
+    """Count a play of a song and cache it in the background once it is popular enough.
+
+    Each track is transcoded at most once at a time, and at most
+    storage.audio_cache_max_transcodes transcodes run together; the rest wait
+    for a free slot.
+    """
+    global audio_cache_transcode_slots
+    if audio_cache is None:
+        return
+    key = audio_cache_key(song)
+    if key is None:
+        return
+    if audio_cache_transcode_slots is None:
+        audio_cache_transcode_slots = asyncio.Semaphore(settings.AUDIO_CACHE_MAX_TRANSCODES)
+
+    async def record():
+        try:
+            await asyncio.to_thread(audio_cache.record_play, key)
+            if key in audio_cache_tasks or not audio_cache.should_store(key):
+                return
+            audio_cache_tasks[key] = asyncio.current_task()
+            async with audio_cache_transcode_slots:
+                await transcode_to_audio_cache(song, key)
+        except asyncio.CancelledError:
+            return
+        except Exception as cache_exc:
+            logger.warning("Failed to cache audio for '%s': %s", song.title, cache_exc)
+        finally:
+            if audio_cache_tasks.get(key) is asyncio.current_task():
+                audio_cache_tasks.pop(key, None)
+
+    bot.loop.create_task(record())
+
+
+async def create_song_source(song, volume, start_offset=0.0, queue_wait_ms=None, trigger='play', guild_id=None):
+    """Resolve a queued song and create its playback source, emitting a source_created metric."""
+    cached_path = get_audio_cache_path(song)
+    if song.type == 'local':
+        source_path = os.path.join(settings.MEDIA_FOLDER, song.webpage_url)
+        source_init_start = time.perf_counter()
+        source = create_audio_source(
+            source_path,
+            volume,
+            opus_input=source_path.lower().endswith(OGG_OPUS_EXTENSIONS),
+            remote=False,
+            start_offset=start_offset,
+            duration=song.duration,
+        )
+        source_init_ms = int((time.perf_counter() - source_init_start) * 1000)
+        log_playback_metric(
+            "source_created",
+            guild_id=guild_id,
+            queue_id=song.queue_id,
+            source_type='local',
+            trigger=trigger,
+            init_ms=source_init_ms,
+            queue_wait_ms=queue_wait_ms,
+            opus_passthrough=source.is_opus(),
+        )
+    elif cached_path:
+        logger.debug(f"Playing YouTube song from audio cache: {cached_path}")
+        source_init_start = time.perf_counter()
+        source = create_audio_source(
+            cached_path,
+            volume,
+            opus_input=True,
+            remote=False,
+            start_offset=start_offset,
+            duration=song.duration,
+        )
+        source_init_ms = int((time.perf_counter() - source_init_start) * 1000)
+        log_playback_metric(
+            "source_created",
+            guild_id=guild_id,
+            queue_id=song.queue_id,
+            source_type='youtube',
+            trigger=trigger,
+            init_ms=source_init_ms,
+            queue_wait_ms=queue_wait_ms,
+            audio_cache_hit=True,
+            opus_passthrough=source.is_opus(),
+        )
+    elif song.type == 'youtube':
+        logger.debug(f"Creating FFmpeg source for YouTube: {song.webpage_url}")
+
+        # A pre-spawned source must outlive the rest of the current track.
+        min_ttl_remaining = settings.GAPLESS_PRESPAWN_SECONDS if trigger == 'prespawn' else 0
+        filename = await resolve_youtube_stream(song, trigger=trigger, min_ttl_remaining=min_ttl_remaining)
+
+        logger.debug(f"Stream URL obtained: {filename[:100]}...")
+        logger.debug(f"Format: {song.format_id}, ext: {song.ext}")
+
+        source_init_start = time.perf_counter()
+        source = create_audio_source(
+            filename,
+            volume,
+            opus_input=song.is_opus(),
+            start_offset=start_offset,
+            duration=song.duration,
+        )
+        source_init_ms = int((time.perf_counter() - source_init_start) * 1000)
+        log_playback_metric(
+            "source_created",
+            guild_id=guild_id,
+            queue_id=song.queue_id,
+            source_type='youtube',
+            trigger=trigger,
+            init_ms=source_init_ms,
+            queue_wait_ms=queue_wait_ms,
+            format_id=song.format_id,
+            ext=song.ext,
+            opus_passthrough=source.is_opus(),
+        )
+    elif song.type == 'url':
+        logger.debug(f"Creating FFmpeg source for generic URL: {song.webpage_url}")
+        source_init_start = time.perf_counter()
+        source = create_audio_source(
+            song.webpage_url,
+            volume,
+            start_offset=start_offset,
+            duration=song.duration,
+        )
+        source_init_ms = int((time.perf_counter() - source_init_start) * 1000)
+        log_playback_metric(
+            "source_created",
+            guild_id=guild_id,
+            queue_id=song.queue_id,
+            source_type='url',
+            trigger=trigger,
+            init_ms=source_init_ms,
+            queue_wait_ms=queue_wait_ms,
+        )
+    else:
+        raise ValueError(f"Unknown song type: {song.type}")
+
+    return source
+
+
+def cancel_source_prespawn(guild_id):
+    """Cancel a pending next-source pre-spawn for one guild if active."""
+    task = source_prespawn_tasks.pop(guild_id, None)
+    if task and not task.done():
+        task.cancel()
+
+
+def schedule_source_prespawn(player, song, start_offset=0.0):
+    """Start the next song's FFmpeg process shortly before the current song ends.
+
+    This is a process prespawn only: the stream URL is resolved and FFmpeg is
+    started and connected while the current song finishes, so play_next skips
+    the extraction, spawn and HTTP connect delay. Nothing is read ahead into
+    memory; at most the OS pipe buffer (about 64 KiB) fills before playback
+    starts reading.
+    """
+    guild_id = player.guild_id
+    cancel_source_prespawn(guild_id)
+
+    lead_sec = settings.GAPLESS_PRESPAWN_SECONDS
+    if lead_sec <= 0 or not song.duration:
+        return
+
+    delay_sec = max(0.0, float(song.duration) - start_offset - lead_sec)
+
+    async def prespawn():
+        try:
+            await asyncio.sleep(delay_sec)
+            if player.current_song is not song or not player.queue:
+                return
+
+            upcoming = player.queue[0]
+            volume = player.volume
+            source = await create_song_source(upcoming, volume, trigger='prespawn', guild_id=guild_id)
+            if player.current_song is not song or not player.queue or player.queue[0] is not upcoming:
+                source.cleanup()
+                return
+            player.set_prepared_source(upcoming.queue_id, source, volume)
+        except asyncio.CancelledError:
+            return
+        except Exception as prespawn_exc:
+            logger.warning("Failed to pre-spawn next source in guild %s: %s", guild_id, prespawn_exc)
+        finally:
+            if source_prespawn_tasks.get(guild_id) is asyncio.current_task():
+                source_prespawn_tasks.pop(guild_id, None)
+
+    source_prespawn_tasks[guild_id] = bot.loop.create_task(prespawn())
+
+
 async def play_next(ctx):
-    """Plays the next item in the queue with volume control. Must be called within play_next_lock."""
-    global current_song
+    """Plays the next item in the guild queue with volume control. Must be called within the guild player lock."""
+    player = get_guild_player(ctx)
 
     # Check if voice client exists and is connected
     if not ctx.voice_client or not ctx.voice_client.is_connected():
@@ -542,136 +1460,75 @@ async def play_next(ctx):
     if ctx.voice_client.is_playing() or ctx.voice_client.is_paused():
         return
 
-    if not song_queue:
-        current_song = None
+    if not player.queue:
+        player.current_song = None
+        player.last_track_finished_perf = None
+        player.discard_prepared_source()
         await clear_bot_status()
         return
 
-    song = song_queue.pop(0)
-    current_song = song  # Track currently playing song
-    queue_wait_ms = int((time.perf_counter() - song.get('enqueued_perf', time.perf_counter())) * 1000)
+    song = player.queue.pop(0)
+    player.current_song = song  # Track currently playing song
+    player.text_channel_id = getattr(getattr(ctx, 'channel', None), 'id', player.text_channel_id)
+    start_offset = song.start_offset
+    song.start_offset = 0.0
+    queue_wait_ms = int((time.perf_counter() - song.enqueued_perf) * 1000)
 
     try:
-        logger.debug(f"Now playing - {song['type']}: {song['title']}")
+        logger.debug(f"Now playing - {song.type}: {song.title}")
         # 1. Create the base Source
-        if song['type'] == 'local':
-            source_path = os.path.join(settings.MEDIA_FOLDER, song['data'])
-            source_init_start = time.perf_counter()
-            source = discord.FFmpegPCMAudio(source_path)
-            source_init_ms = int((time.perf_counter() - source_init_start) * 1000)
+        source = player.take_prepared_source(song.queue_id, player.volume) if not start_offset else None
+        prespawned = source is not None
+        if prespawned:
             log_playback_metric(
                 "source_created",
-                queue_id=song.get('queue_id'),
-                source_type='local',
-                init_ms=source_init_ms,
-                queue_wait_ms=queue_wait_ms,
-            )
-        elif song['type'] == 'youtube':
-            logger.debug(f"Creating FFmpeg source for YouTube: {song['data']}")
-
-            data = None
-            cache_age_sec = None
-            cached_stream_url = song.get('stream_url')
-            cached_at = song.get('stream_url_cached_at')
-            if cached_stream_url and cached_at:
-                cache_age_sec = time.time() - float(cached_at)
-                if cache_age_sec <= settings.YT_STREAM_CACHE_TTL_SECONDS:
-                    data = {
-                        'url': cached_stream_url,
-                        'format_id': song.get('format_id'),
-                        'ext': song.get('ext'),
-                        'duration': song.get('duration'),
-                    }
-                    log_playback_metric(
-                        "yt_stream_cache_hit",
-                        queue_id=song.get('queue_id'),
-                        cache_age_ms=int(cache_age_sec * 1000),
-                    )
-
-            if data is None:
-                loop = asyncio.get_event_loop()
-                yt_extract_start = time.perf_counter()
-                data = await loop.run_in_executor(None, lambda: ytdl.extract_info(song['data'], download=False))
-                yt_extract_ms = int((time.perf_counter() - yt_extract_start) * 1000)
-                log_playback_metric(
-                    "yt_stream_extract",
-                    queue_id=song.get('queue_id'),
-                    extract_ms=yt_extract_ms,
-                    cache_age_ms=(int(cache_age_sec * 1000) if cache_age_sec is not None else None),
-                )
-
-            if 'entries' in data:
-                data = data['entries'][0]
-
-            filename = data['url']
-            if not filename:
-                raise ValueError("YouTube extractor returned empty stream URL")
-
-            song['stream_url'] = filename
-            song['stream_url_cached_at'] = time.time()
-            song['format_id'] = data.get('format_id')
-            song['ext'] = data.get('ext')
-            song['duration'] = data.get('duration')
-
-            logger.debug(f"Stream URL obtained: {filename[:100]}...")
-            logger.debug(f"Format: {data.get('format_id')}, ext: {data.get('ext')}")
-
-            source_init_start = time.perf_counter()
-            source = discord.FFmpegPCMAudio(filename, **settings.FFMPEG_OPTIONS)
-            source_init_ms = int((time.perf_counter() - source_init_start) * 1000)
-            log_playback_metric(
-                "source_created",
-                queue_id=song.get('queue_id'),
-                source_type='youtube',
-                init_ms=source_init_ms,
-                queue_wait_ms=queue_wait_ms,
-                format_id=song.get('format_id'),
-                ext=song.get('ext'),
-            )
-        elif song['type'] == 'url':
-            logger.debug(f"Creating FFmpeg source for generic URL: {song['data']}")
-            source_init_start = time.perf_counter()
-            source = discord.FFmpegPCMAudio(
-                song['data'],
-                **settings.FFMPEG_OPTIONS,
-            )
-            source_init_ms = int((time.perf_counter() - source_init_start) * 1000)
-            log_playback_metric(
-                "source_created",
-                queue_id=song.get('queue_id'),
-                source_type='url',
-                init_ms=source_init_ms,
+                guild_id=player.guild_id,
+                queue_id=song.queue_id,
+                source_type=song.type,
+                init_ms=0,
                 queue_wait_ms=queue_wait_ms,
+                prespawned=True,
             )
         else:
-            raise ValueError(f"Unknown song type: {song['type']}")
-
-        # 2. Apply Volume Transformer
-        source = discord.PCMVolumeTransformer(source)
-        source.volume = current_volume
+            player.discard_prepared_source()
+            source = await create_song_source(
+                song, player.volume, start_offset, queue_wait_ms=queue_wait_ms, guild_id=player.guild_id
+            )
 
-        # 3. Play - double check connection and playback state before playing
+        # 2. Play - double check connection and playback state before playing
         if ctx.voice_client and ctx.voice_client.is_connected():
             if ctx.voice_client.is_playing() or ctx.voice_client.is_paused():
                 # Another call started playback while we were preparing this source.
-                song_queue.insert(0, song)
+                source.cleanup()
+                song.start_offset = start_offset
+                player.queue.insert(0, song)
                 return
 
             playback_started = time.perf_counter()
-            start_playback_monitor(ctx, song, playback_started)
+            player.mark_track_started(playback_started, start_offset)
+            start_playback_monitor(ctx, song, playback_started, start_offset)
+            schedule_stream_prefetch(player, song, start_offset)
+            schedule_source_prespawn(player, song, start_offset)
+            if not start_offset:
+                record_audio_cache_play(song)
 
             def after_playback(error):
                 """Called after playback ends. Schedules next song with proper lock protection."""
+                # Decided before anything else runs: a stream cut off mid-track resumes where it stopped.
+                resume_at = player.resume_position(song, settings.PLAYBACK_RESUME_MAX_ATTEMPTS)
+                player.last_track_finished_perf = time.perf_counter()
                 elapsed_ms = int((time.perf_counter() - playback_started) * 1000)
                 drift_ms = None
-                if song.get('duration'):
-                    drift_ms = elapsed_ms - int(float(song.get('duration')) * 1000)
+                if song.duration:
+                    drift_ms = elapsed_ms - int((float(song.duration) - start_offset) * 1000)
                 log_playback_metric(
                     "playback_finished",
-                    queue_id=song.get('queue_id'),
-                    source_type=song.get('type'),
+                    guild_id=player.guild_id,
+                    queue_id=song.queue_id,
+                    source_type=song.type,
                     elapsed_ms=elapsed_ms,
-                    duration_sec=song.get('duration'),
+                    start_offset_ms=(int(start_offset * 1000) if start_offset else None),
+                    duration_sec=song.duration,
                     drift_ms=drift_ms,
                     error=(str(error)[:200] if error else None),
                 )
@@ -682,14 +1539,30 @@ async def play_next(ctx):
                 # Schedule play_next with lock to prevent race conditions
                 async def next_with_lock():
                     lock_wait_start = time.perf_counter()
-                    async with play_next_lock:
+                    async with player.lock:
                         lock_wait_ms = int((time.perf_counter() - lock_wait_start) * 1000)
                         if lock_wait_ms >= 100:
                             log_playback_metric(
                                 "play_next_lock_wait",
-                                queue_id=song.get('queue_id'),
+                                guild_id=player.guild_id,
+                                queue_id=song.queue_id,
                                 wait_ms=lock_wait_ms,
                             )
+                        if resume_at is not None and player.current_song is song:
+                            song.start_offset = resume_at
+                            player.queue.insert(0, song)
+                            log_playback_metric(
+                                "playback_resumed",
+                                guild_id=player.guild_id,
+                                queue_id=song.queue_id,
+                                source_type=song.type,
+                                position_ms=int(resume_at * 1000),
+                                attempt=player.resume_attempts,
+                                error=(str(error)[:200] if error else None),
+                            )
+                            await ctx.send(
+                                f"🔁 Stream dropped; resuming **{song.title}** at {format_position(resume_at)}."
+                            )
                         if ctx.voice_client and ctx.voice_client.is_connected():
                             await play_next(ctx)
 
@@ -703,29 +1576,43 @@ async def play_next(ctx):
 
                 future.add_done_callback(_on_future_done)
 
-            if ctx.guild:
-                clear_votes(ctx.guild.id, action_key='skip')
+            player.clear_votes(action_key='skip')
             ctx.voice_client.play(source, after=after_playback)
 
+            if player.last_track_finished_perf is not None:
+                log_playback_metric(
+                    "playback_gap",
+                    guild_id=player.guild_id,
+                    queue_id=song.queue_id,
+                    source_type=song.type,
+                    gap_ms=int((time.perf_counter() - player.last_track_finished_perf) * 1000),
+                    prespawned=prespawned,
+                )
+                player.last_track_finished_perf = None
+
             log_playback_metric(
                 "playback_started",
-                queue_id=song.get('queue_id'),
-                source_type=song.get('type'),
+                queue_id=song.queue_id,
+                source_type=song.type,
                 queue_wait_ms=queue_wait_ms,
-                queue_size_after_pop=len(song_queue),
+                queue_size_after_pop=len(player.queue),
                 guild_id=getattr(ctx.guild, 'id', None),
             )
             
             # Update bot's status to show currently playing song
-            await update_bot_status(song['title'])
+            await update_bot_status(song.title)
             
-            await ctx.send(
-                f"🎶 **Now Playing:** {song['title']} "
-                f"(requested by {song.get('requester_mention', 'unknown')}, Vol: {int(current_volume * 100)}%)"
-            )
+            # Restarts mid-track (e.g. after a volume change) are announced by the command that caused them.
+            if not start_offset:
+                await ctx.send(
+                    f"🎶 **Now Playing:** {song.title} "
+                    f"(requested by {song.requester_mention}, Vol: {int(player.volume * 100)}%)"
+                )
         else:
             logger.warning("Lost connection before playing")
-            song_queue.insert(0, song)  # Put song back in queue
+            source.cleanup()
+            song.start_offset = start_offset
+            player.queue.insert(0, song)  # Put song back in queue
             await ctx.send("❌ Lost voice connection")
 
     except Exception as e:
@@ -734,14 +1621,20 @@ async def play_next(ctx):
         # Try next song after a small delay
         await asyncio.sleep(1)
         if ctx.voice_client and ctx.voice_client.is_connected():
-            async with play_next_lock:
+            async with player.lock:
                 await play_next(ctx)
 
 # --- EVENTS ---
 
 @bot.event
 async def on_ready():
+    global queue_restore_task
     logger.info(f'Logged in as {bot.user}')
+    if not startup_profiler.has("gateway ready"):
+        startup_profiler.mark("gateway ready")
+        maybe_log_startup_profile()
+    if queue_store is not None and queue_restore_task is None:
+        queue_restore_task = bot.loop.create_task(restore_saved_queues())
 
 @bot.event
 async def on_command_error(ctx, error):
@@ -809,16 +1702,57 @@ async def play(ctx, *, query):
 
     filename = find_best_match(query)
     if not filename:
+        suggestions = media_index.suggest(query, limit=5)
+        if suggestions:
+            choices = "\n".join(f"{index}. `{path}`" for index, (path, _) in enumerate(suggestions, start=1))
+            return await ctx.send(
+                f"❌ File not found matching: {query}\n🔎 Did you mean:\n{choices}\n"
+                f"Use `{settings.COMMAND_PREFIX}play <name>` with one of these."
+            )
         return await ctx.send(f"❌ File not found matching: {query}")
 
-    song_obj = make_song('local', filename, filename, ctx.author)
-    song_queue.append(song_obj)
-
-    async with play_next_lock:
+    player = get_guild_player(ctx)
+    metadata = media_metadata.get(filename) if media_metadata is not None else None
+    title = filename
+    duration = None
+    if metadata:
+        duration = metadata['duration']
+        if metadata['title']:
+            title = f"{metadata['artist']} - {metadata['title']}" if metadata['artist'] else metadata['title']
+    song_obj = make_song('local', title, filename, ctx.author, duration=duration)
+    player.queue.append(song_obj)
+
+    async with player.lock:
         if not ctx.voice_client.is_playing():
             await play_next(ctx)
         else:
-            await ctx.send(f"✅ Added to queue: `{filename}` (added by {ctx.author.mention})")
+            await ctx.send(f"✅ Added to queue: `{song_obj.title}` (added by {ctx.author.mention})")
+
+async def resolve_yt_query(query_type, query, cache_key):
+    """Look a !yt query up in the resolver cache, else resolve it with yt-dlp.
+
+    Returns (video_data, skipped_results, resolver_cache_hit). Blocking yt-dlp calls run
+    on the resolver pool to avoid freezing the event loop. A cached search result that is
+    now blacklisted counts as a miss, so a fresh search can pick the next playable match.
+    """
+    video_data = await lookup_cached_video(cache_key, query_type)
+    if video_data is not None:
+        blacklisted = video_data.get('blacklisted')
+        if query_type == 'search' and blacklisted is None:
+            blacklisted = video_data['blacklisted'] = is_blacklisted_title(video_data['title'])
+            await remember_blacklist_verdict(video_data['id'], blacklisted)
+        if query_type != 'search' or not blacklisted:
+            return video_data, 0, True
+        logger.info("Cached search result is now blacklisted; searching again: %s", video_data['title'])
+    if query_type == 'url':
+        data = await resolver_pool.extract_info(query, priority=PRIORITY_SEARCH)
+        if data and isinstance(data, dict) and 'entries' in data:
+            entries = data.get('entries') or []
+            data = next((item for item in entries if item), None)
+        return data, 0, False
+    video_data, skipped_results = await get_playable_search_result(query, max_results=10)
+    return video_data, skipped_results, False
+
 
 @bot.command()
 async def yt(ctx, *, query):
@@ -832,44 +1766,57 @@ async def yt(ctx, *, query):
 
     # 1. Determine if input is direct URL (YouTube or generic) or a search term.
     #    Lyrics normalization is only for search terms.
+    #    Cache keys: video ID for YouTube links, normalized term for searches, none for generic URLs.
     if is_youtube_link(query):
         search_query = query
         await ctx.send(f"🔗 Loading link...")
         query_type = 'url'
+        cache_key = extract_youtube_video_id(query)
     elif is_probable_url(query):
         search_query = query
         await ctx.send(f"🔗 Loading link...")
         query_type = 'url'
+        cache_key = None
     else:
         effective_search_term, lyrics_added = normalize_yt_search_term(query)
+        search_query = effective_search_term
         if lyrics_added:
             await ctx.send(f"🔎 Searching YouTube for: **{effective_search_term}**...")
         else:
             await ctx.send(f"🔎 Searching YouTube for: **{query}**...")
         query_type = 'search'
+        cache_key = make_search_cache_key(effective_search_term)
 
     try:
         yt_query_start = time.perf_counter()
-        # Run blocking yt-dlp calls in a worker thread to avoid freezing the event loop.
-        if query_type == 'url':
-            data = await asyncio.to_thread(ytdl.extract_info, search_query, False)
-            skipped_results = 0
-            if data and isinstance(data, dict) and 'entries' in data:
-                entries = data.get('entries') or []
-                video_data = next((item for item in entries if item), None)
-            else:
-                video_data = data
-        else:
-            video_data, skipped_results = await get_playable_search_result(effective_search_term, max_results=10)
-
+        # Identical lookups already in flight (a link shared in a busy server) are awaited, not repeated.
+        (video_data, skipped_results, resolver_cache_hit), coalesced = await yt_lookup_flights.run(
+            (query_type, cache_key or search_query),
+            lambda: resolve_yt_query(query_type, search_query, cache_key),
+        )
         yt_query_ms = int((time.perf_counter() - yt_query_start) * 1000)
+        log_playback_metric(
+            "yt_lookup",
+            outcome=('coalesced' if coalesced else 'cache_hit' if resolver_cache_hit else 'extracted'),
+            query_type=query_type,
+        )
 
         if not video_data:
             return await ctx.send("❌ Error: Could not find a playable YouTube result.")
         
         title = video_data['title']
 
-        if is_blacklisted_title(title):
+        blacklisted = video_data.get('blacklisted') if resolver_cache_hit else None
+        if blacklisted is None:
+            blacklisted = is_blacklisted_title(title)
+            # Coalesced waiters share the leader's result; only the leader writes it to the cache.
+            if not coalesced:
+                if resolver_cache_hit:
+                    await remember_blacklist_verdict(video_data['id'], blacklisted)
+                elif cache_key:
+                    await remember_video(video_data, blacklisted, cache_key if query_type == 'search' else None)
+
+        if blacklisted:
             return await ctx.send("❌ This song is in the blacklist.")
 
         # Use webpage_url - this will be processed by yt-dlp again during playback
@@ -883,6 +1830,8 @@ async def yt(ctx, *, query):
         log_playback_metric(
             "yt_enqueue_extract",
             query_type=query_type,
+            resolver_cache_hit=resolver_cache_hit,
+            coalesced=coalesced,
             extract_ms=yt_query_ms,
             skipped_results=skipped_results,
             title=(title[:80] if title else None),
@@ -891,21 +1840,29 @@ async def yt(ctx, *, query):
         if query_type == 'search' and skipped_results > 0:
             await ctx.send(f"ℹ️ Skipped **{skipped_results}** unavailable/restricted result(s) before finding a playable match.")
         
-        song_obj = make_song('youtube', title, webpage_url, ctx.author)
-        if video_data.get('url'):
-            song_obj['stream_url'] = video_data.get('url')
-            song_obj['stream_url_cached_at'] = time.time()
-        song_obj['format_id'] = video_data.get('format_id')
-        song_obj['ext'] = video_data.get('ext')
-        song_obj['duration'] = video_data.get('duration')
-        song_queue.append(song_obj)
+        song_obj = make_song(
+            'youtube',
+            title,
+            webpage_url,
+            ctx.author,
+            video_id=(video_data.get('id') if cache_key else None),
+            duration=video_data.get('duration'),
+        )
+        if video_data.get('url') and not resolver_cache_hit:
+            song_obj.apply_stream_info(video_data, time.time() + settings.YT_STREAM_CACHE_TTL_SECONDS)
+        # The song now holds everything playback needs; drop the info dict before queueing.
+        del video_data
+        if not coalesced:
+            await remember_stream(song_obj)
+        player = get_guild_player(ctx)
+        player.queue.append(song_obj)
         logger.debug(f"Added song to queue - Title: {title}")
 
         # Double-check voice connection before playing
         if not ctx.voice_client:
             return await ctx.send("❌ Lost voice connection.")
 
-        async with play_next_lock:
+        async with player.lock:
             if not ctx.voice_client.is_playing():
                 await play_next(ctx)
             else:
@@ -915,11 +1872,88 @@ async def yt(ctx, *, query):
         logger.error(f"Error in yt command: {e}", exc_info=True)
         await ctx.send(f"❌ Error: {e}")
 
+@bot.command()
+async def playlist(ctx, *, url):
+    """Queues a YouTube playlist; each track is resolved just before it plays. Usage: !playlist <url>"""
+    if not await enforce_command_access(ctx, 'playlist'):
+        return
+    if not is_probable_url(url):
+        return await ctx.send(f"❌ Usage: `{settings.COMMAND_PREFIX}playlist <playlist url>`")
+    if not await ensure_voice_connected(ctx):
+        return
+    if not ctx.voice_client or not ctx.voice_client.is_connected():
+        return await ctx.send("❌ Failed to connect to voice channel.")
+
+    player = get_guild_player(ctx)
+    # Cheap early refusal; the limit is enforced again under the lock when enqueueing.
+    queued_by_user = sum(1 for song in player.queue if song.requester_id == ctx.author.id)
+    if queued_by_user >= settings.YT_MAX_QUEUED_PER_USER:
+        return await ctx.send(
+            f"❌ You already have {queued_by_user} tracks queued (limit {settings.YT_MAX_QUEUED_PER_USER})."
+        )
+
+    await ctx.send("📜 Loading playlist...")
+    try:
+        listing_start = time.perf_counter()
+        data = await resolver_pool.extract_info(url.strip(), priority=PRIORITY_SEARCH, profile='playlist')
+        listing_ms = int((time.perf_counter() - listing_start) * 1000)
+    except Exception as e:
+        logger.error(f"Error listing playlist: {e}", exc_info=True)
+        return await ctx.send(f"❌ Error: {e}")
+
+    entries = ((data.get('entries') or []) if 'entries' in data else [data]) if isinstance(data, dict) else []
+    tracks = []
+    skipped = 0
+    for entry in entries:
+        track = playlist_track(entry)
+        if track is None or is_blacklisted_title(track[0]):
+            skipped += 1
+        else:
+            tracks.append(track)
+    del entries, data
+
+    added = 0
+    limited = False
+    # Count and enqueue under the lock so concurrent requests from one user cannot overshoot the limit together.
+    async with player.lock:
+        queued_by_user = sum(1 for song in player.queue if song.requester_id == ctx.author.id)
+        room = settings.YT_MAX_QUEUED_PER_USER - queued_by_user
+        for title, page_url, video_id, duration in tracks:
+            if added >= room:
+                limited = True
+                break
+            # Only the visible metadata is kept; stream URLs are resolved lazily (and prefetched) at play time.
+            player.queue.append(
+                make_song('youtube', title, page_url, ctx.author, video_id=video_id, duration=duration)
+            )
+            added += 1
+        if added and ctx.voice_client and ctx.voice_client.is_connected() and not ctx.voice_client.is_playing():
+            await play_next(ctx)
+
+    log_playback_metric(
+        "yt_playlist_enqueue",
+        guild_id=player.guild_id,
+        listing_ms=listing_ms,
+        added=added,
+        skipped=skipped,
+        limited=limited,
+    )
+    if not added:
+        if limited:
+            return await ctx.send(
+                f"❌ You already have {queued_by_user} tracks queued (limit {settings.YT_MAX_QUEUED_PER_USER})."
+            )
+        return await ctx.send("❌ No playable tracks found in that playlist.")
+    message = f"✅ Queued **{added}** track(s) from the playlist (added by {ctx.author.mention})."
+    if skipped:
+        message += f" Skipped {skipped} unavailable or blacklisted."
+    if limited:
+        message += f" Stopped at your limit of {settings.YT_MAX_QUEUED_PER_USER} queued tracks."
+    await ctx.send(message)
+
 @bot.command()
 async def volume(ctx, volume: int):
     """Sets volume (0-100). Usage: !volume <0-100>"""
-    global current_volume
-
     if not await enforce_command_access(ctx, 'volume'):
         return
     
@@ -928,11 +1962,19 @@ async def volume(ctx, volume: int):
         return await ctx.send(f"❌ Volume must be between 0-100. You entered: {volume}")
 
     # Convert to float (0.0 - 1.0)
-    current_volume = volume / 100
+    player = get_guild_player(ctx)
+    player.volume = volume / 100
 
     # Adjust currently playing song immediately
-    if ctx.voice_client and ctx.voice_client.source:
-        ctx.voice_client.source.volume = current_volume
+    source = ctx.voice_client.source if ctx.voice_client else None
+    if isinstance(source, discord.PCMVolumeTransformer):
+        source.volume = player.volume
+    elif source is not None:
+        # FFmpeg-filtered and Opus passthrough sources have the volume baked in: restart in place.
+        async with player.lock:
+            position = restart_current_song(ctx, player)
+        if position is None:
+            return await ctx.send(f"🔊 Volume set to **{volume}%** (applies from the next song)")
 
     await ctx.send(f"🔊 Volume set to **{volume}%**")
 
@@ -943,20 +1985,22 @@ async def skip(ctx):
         await ctx.send("❌ Nothing is playing.")
         return
 
+    player = get_guild_player(ctx)
     mode = get_command_mode('skip')
     vote_cfg = settings.get_skip_vote_config()
     force_vote_for_admin = vote_cfg.get('force_vote_for_admin', False)
 
     if is_admin_member(ctx.author) and not force_vote_for_admin:
-        clear_votes(ctx.guild.id, action_key='skip')
-        ctx.voice_client.stop()
+        player.clear_votes(action_key='skip')
+        player.stop(ctx.voice_client)
         await ctx.send("⏭️ Skipped by admin.")
         return
 
     # Let the requester skip their own currently playing song directly.
-    if current_song and current_song.get('requester_id') == ctx.author.id:
-        clear_votes(ctx.guild.id, action_key='skip')
-        ctx.voice_client.stop()
+    current_song = player.current_song
+    if current_song and current_song.requester_id == ctx.author.id:
+        player.clear_votes(action_key='skip')
+        player.stop(ctx.voice_client)
         await ctx.send("⏭️ Skipped your own song.")
         return
 
@@ -965,8 +2009,8 @@ async def skip(ctx):
         return
 
     if mode == 'open':
-        clear_votes(ctx.guild.id, action_key='skip')
-        ctx.voice_client.stop()
+        player.clear_votes(action_key='skip')
+        player.stop(ctx.voice_client)
         await ctx.send("⏭️ Skipped.")
         return
 
@@ -976,7 +2020,7 @@ async def skip(ctx):
             return
 
     required_votes, eligible_count = get_skip_vote_required_count(ctx)
-    votes, already_voted = register_vote(ctx.guild.id, 'skip', ctx.author.id)
+    votes, already_voted = player.register_vote('skip', ctx.author.id)
     current_votes = len(votes)
 
     if already_voted:
@@ -984,8 +2028,8 @@ async def skip(ctx):
         return
 
     if current_votes >= required_votes:
-        clear_votes(ctx.guild.id, action_key='skip')
-        ctx.voice_client.stop()
+        player.clear_votes(action_key='skip')
+        player.stop(ctx.voice_client)
         await ctx.send(f"⏭️ Vote passed (**{current_votes}/{required_votes}** of {eligible_count} listeners). Skipping.")
         return
 
@@ -994,6 +2038,7 @@ async def skip(ctx):
 @bot.command()
 async def queue(ctx):
     """Lists the current queue."""
+    song_queue = get_guild_player(ctx).queue
     if not song_queue:
         await ctx.send("The queue is currently empty.")
         return
@@ -1002,7 +2047,7 @@ async def queue(ctx):
     queue_list = "**Upcoming Songs:**\n"
     for i, song in enumerate(song_queue):
         # i+1 makes it human readable (1, 2, 3 instead of 0, 1, 2)
-        queue_list += f"`{i+1}.` {song['title']} - added by {song.get('requester_handle', 'unknown')}\n"
+        queue_list += f"`{i+1}.` {song.title} - added by {song.requester_handle}\n"
 
     # Discord has a message limit; if queue is huge, show first N
     max_chars = settings.DISCORD_MESSAGE_CHAR_LIMIT - settings.MESSAGE_BUFFER
@@ -1015,15 +2060,51 @@ async def queue(ctx):
 @bot.command()
 async def current(ctx):
     """Shows the currently playing song."""
+    current_song = get_guild_player(ctx).current_song
     if not current_song:
         await ctx.send("❌ No song is currently playing.")
         return
 
     await ctx.send(
-        f"🎶 **Current Song:** {current_song['title']} "
-        f"(requested by {current_song.get('requester_mention', 'unknown')})"
+        f"🎶 **Current Song:** {current_song.title} "
+        f"(requested by {current_song.requester_mention})"
     )
 
+@bot.command()
+async def seek(ctx, *, position: str):
+    """Jumps within the current song. Usage: !seek <1:30 | 90 | +15 | -10>"""
+    player = get_guild_player(ctx)
+    song = player.current_song
+    current_position = player.position()
+    if song is None or current_position is None or not ctx.voice_client or not (
+        ctx.voice_client.is_playing() or ctx.voice_client.is_paused()
+    ):
+        return await ctx.send("❌ Nothing is playing.")
+
+    # Like !skip, the requester may always seek their own song.
+    if song.requester_id != ctx.author.id and not await enforce_command_access(ctx, 'seek'):
+        return
+
+    target = parse_seek_position(position, current_position)
+    if target is None:
+        return await ctx.send(f"❌ Usage: `{settings.COMMAND_PREFIX}seek <1:30 | 90 | +15 | -10>`")
+    if not song.duration:
+        return await ctx.send("❌ This track has no known length and cannot be seeked.")
+    if target >= float(song.duration):
+        return await ctx.send(
+            f"❌ {format_position(target)} is past the end of the track ({format_position(song.duration)})."
+        )
+
+    # FFmpeg restarts with -ss on the song's cached stream URL (re-resolved only if it has expired).
+    async with player.lock:
+        if player.current_song is not song:
+            restarted = None  # The track ended or was skipped while we waited for the lock.
+        else:
+            restarted = restart_current_song(ctx, player, position=target, reason='seek')
+    if restarted is None:
+        return await ctx.send("❌ This track cannot be seeked.")
+    await ctx.send(f"⏩ Seeked to **{format_position(target)}** / {format_position(song.duration)}.")
+
 @bot.command()
 async def skipto(ctx, index: int):
     """Skips to a specific number in the queue. Usage: !skipto <position>"""
@@ -1034,6 +2115,8 @@ async def skipto(ctx, index: int):
         await ctx.send("❌ Nothing is playing right now.")
         return
 
+    player = get_guild_player(ctx)
+    song_queue = player.queue
     if not song_queue:
         await ctx.send("❌ The queue is empty.")
         return
@@ -1047,7 +2130,7 @@ async def skipto(ctx, index: int):
     song_queue[:] = song_queue[index-1:]
 
     # Stop the current song. This triggers 'play_next', which pulls from our NEW shortened queue.
-    ctx.voice_client.stop()
+    player.stop(ctx.voice_client)
     await ctx.send(f"⏭️ Skipped to position **{index}**.")
 
 @bot.command()
@@ -1056,9 +2139,9 @@ async def clear(ctx):
     if not await enforce_command_access(ctx, 'clear'):
         return
 
-    song_queue.clear()
-    if ctx.guild:
-        clear_votes(ctx.guild.id)
+    player = get_guild_player(ctx)
+    player.queue.clear()
+    player.clear_votes()
     await ctx.send("🗑️ **Queue cleared.**")
 
 @bot.command()
@@ -1067,15 +2150,15 @@ async def stop(ctx):
     if not await enforce_command_access(ctx, 'stop'):
         return
 
-    global current_song
-    current_song = None
-    song_queue.clear()
+    player = get_guild_player(ctx)
+    player.reset()
     if ctx.guild:
         cancel_empty_voice_leave_timer(ctx.guild.id)
-        clear_votes(ctx.guild.id)
         cancel_playback_monitor(ctx.guild.id)
+        cancel_stream_prefetch(ctx.guild.id)
+        cancel_source_prespawn(ctx.guild.id)
     if ctx.voice_client:
-        ctx.voice_client.stop()
+        player.stop(ctx.voice_client)
         await ctx.voice_client.disconnect()
         await clear_bot_status()
         await ctx.send("🛑 Stopped and disconnected.")
@@ -1086,6 +2169,8 @@ async def stop(ctx):
 @bot.command()
 async def remove(ctx, index: int):
     """Removes a song from queue by index. Owner/admin can remove directly; others require vote."""
+    player = get_guild_player(ctx)
+    song_queue = player.queue
     if not song_queue:
         await ctx.send("❌ The queue is empty.")
         return
@@ -1098,13 +2183,12 @@ async def remove(ctx, index: int):
     vote_cfg = settings.get_skip_vote_config()
     force_vote_for_admin = vote_cfg.get('force_vote_for_admin', False)
     is_admin = is_admin_member(ctx.author)
-    is_owner = target.get('requester_id') == ctx.author.id
+    is_owner = target.requester_id == ctx.author.id
 
     if (is_admin and not force_vote_for_admin) or is_owner:
         removed_song = song_queue.pop(index - 1)
-        if ctx.guild:
-            clear_votes(ctx.guild.id, action_key=f"remove:{removed_song['queue_id']}")
-        await ctx.send(f"🗑️ Removed `#{index}`: **{removed_song['title']}**")
+        player.clear_votes(action_key=f"remove:{removed_song.queue_id}")
+        await ctx.send(f"🗑️ Removed `#{index}`: **{removed_song.title}**")
         return
 
     if vote_cfg['same_channel_only']:
@@ -1113,8 +2197,8 @@ async def remove(ctx, index: int):
             return
 
     required_votes, eligible_count = get_skip_vote_required_count(ctx)
-    action_key = f"remove:{target['queue_id']}"
-    votes, already_voted = register_vote(ctx.guild.id, action_key, ctx.author.id)
+    action_key = f"remove:{target.queue_id}"
+    votes, already_voted = player.register_vote(action_key, ctx.author.id)
     current_votes = len(votes)
 
     if already_voted:
@@ -1122,17 +2206,17 @@ async def remove(ctx, index: int):
         return
 
     if current_votes >= required_votes:
-        current_index = next((i for i, s in enumerate(song_queue) if s.get('queue_id') == target['queue_id']), None)
+        current_index = next((i for i, s in enumerate(song_queue) if s.queue_id == target.queue_id), None)
         if current_index is None:
-            clear_votes(ctx.guild.id, action_key=action_key)
+            player.clear_votes(action_key=action_key)
             await ctx.send("ℹ️ That song is no longer in the queue.")
             return
 
         removed_song = song_queue.pop(current_index)
-        clear_votes(ctx.guild.id, action_key=action_key)
+        player.clear_votes(action_key=action_key)
         await ctx.send(
             f"🗑️ Vote passed (**{current_votes}/{required_votes}** of {eligible_count} listeners). "
-            f"Removed **{removed_song['title']}**."
+            f"Removed **{removed_song.title}**."
         )
         return
 
@@ -1141,6 +2225,20 @@ async def remove(ctx, index: int):
     )
 
 
+async def save_config_change(ctx):
+    """Write a moderation change to config.yaml now, off the event loop; tell the user if the save failed.
+
+    The change is already in effect in memory either way; a failed save stays pending and is retried
+    by the next config change or at exit.
+    """
+    if await asyncio.to_thread(settings.flush_config):
+        return True
+    await ctx.send(
+        "⚠️ The change is active, but saving config.yaml failed; it will be retried on the next change or at shutdown."
+    )
+    return False
+
+
 @bot.command()
 async def block(ctx, user_id: int = None):
     """Adds a user to the blocked list. Usage: !block <user_id>"""
@@ -1159,10 +2257,9 @@ async def block(ctx, user_id: int = None):
         return
 
     blocked_ids.add(user_id)
-    if settings.update_blocked_user_ids(blocked_ids):
+    settings.update_blocked_user_ids(blocked_ids)
+    if await save_config_change(ctx):
         await ctx.send(f"✅ User `{user_id}` has been **blocked**.")
-    else:
-        await ctx.send("❌ Failed to update configuration.")
 
 
 @bot.command()
@@ -1183,10 +2280,9 @@ async def unblock(ctx, user_id: int = None):
         return
 
     blocked_ids.remove(user_id)
-    if settings.update_blocked_user_ids(blocked_ids):
+    settings.update_blocked_user_ids(blocked_ids)
+    if await save_config_change(ctx):
         await ctx.send(f"✅ User `{user_id}` has been **unblocked**.")
-    else:
-        await ctx.send("❌ Failed to update configuration.")
 
 
 @bot.command()
@@ -1210,10 +2306,9 @@ async def whitelist(ctx, user_id: int = None):
         return
 
     allowed_ids.add(user_id)
-    if settings.update_allowed_user_ids(sorted(allowed_ids)):
+    settings.update_allowed_user_ids(sorted(allowed_ids))
+    if await save_config_change(ctx):
         await ctx.send(f"✅ User `{user_id}` has been **whitelisted**.")
-    else:
-        await ctx.send("❌ Failed to update configuration.")
 
 
 @bot.command()
@@ -1227,10 +2322,9 @@ async def unwhitelist(ctx, user_id: int = None):
         return await ctx.send("📝 Whitelist is already disabled.")
 
     if user_id is None:
-        if settings.update_allowed_user_ids(None):
+        settings.update_allowed_user_ids(None)
+        if await save_config_change(ctx):
             await ctx.send("✅ Whitelist disabled. Access mode is now: everyone except blocked users.")
-        else:
-            await ctx.send("❌ Failed to update configuration.")
         return
 
     if user_id not in allowed_ids:
@@ -1239,15 +2333,14 @@ async def unwhitelist(ctx, user_id: int = None):
 
     allowed_ids.remove(user_id)
     next_value = sorted(allowed_ids) if allowed_ids else None
-    if settings.update_allowed_user_ids(next_value):
+    settings.update_allowed_user_ids(next_value)
+    if await save_config_change(ctx):
         if next_value is None:
             await ctx.send(
                 f"✅ User `{user_id}` removed. Whitelist is now empty, so whitelist mode was disabled."
             )
         else:
             await ctx.send(f"✅ User `{user_id}` has been **removed from whitelist**.")
-    else:
-        await ctx.send("❌ Failed to update configuration.")
 
 
 @bot.command()
@@ -1256,7 +2349,7 @@ async def blacklist(ctx, *, pattern: str = None):
     if not await enforce_command_access(ctx, 'blacklist'):
         return
 
-    global _blacklist_patterns
+    global _blacklist_matcher
     patterns = settings.get_blacklist_patterns()
 
     if pattern is None:
@@ -1275,11 +2368,11 @@ async def blacklist(ctx, *, pattern: str = None):
 
     if pattern in patterns:
         patterns.remove(pattern)
-        if settings.update_blacklist_patterns(patterns):
-            _blacklist_patterns = load_yt_blacklist_patterns()
+        settings.update_blacklist_patterns(patterns)
+        _blacklist_matcher = load_yt_blacklist_patterns()
+        await reset_cached_blacklist_verdicts()
+        if await save_config_change(ctx):
             await ctx.send(f"✅ Removed pattern from blacklist: `{pattern}`")
-        else:
-            await ctx.send("❌ Failed to update configuration.")
     else:
         # Basic validation of regex
         try:
@@ -1288,11 +2381,11 @@ async def blacklist(ctx, *, pattern: str = None):
             return await ctx.send(f"❌ Invalid regex pattern: `{pattern}`")
 
         patterns.append(pattern)
-        if settings.update_blacklist_patterns(patterns):
-            _blacklist_patterns = load_yt_blacklist_patterns()
+        settings.update_blacklist_patterns(patterns)
+        _blacklist_matcher = load_yt_blacklist_patterns()
+        await reset_cached_blacklist_verdicts()
+        if await save_config_change(ctx):
             await ctx.send(f"✅ Added pattern to blacklist: `{pattern}`")
-        else:
-            await ctx.send("❌ Failed to update configuration.")
 
 
 @bot.command()
@@ -1302,12 +2395,14 @@ async def reload_blacklist(ctx):
     
     Note: After editing config.yaml, run this command to reload patterns without restarting the bot.
     """
-    global _blacklist_patterns
+    global _blacklist_matcher
     try:
-        # Reload config module to pick up changes from config.yaml
+        # Write any debounced changes first, then reload config module to pick up changes from config.yaml
+        await asyncio.to_thread(settings.flush_config)
         importlib.reload(settings)
-        _blacklist_patterns = load_yt_blacklist_patterns()
-        count = len(_blacklist_patterns)
+        _blacklist_matcher = load_yt_blacklist_patterns()
+        await reset_cached_blacklist_verdicts()
+        count = len(_blacklist_matcher)
         await ctx.send(f"✅ Blacklist reloaded from config.yaml. {count} patterns loaded.")
         logger.info(f"Blacklist reloaded from config.yaml with {count} patterns.")
     except Exception as e:
@@ -1318,14 +2413,35 @@ async def reload_blacklist(ctx):
 @bot.event
 async def setup_hook():
     """Called after the bot is logged in but before on_ready."""
-    global _blacklist_patterns
+    global _blacklist_matcher, resolver_pool
+    if resolver_pool is None:
+        resolver_pool = create_resolver_pool()
+        logger.info(
+            "Resolver pool started in %s mode with %s workers.", resolver_pool.mode, resolver_pool.worker_count
+        )
+        start_resolver_warmup()
+    await start_metrics_endpoint()
     try:
         validate_command_permissions_config()
-        _blacklist_patterns = load_yt_blacklist_patterns()
+        _blacklist_matcher = load_yt_blacklist_patterns()
+        await reset_cached_blacklist_verdicts()
         ensure_loop_lag_monitor()
-        logger.info(f"Blacklist initialized with {len(_blacklist_patterns)} patterns.")
+        ensure_queue_persister()
+        logger.info(f"Blacklist initialized with {len(_blacklist_matcher)} patterns.")
     except Exception as e:
         logger.error(f"Failed to initialize blacklist: {e}", exc_info=True)
+    try:
+        os.makedirs(settings.MEDIA_FOLDER, exist_ok=True)
+        await refresh_media_index()
+        if media_metadata is not None:
+            await asyncio.to_thread(media_index.set_tags, media_metadata.search_tags())
+        ensure_media_index_watcher()
+        logger.info(f"Media index built with {len(media_index)} files.")
+    except Exception as e:
+        logger.error(f"Failed to build media index: {e}", exc_info=True)
+    startup_profiler.mark("setup_hook")
+
+startup_profiler.mark("module init")
 
 # Main bot startup
 if __name__ == '__main__':
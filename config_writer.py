@@ -0,0 +1,108 @@
+import logging
+import os
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def _fsync_directory(directory):
+    """Persist a rename on POSIX; directories cannot be opened this way on Windows."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write_text(path, text, encoding='utf-8'):
+    """Replace path with text atomically: write a temp file beside it, fsync, then os.replace.
+
+    Readers (and a crash at any point) see either the old file or the new one, never a partial write.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding=encoding, newline='') as handle:
+            handle.write(text)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    _fsync_directory(directory)
+
+
+class DebouncedWriter:
+    """Coalesces bursts of save requests into one call of `write` on a timer thread.
+
+    request() is cheap and never blocks on I/O: the first request arms a
+    threading.Timer for delay_seconds and later requests in that window ride
+    along. flush() writes any pending change immediately (call it at exit or
+    before re-reading the file). `write` must return True on success; failed
+    writes stay pending and are retried by the next request or flush.
+    """
+
+    def __init__(self, write, delay_seconds=1.0, name='debounced-writer'):
+        self._write = write
+        self.delay_seconds = delay_seconds
+        self.name = name
+        self.writes = 0
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._timer = None
+        self._dirty = False
+
+    @property
+    def pending(self):
+        return self._dirty
+
+    def request(self):
+        """Mark the data dirty and make sure a write is scheduled."""
+        with self._lock:
+            self._dirty = True
+            if self._timer is not None:
+                return
+            if self.delay_seconds <= 0:
+                timer = None
+            else:
+                timer = threading.Timer(self.delay_seconds, self.flush)
+                timer.name = self.name
+                timer.daemon = True
+                self._timer = timer
+        if timer is None:
+            self.flush()
+        else:
+            timer.start()
+
+    def flush(self):
+        """Write now if anything is pending; return False only if the write failed."""
+        with self._write_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if not self._dirty:
+                    return True
+                self._dirty = False
+
+            try:
+                ok = self._write()
+            except Exception as e:
+                logger.error("%s: write failed: %s", self.name, e)
+                ok = False
+            if ok:
+                self.writes += 1
+            else:
+                with self._lock:
+                    self._dirty = True
+            return ok
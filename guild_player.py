@@ -0,0 +1,169 @@
+import asyncio
+import re
+import time
+
+# A track that stops within this many seconds of its end is treated as finished, not dropped.
+RESUME_END_TOLERANCE_SEC = 5.0
+
+
+def parse_seek_position(text, current=0.0):
+    """Parse '90', '1:30', '1:02:03', '+15' or '-10' (relative to current) into seconds, or None."""
+    match = re.fullmatch(r'\s*([+-]?)((?:\d+:){0,2}\d+(?:\.\d+)?)\s*', text or '')
+    if not match:
+        return None
+    sign, value = match.groups()
+    seconds = 0.0
+    parts = value.split(':')
+    if any(float(part) >= 60 for part in parts[1:]):
+        return None
+    for part in parts:
+        seconds = seconds * 60 + float(part)
+    if sign == '+':
+        seconds = current + seconds
+    elif sign == '-':
+        seconds = current - seconds
+    return max(0.0, seconds)
+
+
+def format_position(seconds):
+    """Format seconds as m:ss, or h:mm:ss from an hour up."""
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
+
+
+class GuildPlayer:
+    """Playback state owned by one guild: queue, current song, volume, votes and lock."""
+
+    def __init__(self, guild_id, volume):
+        self.guild_id = guild_id
+        self.queue = []
+        self.current_song = None
+        self.volume = volume
+        self.votes = {}
+        self.lock = asyncio.Lock()
+        self.track_started_perf = None
+        self.track_start_offset = 0.0
+        self.last_track_finished_perf = None
+        self.prepared_source = None
+        self.text_channel_id = None  # Where playback messages go; saved with the queue for warm restarts.
+        self.stop_requested = False
+        self.resume_attempts = 0
+        self._resume_queue_id = None
+
+    def clear_votes(self, action_key=None):
+        """Clear all votes, or only the votes for one action if action_key is provided."""
+        if action_key is None:
+            self.votes.clear()
+            return
+        self.votes.pop(action_key, None)
+
+    def register_vote(self, action_key, user_id):
+        """Register one vote for an action and return (vote set, already_voted)."""
+        votes = self.votes.setdefault(action_key, set())
+        already_voted = user_id in votes
+        votes.add(user_id)
+        return votes, already_voted
+
+    def mark_track_started(self, started_perf, start_offset=0.0):
+        """Record when the current track started and the position (seconds) it started from."""
+        self.track_started_perf = started_perf
+        self.track_start_offset = float(start_offset or 0.0)
+        self.stop_requested = False
+
+    def stop(self, voice_client):
+        """Stop the current track on purpose (skip, seek, stop) so it is not auto-resumed."""
+        self.stop_requested = True
+        voice_client.stop()
+
+    def resume_position(self, song, max_attempts, now_perf=None):
+        """Return the position to resume `song` from after playback ended unexpectedly, or None to move on.
+
+        A stream that was not stopped on purpose but ended well short of its known
+        duration was cut off, whether the player reported an error or FFmpeg exited
+        quietly after a network drop. Each song is resumed at most max_attempts times.
+        """
+        if self.stop_requested or self.current_song is not song or song.type == 'local' or not song.duration:
+            return None
+        position = self.position(now_perf)
+        if position is None or position >= float(song.duration) - RESUME_END_TOLERANCE_SEC:
+            return None
+        if self._resume_queue_id != song.queue_id:
+            self._resume_queue_id = song.queue_id
+            self.resume_attempts = 0
+        if self.resume_attempts >= max_attempts:
+            return None
+        self.resume_attempts += 1
+        return position
+
+    def position(self, now_perf=None):
+        """Return the current track's playback position in seconds, or None if nothing is playing."""
+        if self.current_song is None or self.track_started_perf is None:
+            return None
+        now_perf = time.perf_counter() if now_perf is None else now_perf
+        return self.track_start_offset + max(0.0, now_perf - self.track_started_perf)
+
+    def set_prepared_source(self, queue_id, source, volume):
+        """Hold a pre-spawned playback source for the queued song with queue_id."""
+        self.discard_prepared_source()
+        self.prepared_source = (queue_id, source, volume)
+
+    def take_prepared_source(self, queue_id, volume):
+        """Return the pre-spawned source for queue_id if it was built at this volume.
+
+        Anything else that was prepared (another song, stale volume) is cleaned up.
+        """
+        prepared, self.prepared_source = self.prepared_source, None
+        if prepared is None:
+            return None
+        prepared_queue_id, source, prepared_volume = prepared
+        if prepared_queue_id == queue_id and prepared_volume == volume:
+            return source
+        source.cleanup()
+        return None
+
+    def discard_prepared_source(self):
+        """Clean up any pre-spawned source that will not be played."""
+        prepared, self.prepared_source = self.prepared_source, None
+        if prepared is not None:
+            prepared[1].cleanup()
+
+    def reset(self):
+        """Drop the current song, upcoming queue, pending votes and any pre-spawned source."""
+        self.discard_prepared_source()
+        self.last_track_finished_perf = None
+        self.current_song = None
+        self.track_started_perf = None
+        self.track_start_offset = 0.0
+        self.queue.clear()
+        self.votes.clear()
+
+
+class GuildPlayerRegistry:
+    """Lazily creates and tracks one GuildPlayer per guild ID."""
+
+    def __init__(self, default_volume):
+        self.default_volume = default_volume
+        self._players = {}
+
+    def get(self, guild_id):
+        """Return the player for a guild, creating it on first use."""
+        player = self._players.get(guild_id)
+        if player is None:
+            player = GuildPlayer(guild_id, self.default_volume)
+            self._players[guild_id] = player
+        return player
+
+    def peek(self, guild_id):
+        """Return the player for a guild without creating one."""
+        return self._players.get(guild_id)
+
+    def discard(self, guild_id):
+        """Forget a guild's player entirely."""
+        self._players.pop(guild_id, None)
+
+    def __len__(self):
+        return len(self._players)
+
+    def __iter__(self):
+        return iter(list(self._players.values()))
@@ -0,0 +1,208 @@
+import bisect
+import collections
+import heapq
+import os
+import re
+import threading
+
+MEDIA_EXTENSIONS = ('.mp3', '.mp4', '.opus', '.ogg')
+# Minimum trigram similarity for find() to accept a fuzzy match outright.
+FUZZY_CUTOFF = 0.5
+# Minimum similarity for a candidate to be offered as a "did you mean" suggestion.
+SUGGEST_CUTOFF = 0.2
+
+_NON_WORD = re.compile(r'[\W_]+')
+
+
+def normalize_name(text):
+    """Lowercase text and collapse punctuation/underscores into single spaces."""
+    return _NON_WORD.sub(' ', text.lower()).strip()
+
+
+def trigrams(text):
+    """Return the set of word-padded trigrams of normalized text."""
+    grams = set()
+    for word in normalize_name(text).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class _Snapshot:
+    """Immutable lookup tables built from one scan of the media folder."""
+
+    def __init__(self, paths, tags=None):
+        self.paths = sorted(paths, key=str.lower)
+        self.lowered = [path.lower() for path in self.paths]
+        self.basenames = [path.rsplit('/', 1)[-1] for path in self.lowered]
+
+        self.exact = {}
+        for path, lowered, basename in zip(self.paths, self.lowered, self.basenames):
+            self.exact.setdefault(lowered, path)
+            self.exact.setdefault(basename, path)
+
+        # One newline-joined string lets substring search run as a single str.find.
+        self.haystack = "\n".join(self.lowered)
+        self.offsets = []
+        offset = 0
+        for lowered in self.lowered:
+            self.offsets.append(offset)
+            offset += len(lowered) + 1
+
+        # Trigram inverted index over file names without extension, plus one extra
+        # search entry per file for its embedded tags (e.g. "artist title").
+        self.entry_paths = []
+        self.gram_counts = []
+        self.postings = collections.defaultdict(list)
+        for path_id, (path, basename) in enumerate(zip(self.paths, self.basenames)):
+            self._add_search_entry(path_id, os.path.splitext(basename)[0])
+            tag_text = tags.get(path) if tags else None
+            if tag_text:
+                self._add_search_entry(path_id, tag_text)
+
+    def _add_search_entry(self, path_id, text):
+        grams = trigrams(text)
+        if not grams:
+            return
+        entry_id = len(self.entry_paths)
+        self.entry_paths.append(path_id)
+        self.gram_counts.append(len(grams))
+        for gram in grams:
+            self.postings[gram].append(entry_id)
+
+
+class MediaIndex:
+    """In-memory index of playable files under the media folder (including subdirectories).
+
+    refresh() is incremental: only directories whose mtime changed are listed again,
+    so polling a large, mostly static library costs one stat per directory. Lookups
+    run against an immutable snapshot that refresh() swaps in atomically, so find()
+    is safe to call while a refresh runs in a worker thread.
+    """
+
+    def __init__(self, root, extensions=MEDIA_EXTENSIONS):
+        self.root = root
+        self.extensions = tuple(ext.lower() for ext in extensions)
+        self._dirs = {}  # relative dir -> (mtime_ns, files, subdirs)
+        self._changed_dirs = set()  # listed again (or gone) since the last take_changed_dirs()
+        self._tags = {}
+        self._rebuild_lock = threading.Lock()
+        self._snapshot = _Snapshot([])
+
+    def __len__(self):
+        return len(self._snapshot.paths)
+
+    @property
+    def paths(self):
+        """All indexed files as '/'-separated paths relative to the media folder."""
+        return list(self._snapshot.paths)
+
+    def _list_dir(self, rel_dir, abs_dir):
+        files, subdirs = [], []
+        with os.scandir(abs_dir) as entries:
+            for entry in entries:
+                rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                if entry.is_dir():
+                    subdirs.append(rel_path)
+                elif entry.is_file() and entry.name.lower().endswith(self.extensions):
+                    files.append(rel_path)
+        return files, subdirs
+
+    def refresh(self):
+        """Rescan changed directories and return True if the set of indexed files changed."""
+        new_dirs = {}
+        changed = False
+        pending = ['']
+        while pending:
+            rel_dir = pending.pop()
+            abs_dir = os.path.join(self.root, rel_dir) if rel_dir else self.root
+            try:
+                mtime_ns = os.stat(abs_dir).st_mtime_ns
+                cached = self._dirs.get(rel_dir)
+                if cached and cached[0] == mtime_ns:
+                    files, subdirs = cached[1], cached[2]
+                else:
+                    files, subdirs = self._list_dir(rel_dir, abs_dir)
+                    changed = True
+                    self._changed_dirs.add(rel_dir)
+            except OSError:
+                continue
+            new_dirs[rel_dir] = (mtime_ns, files, subdirs)
+            pending.extend(subdirs)
+
+        if new_dirs.keys() != self._dirs.keys():
+            changed = True
+            self._changed_dirs.update(self._dirs.keys() - new_dirs.keys())
+        self._dirs = new_dirs
+        if changed:
+            with self._rebuild_lock:
+                paths = [path for _, files, _ in new_dirs.values() for path in files]
+                self._snapshot = _Snapshot(paths, self._tags)
+        return changed
+
+    def take_changed_dirs(self):
+        """Return and clear the relative directories relisted or removed by refresh() since the last call."""
+        changed, self._changed_dirs = self._changed_dirs, set()
+        return changed
+
+    def set_tags(self, tags):
+        """Replace the extra searchable text per path (e.g. embedded artist/title tags)."""
+        with self._rebuild_lock:
+            self._tags = dict(tags)
+            self._snapshot = _Snapshot(self._snapshot.paths, self._tags)
+
+    def find(self, query):
+        """Return the best matching relative path: exact name, then substring, then fuzzy; or None."""
+        snapshot = self._snapshot
+        query = (query or "").lower()
+        if not query or not snapshot.paths:
+            return None
+
+        # 1. Exact Match (full relative path or file name)
+        exact = snapshot.exact.get(query)
+        if exact is not None:
+            return exact
+
+        # 2. Partial Match
+        if "\n" not in query:
+            position = snapshot.haystack.find(query)
+            if position >= 0:
+                return snapshot.paths[bisect.bisect_right(snapshot.offsets, position) - 1]
+
+        # 3. Fuzzy Match
+        ranked = self._rank(snapshot, query, 1, FUZZY_CUTOFF)
+        return ranked[0][0] if ranked else None
+
+    def suggest(self, query, limit=5, cutoff=SUGGEST_CUTOFF):
+        """Return up to limit (path, similarity) pairs ranked by trigram similarity to query."""
+        return self._rank(self._snapshot, (query or "").lower(), limit, cutoff)
+
+    def _rank(self, snapshot, query, limit, cutoff):
+        stem, ext = os.path.splitext(query)
+        query_grams = trigrams(stem if ext in self.extensions else query)
+        if not query_grams or limit <= 0:
+            return []
+
+        shared = collections.Counter()
+        for gram in query_grams:
+            postings = snapshot.postings.get(gram)
+            if postings:
+                shared.update(postings)
+
+        # Dice coefficient: 2 * |shared| / (|query grams| + |entry grams|); a file's
+        # score is its best entry (file name or tags).
+        query_size = len(query_grams)
+        gram_counts = snapshot.gram_counts
+        entry_paths = snapshot.entry_paths
+        best_by_path = {}
+        min_count = cutoff * (query_size + 1) / 2.0  # no entry below this can reach cutoff
+        for entry_id, count in shared.items():
+            if count < min_count:
+                continue
+            score = 2.0 * count / (query_size + gram_counts[entry_id])
+            path_id = entry_paths[entry_id]
+            if score >= cutoff and score > best_by_path.get(path_id, 0.0):
+                best_by_path[path_id] = score
+
+        best = heapq.nlargest(limit, best_by_path.items(), key=lambda item: (item[1], -item[0]))
+        return [(snapshot.paths[path_id], round(score, 3)) for path_id, score in best]
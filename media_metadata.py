@@ -0,0 +1,169 @@
+import json
+import os
+import subprocess
+import time
+
+from sqlite_util import SQLiteStore
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS media (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    duration REAL,
+    codec TEXT,
+    bitrate INTEGER,
+    title TEXT,
+    artist TEXT,
+    probed_at REAL NOT NULL
+);
+"""
+
+METADATA_FIELDS = ('duration', 'codec', 'bitrate', 'title', 'artist')
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_int(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _parent_dir(rel_path):
+    return rel_path.rsplit('/', 1)[0] if '/' in rel_path else ''
+
+
+def parse_ffprobe_output(output):
+    """Extract duration, codec, bitrate, title and artist from ffprobe JSON output."""
+    data = json.loads(output or "{}")
+    fmt = data.get('format') or {}
+    audio = next((s for s in data.get('streams') or [] if s.get('codec_type') == 'audio'), {})
+
+    # Container tags win over stream tags; tag keys differ in case between formats.
+    tags = {}
+    for source in (audio.get('tags') or {}, fmt.get('tags') or {}):
+        tags.update({str(key).lower(): value for key, value in source.items()})
+
+    return {
+        'duration': _to_float(fmt.get('duration')) or _to_float(audio.get('duration')),
+        'codec': audio.get('codec_name'),
+        'bitrate': _to_int(audio.get('bit_rate')) or _to_int(fmt.get('bit_rate')),
+        'title': (tags.get('title') or '').strip() or None,
+        'artist': (tags.get('artist') or tags.get('album_artist') or '').strip() or None,
+    }
+
+
+def probe_media(path, ffprobe='ffprobe', timeout=30):
+    """Run ffprobe on one file and return its parsed metadata (blocking).
+
+    Raises FileNotFoundError when the ffprobe executable itself is missing.
+    """
+    result = subprocess.run(
+        [ffprobe, '-v', 'error', '-print_format', 'json', '-show_format', '-show_streams', path],
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+        check=True,
+    )
+    return parse_ffprobe_output(result.stdout)
+
+
+class MediaMetadataCache(SQLiteStore):
+    """Persistent SQLite cache of probed media metadata keyed by relative path, mtime and size.
+
+    Every row is mirrored in memory so get() never touches disk or spawns ffprobe;
+    scan() does the blocking work and should run in a worker thread.
+    """
+
+    def __init__(self, path, probe=probe_media, clock=time.time):
+        super().__init__(path, _SCHEMA)
+        self._probe = probe
+        self._clock = clock
+        self._entries = {}
+        for row in self._conn.execute("SELECT * FROM media"):
+            self._entries[row['path']] = {key: row[key] for key in ('mtime_ns', 'size') + METADATA_FIELDS}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, rel_path):
+        """Return cached metadata for a media-relative path, or None if it was never probed."""
+        entry = self._entries.get(rel_path)
+        if entry is None:
+            return None
+        return {key: entry[key] for key in METADATA_FIELDS}
+
+    def search_tags(self):
+        """Return {path: "artist title"} for every file that has embedded tags."""
+        tags = {}
+        for rel_path, entry in list(self._entries.items()):
+            text = " ".join(part for part in (entry['artist'], entry['title']) if part)
+            if text:
+                tags[rel_path] = text
+        return tags
+
+    def scan(self, root, rel_paths, dirs=None):
+        """Probe new or changed files under root and forget files no longer listed.
+
+        rel_paths are '/'-separated paths relative to root. Files whose mtime and
+        size match the cached row are skipped. Files ffprobe cannot read are stored
+        with empty metadata so they are not re-probed until they change. When dirs
+        (relative directories, '' for root) is given, only files directly inside
+        them are checked, so an unchanged library costs no stat per file.
+        Returns the number of rows added, updated or removed.
+        """
+        if dirs is not None:
+            dirs = set(dirs)
+            rel_paths = [rel_path for rel_path in rel_paths if _parent_dir(rel_path) in dirs]
+        changes = 0
+        wanted = set(rel_paths)
+        for rel_path in rel_paths:
+            full_path = os.path.join(root, *rel_path.split('/'))
+            try:
+                stat = os.stat(full_path)
+            except OSError:
+                continue
+            cached = self._entries.get(rel_path)
+            if cached and cached['mtime_ns'] == stat.st_mtime_ns and cached['size'] == stat.st_size:
+                continue
+
+            try:
+                metadata = self._probe(full_path)
+            except FileNotFoundError:
+                raise  # ffprobe is not installed; probing any other file would fail the same way
+            except Exception:
+                metadata = {}
+            self._store(rel_path, stat.st_mtime_ns, stat.st_size, metadata)
+            changes += 1
+
+        stale = [
+            rel_path for rel_path in list(self._entries)
+            if rel_path not in wanted and (dirs is None or _parent_dir(rel_path) in dirs)
+        ]
+        if stale:
+            with self._lock:
+                self._conn.executemany("DELETE FROM media WHERE path = ?", [(rel_path,) for rel_path in stale])
+                for rel_path in stale:
+                    self._entries.pop(rel_path, None)
+            changes += len(stale)
+        return changes
+
+    def _store(self, rel_path, mtime_ns, size, metadata):
+        entry = {'mtime_ns': mtime_ns, 'size': size}
+        entry.update({key: metadata.get(key) for key in METADATA_FIELDS})
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO media "
+                "(path, mtime_ns, size, duration, codec, bitrate, title, artist, probed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (rel_path, mtime_ns, size, entry['duration'], entry['codec'], entry['bitrate'],
+                 entry['title'], entry['artist'], self._clock()),
+            )
+            self._entries[rel_path] = entry
@@ -0,0 +1,227 @@
+import asyncio
+import bisect
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_MS_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+LOOP_LAG_MS_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+DRIFT_MS_BUCKETS = (-5000, -1000, -250, -50, 0, 50, 250, 1000, 5000, 30000)
+
+# Playback events (as passed to log_playback_metric) -> (field, histogram) pairs to observe.
+EVENT_HISTOGRAMS = {
+    'yt_stream_extract': (('extract_ms', 'musicbot_extract_ms'),),
+    'yt_enqueue_extract': (('extract_ms', 'musicbot_extract_ms'),),
+    'ytdl_pool_dequeue': (('wait_ms', 'musicbot_resolver_queue_wait_ms'),),
+    'source_created': (('init_ms', 'musicbot_source_init_ms'), ('queue_wait_ms', 'musicbot_queue_wait_ms')),
+    'play_next_lock_wait': (('wait_ms', 'musicbot_lock_wait_ms'),),
+    'event_loop_lag': (('lag_ms', 'musicbot_loop_lag_ms'),),
+    'playback_finished': (('drift_ms', 'musicbot_playback_drift_ms'),),
+    'playback_gap': (('gap_ms', 'musicbot_playback_gap_ms'),),
+    'voice_connect_ready': (('elapsed_ms', 'musicbot_voice_connect_ms'),),
+    'voice_join_ready': (('elapsed_ms', 'musicbot_voice_connect_ms'),),
+}
+
+PLAYBACK_HISTOGRAMS = (
+    ('musicbot_extract_ms', "yt-dlp extraction time in milliseconds.", LATENCY_MS_BUCKETS),
+    ('musicbot_resolver_queue_wait_ms', "Time yt-dlp jobs waited for a resolver worker.", LATENCY_MS_BUCKETS),
+    ('musicbot_queue_wait_ms', "Time from enqueue to playback source creation.", LATENCY_MS_BUCKETS),
+    ('musicbot_source_init_ms', "Playback source (FFmpeg/Opus reader) start-up time.", LATENCY_MS_BUCKETS),
+    ('musicbot_lock_wait_ms', "Time play_next waited for the guild playback lock.", LATENCY_MS_BUCKETS),
+    ('musicbot_loop_lag_ms', "Event loop scheduling lag in milliseconds.", LOOP_LAG_MS_BUCKETS),
+    ('musicbot_playback_drift_ms', "Played time minus expected track duration.", DRIFT_MS_BUCKETS),
+    ('musicbot_playback_gap_ms', "Silence between one track ending and the next starting.", LATENCY_MS_BUCKETS),
+    ('musicbot_voice_connect_ms', "Voice channel connect time in milliseconds.", LATENCY_MS_BUCKETS),
+)
+
+LABEL_FIELDS = (('guild', 'guild_id'), ('source_type', 'source_type'))
+
+
+def _escape_label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape_label_value(value)}"' for name, value in zip(names, values) if value != '']
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_number(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+class Counter:
+    """Monotonic counter keyed by a tuple of label values."""
+
+    kind = 'counter'
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels=()):
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{_format_labels(self.label_names, labels)} {_format_number(value)}"
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is a bisect and a few integer increments under a lock."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, buckets, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        self._series = {}  # labels -> [per-bucket counts..., +Inf count, sum]
+
+    def observe(self, value, labels=()):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, labels=()):
+        series = self._series.get(labels)
+        return sum(series[:-1]) if series else 0
+
+    def samples(self):
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        bounds = self.buckets + (float('inf'),)
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(bounds, series):
+                cumulative += count
+                le = ('le', _format_number(bound))
+                yield f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}"
+            label_text = _format_labels(self.label_names, labels)
+            yield f"{self.name}_sum{label_text} {_format_number(series[-1])}"
+            yield f"{self.name}_count{label_text} {cumulative}"
+
+
+class MetricsRegistry:
+    """Named counters and histograms rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name!r} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text, label_names=()):
+        return self._register(Counter(name, help_text, label_names))
+
+    def histogram(self, name, help_text, buckets, label_names=()):
+        return self._register(Histogram(name, help_text, buckets, label_names))
+
+    def get(self, name):
+        return self._metrics[name]
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+class PlaybackMetrics:
+    """Turns log_playback_metric events into counters and histograms labelled by guild and source type."""
+
+    def __init__(self, registry=None):
+        self.registry = registry if registry is not None else MetricsRegistry()
+        label_names = tuple(name for name, _ in LABEL_FIELDS)
+        self.events = self.registry.counter(
+            'musicbot_playback_events_total', "Playback telemetry events by name.", ('event',)
+        )
+        self.yt_lookups = self.registry.counter(
+            'musicbot_yt_lookups_total',
+            "!yt lookups by outcome: extracted, cache_hit, or coalesced onto an identical in-flight lookup.",
+            ('outcome',),
+        )
+        self.errors = self.registry.counter(
+            'musicbot_playback_errors_total', "Tracks that ended with a playback error.", label_names
+        )
+        for name, help_text, buckets in PLAYBACK_HISTOGRAMS:
+            self.registry.histogram(name, help_text, buckets, label_names)
+        self._event_histograms = {
+            event: tuple((field, self.registry.get(name)) for field, name in pairs)
+            for event, pairs in EVENT_HISTOGRAMS.items()
+        }
+
+    def record(self, event_name, fields):
+        """Count the event and observe any histogram fields it carries (None values are skipped)."""
+        self.events.inc((event_name,))
+        labels = tuple('' if fields.get(key) is None else str(fields[key]) for _, key in LABEL_FIELDS)
+        for field, histogram in self._event_histograms.get(event_name, ()):
+            value = fields.get(field)
+            if value is not None:
+                histogram.observe(value, labels)
+        if event_name == 'playback_finished' and fields.get('error'):
+            self.errors.inc(labels)
+        elif event_name == 'yt_lookup':
+            self.yt_lookups.inc((str(fields.get('outcome')),))
+
+    def render(self):
+        return self.registry.render()
+
+
+async def _handle_http(reader, writer, render):
+    try:
+        request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+        while True:
+            header = await asyncio.wait_for(reader.readline(), timeout=5)
+            if header in (b'\r\n', b'\n', b''):
+                break
+        parts = request_line.decode('latin-1').split()
+        method, path = (parts[0], parts[1].split('?', 1)[0]) if len(parts) >= 2 else ('', '')
+        if method in ('GET', 'HEAD') and path == '/metrics':
+            status, content_type, body = '200 OK', CONTENT_TYPE, render().encode('utf-8')
+        else:
+            status, content_type, body = '404 Not Found', 'text/plain; charset=utf-8', b'Not found\n'
+        head = (
+            f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n"
+        )
+        writer.write(head.encode('latin-1') + (body if method != 'HEAD' else b''))
+        await writer.drain()
+    except (asyncio.TimeoutError, ConnectionError) as e:
+        logger.debug("Metrics request dropped: %s", e)
+    finally:
+        writer.close()
+
+
+async def start_metrics_server(render, host='127.0.0.1', port=9108):
+    """Serve render() at http://host:port/metrics; returns the asyncio Server."""
+    return await asyncio.start_server(lambda r, w: _handle_http(r, w, render), host, port)
@@ -0,0 +1,206 @@
+import itertools
+import mmap
+import struct
+
+OGG_CAPTURE = b'OggS'
+OGG_OPUS_EXTENSIONS = ('.opus', '.ogg')
+OPUS_SAMPLE_RATE = 48000
+# Discord sends one packet every 20 ms, so only 20 ms packets can be forwarded as-is.
+DISCORD_FRAME_SAMPLES = 960
+# A 20 ms CELT silence frame; stands in for empty (DTX) packets, which Discord would read as end of stream.
+OPUS_SILENCE_FRAME = b'\xf8\xff\xfe'
+
+_PAGE_HEADER = struct.Struct('<4sBBqIIIB')
+
+
+class OggError(ValueError):
+    """Raised when a buffer is not a well-formed Ogg (Opus) stream."""
+
+
+def iter_pages(buffer, offset=0):
+    """Yield (header_type, granule, serial, lacing, body_offset) for each Ogg page in buffer from offset.
+
+    buffer can be bytes, a memoryview or an mmap; page bodies are not copied.
+    CRCs are not verified.
+    """
+    size = len(buffer)
+    while offset + _PAGE_HEADER.size <= size:
+        capture, _, header_type, granule, serial, _, _, segments = _PAGE_HEADER.unpack_from(buffer, offset)
+        if capture != OGG_CAPTURE:
+            raise OggError(f"invalid Ogg page at offset {offset}")
+        table_start = offset + _PAGE_HEADER.size
+        lacing = bytes(buffer[table_start:table_start + segments])
+        body_offset = table_start + segments
+        end = body_offset + sum(lacing)
+        if len(lacing) < segments or end > size:
+            raise OggError(f"truncated Ogg page at offset {offset}")
+        yield header_type, granule, serial, lacing, body_offset
+        offset = end
+
+
+def iter_packets(buffer, offset=0, stream_serial=None):
+    """Yield the packets of one logical stream in buffer, joining packets split across pages.
+
+    Reading starts at the page at offset, which must not begin mid-packet; stream_serial defaults
+    to the serial of that page.
+    """
+    for packet, _ in _iter_packets_with_page_end(buffer, offset, stream_serial):
+        yield packet
+
+
+def _iter_packets_with_page_end(buffer, offset, stream_serial):
+    """Like iter_packets, but yield (packet, offset just past the page the packet ends on)."""
+    partial = []
+    for _, _, serial, lacing, body_offset in iter_pages(buffer, offset):
+        if stream_serial is None:
+            stream_serial = serial
+        if serial != stream_serial:
+            continue
+        start = position = body_offset
+        for lace in lacing:
+            position += lace
+            if lace == 255:
+                continue
+            if partial:
+                partial.append(buffer[start:position])
+                packet = b''.join(partial)
+                partial = []
+            else:
+                packet = bytes(buffer[start:position])
+            yield packet, position
+            start = position
+        if start < position:
+            partial.append(buffer[start:position])
+
+
+def read_opus_headers(buffer):
+    """Check the OpusHead/OpusTags headers; return (serial, pre_skip, offset of the first audio page).
+
+    RFC 7845 ends the OpusTags packet on its own page, so audio always starts on a fresh page.
+    """
+    first_page = next(iter_pages(buffer), None)
+    if first_page is None:
+        raise OggError("not an Ogg Opus stream")
+    serial = first_page[2]
+    packets = _iter_packets_with_page_end(buffer, 0, serial)
+    head, _ = next(packets, (None, 0))
+    if head is None or not head.startswith(b'OpusHead') or len(head) < 19:
+        raise OggError("not an Ogg Opus stream")
+    tags, audio_offset = next(packets, (None, 0))
+    if tags is None or not tags.startswith(b'OpusTags'):
+        raise OggError("missing OpusTags header")
+    pre_skip = struct.unpack_from('<H', head, 10)[0]
+    return serial, pre_skip, audio_offset
+
+
+def iter_opus_packets(buffer):
+    """Yield the audio packets of an Ogg Opus stream; the OpusHead/OpusTags headers are checked and skipped."""
+    serial, _, audio_offset = read_opus_headers(buffer)
+    yield from iter_packets(buffer, audio_offset, serial)
+
+
+def opus_packet_samples(packet):
+    """Return the number of 48 kHz samples an Opus packet decodes to, from its TOC byte (RFC 6716 3.1)."""
+    if not packet:
+        return 0
+    toc = packet[0]
+    config = toc >> 3
+    if config < 12:  # SILK-only: 10/20/40/60 ms
+        frame_samples = (480, 960, 1920, 2880)[config % 4]
+    elif config < 16:  # Hybrid: 10/20 ms
+        frame_samples = (480, 960)[config % 2]
+    else:  # CELT-only: 2.5/5/10/20 ms
+        frame_samples = (120, 240, 480, 960)[config % 4]
+
+    code = toc & 0x03
+    if code == 0:
+        frames = 1
+    elif code in (1, 2):
+        frames = 2
+    else:
+        frames = packet[1] & 0x3F if len(packet) > 1 else 0
+    return frame_samples * frames
+
+
+class OggOpusFile:
+    """Memory-mapped Ogg Opus file that hands out encoded packets without decoding or copying pages."""
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            self._file.close()
+            raise OggError(f"empty file: {path}")
+        try:
+            self._serial, self.pre_skip, self._audio_offset = read_opus_headers(self._mmap)
+        except OggError:
+            self.close()
+            raise
+        self._packets = iter_packets(self._mmap, self._audio_offset, self._serial)
+
+    def read_packet(self):
+        """Return the next Opus packet, or None at the end of the stream.
+
+        Packets can be empty (a zero lacing value, e.g. DTX); that is not the end of the stream.
+        """
+        if self._packets is None:
+            return None
+        packet = next(self._packets, None)
+        if packet is None:
+            self._packets = None
+        return packet
+
+    def seek(self, seconds):
+        """Position the reader `seconds` into the audio, counted from the start of the stream.
+
+        A page's granule position is the sample count (pre-skip included) at the end of its last
+        complete packet, so whole pages before the target are passed over on their headers alone;
+        only the packets of the page holding the target are walked. Reading resumes with the
+        packet that contains the target.
+        """
+        target = self.pre_skip + int(seconds * OPUS_SAMPLE_RATE)
+        resume, position = self._audio_offset, 0
+        for _, granule, serial, lacing, body_offset in iter_pages(self._mmap, self._audio_offset):
+            if serial != self._serial or granule == -1:
+                continue
+            if granule > target:
+                break
+            if lacing and lacing[-1] == 255:
+                continue  # the next page starts mid-packet
+            resume, position = body_offset + sum(lacing), granule
+
+        packets = iter_packets(self._mmap, resume, self._serial)
+        for packet in packets:
+            samples = opus_packet_samples(packet)
+            if position + samples > target:
+                packets = itertools.chain((packet,), packets)
+                break
+            position += samples
+        self._packets = packets
+
+    def close(self):
+        self._packets = None
+        if not self._mmap.closed:
+            self._mmap.close()
+        self._file.close()
+
+
+def is_discord_ready_ogg_opus(path, sample_packets=50):
+    """Return True if path is an Ogg Opus file whose first packets are all 20 ms, so it can be sent as-is."""
+    try:
+        reader = OggOpusFile(path)
+    except (OSError, OggError):
+        return False
+    try:
+        for _ in range(sample_packets):
+            packet = reader.read_packet()
+            if packet is None:
+                break
+            if packet and opus_packet_samples(packet) != DISCORD_FRAME_SAMPLES:
+                return False
+        return True
+    except OggError:
+        return False
+    finally:
+        reader.close()
@@ -0,0 +1,108 @@
+import json
+import time
+
+from sqlite_util import SQLiteStore
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS guild_queues (
+    guild_id INTEGER PRIMARY KEY,
+    voice_channel_id INTEGER NOT NULL,
+    text_channel_id INTEGER,
+    volume REAL NOT NULL,
+    started_at REAL,
+    songs TEXT NOT NULL,
+    saved_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS heartbeat (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    alive_at REAL NOT NULL
+);
+"""
+
+
+class QueueStore(SQLiteStore):
+    """Persistent SQLite snapshot of every guild's queue, replayed after a restart.
+
+    One row per guild holds the voice/text channel, volume and the songs (the
+    current one first when started_at is set) as Song.to_dict JSON. Rows are
+    replaced whenever a guild's queue changes. started_at is the wall-clock time
+    the current track would have started from 0; together with the heartbeat
+    (touched periodically and at exit) it gives the position reached before the
+    bot went down. The persister saves from a worker thread while touch() also runs
+    from atexit, so every call takes the store lock; none of them belong on the
+    event loop.
+    """
+
+    def __init__(self, path, clock=time.time):
+        super().__init__(path, _SCHEMA)
+        self._clock = clock
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM guild_queues").fetchone()[0]
+
+    def save(self, guild_id, voice_channel_id, text_channel_id, volume, songs, started_at=None):
+        """Replace a guild's saved queue. songs are to_dict() dicts; started_at marks songs[0] as playing."""
+        with self._lock:
+            now = self._clock()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO guild_queues "
+                "(guild_id, voice_channel_id, text_channel_id, volume, started_at, songs, saved_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (guild_id, voice_channel_id, text_channel_id, volume, started_at,
+                 json.dumps(songs, separators=(',', ':')), now),
+            )
+            self._touch(now)
+
+    def delete(self, guild_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM guild_queues WHERE guild_id = ?", (guild_id,))
+
+    def _touch(self, now):
+        self._conn.execute("INSERT OR REPLACE INTO heartbeat (id, alive_at) VALUES (0, ?)", (now,))
+
+    def touch(self):
+        """Record that the bot is still running (bounds the resume position after a crash)."""
+        with self._lock:
+            self._touch(self._clock())
+
+    def load_all(self, max_age_seconds):
+        """Return saved queues, most recently changed first, or [] if the bot has been down too long.
+
+        Each entry is a dict with guild_id, voice_channel_id, text_channel_id, volume,
+        songs and position (seconds into songs[0], or None when nothing was playing).
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT alive_at FROM heartbeat WHERE id = 0").fetchone()
+            if row is None:
+                return []
+            alive_at = row['alive_at']
+            if self._clock() - alive_at > max_age_seconds:
+                self._conn.execute("DELETE FROM guild_queues")
+                return []
+            rows = self._conn.execute("SELECT * FROM guild_queues ORDER BY saved_at DESC").fetchall()
+
+        queues = []
+        for row in rows:
+            songs = json.loads(row['songs'])
+            if not songs:
+                continue
+            position = None
+            if row['started_at'] is not None:
+                position = max(0.0, alive_at - row['started_at'])
+                duration = songs[0].get('duration')
+                if duration and position >= float(duration):
+                    # The track had finished; resume with the next one.
+                    songs, position = songs[1:], None
+                    if not songs:
+                        continue
+            queues.append({
+                'guild_id': row['guild_id'],
+                'voice_channel_id': row['voice_channel_id'],
+                'text_channel_id': row['text_channel_id'],
+                'volume': row['volume'],
+                'songs': songs,
+                'position': position,
+            })
+        return queues
@@ -0,0 +1,165 @@
+import time
+
+from sqlite_util import SQLiteStore
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    video_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    duration REAL,
+    webpage_url TEXT NOT NULL,
+    blacklisted INTEGER,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_videos_last_used ON videos (last_used_at);
+
+CREATE TABLE IF NOT EXISTS queries (
+    query TEXT PRIMARY KEY,
+    video_id TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS streams (
+    video_id TEXT PRIMARY KEY,
+    stream_url TEXT NOT NULL,
+    format_id TEXT,
+    ext TEXT,
+    acodec TEXT,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+class ResolverCache(SQLiteStore):
+    """Persistent SQLite cache of yt-dlp metadata keyed by video ID and normalized search term.
+
+    Metadata rows expire after ttl_seconds and the least recently used rows are evicted
+    beyond max_entries. Stream URLs live in a separate table with their own expiry.
+    Every lookup and write is a database round trip (a put also runs eviction in the
+    same transaction), so callers on the event loop go through asyncio.to_thread.
+    """
+
+    def __init__(self, path, ttl_seconds, max_entries, clock=time.time):
+        super().__init__(path, _SCHEMA)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._migrate()
+
+    def _migrate(self):
+        """Add columns introduced after a cache file was created."""
+        stream_columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(streams)")}
+        if 'acodec' not in stream_columns:
+            self._conn.execute("ALTER TABLE streams ADD COLUMN acodec TEXT")
+
+    def _get_video(self, video_id, now):
+        row = self._conn.execute("SELECT * FROM videos WHERE video_id = ?", (video_id,)).fetchone()
+        if row is None:
+            return None
+        if row['created_at'] + self.ttl_seconds < now:
+            self._conn.execute("DELETE FROM videos WHERE video_id = ?", (video_id,))
+            return None
+        self._conn.execute("UPDATE videos SET last_used_at = ? WHERE video_id = ?", (now, video_id))
+        return {
+            'id': row['video_id'],
+            'title': row['title'],
+            'duration': row['duration'],
+            'webpage_url': row['webpage_url'],
+            'blacklisted': None if row['blacklisted'] is None else bool(row['blacklisted']),
+        }
+
+    def get_by_video_id(self, video_id):
+        """Return cached metadata for a video ID, or None when missing or expired."""
+        with self._lock:
+            return self._get_video(video_id, self._clock())
+
+    def get_by_query(self, query):
+        """Return cached metadata for a normalized search term, or None when missing or expired."""
+        with self._lock:
+            now = self._clock()
+            row = self._conn.execute("SELECT * FROM queries WHERE query = ?", (query,)).fetchone()
+            if row is None:
+                return None
+            if row['created_at'] + self.ttl_seconds < now:
+                self._conn.execute("DELETE FROM queries WHERE query = ?", (query,))
+                return None
+            return self._get_video(row['video_id'], now)
+
+    def put(self, video_id, title, duration, webpage_url, blacklisted=None, query=None):
+        """Store metadata for a video, optionally mapping a normalized search term to it."""
+        with self._lock:
+            now = self._clock()
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO videos "
+                    "(video_id, title, duration, webpage_url, blacklisted, created_at, last_used_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (video_id, title, duration, webpage_url,
+                     None if blacklisted is None else int(blacklisted), now, now),
+                )
+                if query:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO queries (query, video_id, created_at) VALUES (?, ?, ?)",
+                        (query, video_id, now),
+                    )
+                self._evict(now)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def set_blacklisted(self, video_id, blacklisted):
+        """Record the blacklist verdict for a cached video."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE videos SET blacklisted = ? WHERE video_id = ?", (int(blacklisted), video_id)
+            )
+
+    def reset_blacklist_verdicts(self):
+        """Forget every cached blacklist verdict (call after the pattern list changes)."""
+        with self._lock:
+            self._conn.execute("UPDATE videos SET blacklisted = NULL")
+
+    def get_stream(self, video_id):
+        """Return cached stream info for a video ID, or None when missing or expired."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM streams WHERE video_id = ?", (video_id,)).fetchone()
+            if row is None:
+                return None
+            if row['expires_at'] <= self._clock():
+                self._conn.execute("DELETE FROM streams WHERE video_id = ?", (video_id,))
+                return None
+            return {
+                'url': row['stream_url'],
+                'format_id': row['format_id'],
+                'ext': row['ext'],
+                'acodec': row['acodec'],
+                'expires_at': row['expires_at'],
+            }
+
+    def put_stream(self, video_id, stream_url, format_id, ext, expires_at, acodec=None):
+        """Store a resolved stream URL until expires_at (unix time).
+
+        acodec is kept so Opus passthrough can be decided on a cache hit.
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO streams (video_id, stream_url, format_id, ext, acodec, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (video_id, stream_url, format_id, ext, acodec, expires_at),
+            )
+
+    def _evict(self, now):
+        """Drop expired rows, then least recently used videos beyond max_entries."""
+        cutoff = now - self.ttl_seconds
+        self._conn.execute("DELETE FROM videos WHERE created_at < ?", (cutoff,))
+        self._conn.execute("DELETE FROM queries WHERE created_at < ?", (cutoff,))
+        self._conn.execute("DELETE FROM streams WHERE expires_at <= ?", (now,))
+        self._conn.execute(
+            "DELETE FROM videos WHERE video_id IN ("
+            "SELECT video_id FROM videos ORDER BY last_used_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        self._conn.execute("DELETE FROM queries WHERE video_id NOT IN (SELECT video_id FROM videos)")
@@ -0,0 +1,238 @@
+import asyncio
+import concurrent.futures
+import concurrent.futures.process
+import itertools
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Lower value runs first.
+PRIORITY_WARMUP = -1
+PRIORITY_PLAYBACK = 0
+PRIORITY_PREFETCH = 1
+PRIORITY_SEARCH = 2
+
+RESOLVER_MODES = ('thread', 'process')
+
+# How long a warmed worker waits for the others before giving up on the barrier.
+WARMUP_BARRIER_TIMEOUT_SEC = 30
+
+# Info-dict keys the bot reads; everything else (formats, thumbnails, subtitles...) is dropped.
+INFO_DICT_KEYS = (
+    'id', 'title', 'duration', 'webpage_url', 'url', 'format_id', 'ext', 'acodec', 'extractor_key', 'ie_key',
+    'is_live',
+)
+
+_STOP = object()
+
+
+def trim_info_dict(info):
+    """Project a yt-dlp info dict onto the few keys the bot uses (recursing into entries)."""
+    if not isinstance(info, dict):
+        return info
+    trimmed = {key: info[key] for key in INFO_DICT_KEYS if key in info}
+    if 'entries' in info:
+        trimmed['entries'] = [trim_info_dict(entry) for entry in (info.get('entries') or [])]
+    return trimmed
+
+
+def build_ytdl_client(options):
+    """Create a YoutubeDL instance; yt_dlp is imported on first use."""
+    import yt_dlp
+    return yt_dlp.YoutubeDL(options)
+
+
+# Per-process state for 'process' mode workers.
+_process_clients = {}
+
+
+def _init_process_worker(profile_options, client_factory):
+    """Pre-build every profile client so the worker is warm before its first job."""
+    for profile, options in profile_options.items():
+        _process_clients[profile] = client_factory(options)
+
+
+def _process_extract_info(profile, url):
+    return trim_info_dict(_process_clients[profile].extract_info(url, download=False))
+
+
+def _process_ready():
+    return True
+
+
+class ResolverPool:
+    """Bounded pool of workers that run yt-dlp extractions in priority order.
+
+    Each worker lazily builds its own client per profile (e.g. one YoutubeDL for
+    playback and one for search listings), so no instance is shared across threads.
+    In 'process' mode each dispatcher thread hands its job to a warm worker process
+    instead, keeping yt-dlp's CPU-heavy parsing off the event loop's GIL; if a worker
+    process dies, the jobs it took down fail and a fresh process pool serves the rest.
+    Results are always trimmed with trim_info_dict.
+    """
+
+    def __init__(self, worker_count, profile_options, mode='thread', client_factory=build_ytdl_client,
+                 metric_callback=None, name='ytdl-resolver'):
+        if mode not in RESOLVER_MODES:
+            raise ValueError(f"Unknown resolver mode: {mode}")
+        self.worker_count = max(1, int(worker_count))
+        self.mode = mode
+        self._profile_options = dict(profile_options)
+        self._client_factory = client_factory
+        self._metric_callback = metric_callback
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._local = threading.local()
+        self._process_pool = None
+        self._process_pool_lock = threading.Lock()
+        self._shut_down = False
+        if mode == 'process':
+            self._process_pool = self._create_process_pool()
+        self._threads = []
+        for index in range(self.worker_count):
+            thread = threading.Thread(target=self._worker, name=f"{name}-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _create_process_pool(self):
+        # Workers are spawned, never forked: by now this process runs the dispatcher threads and
+        # the event loop, and forking it (again after a crash) could copy a lock held mid-update.
+        pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.worker_count,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_process_worker,
+            initargs=(self._profile_options, self._client_factory),
+        )
+        # Spawn and warm every worker process up front.
+        for _ in range(self.worker_count):
+            pool.submit(_process_ready)
+        return pool
+
+    def _run_in_process(self, fn, *args):
+        pool = self._process_pool
+        try:
+            return pool.submit(fn, *args).result()
+        except concurrent.futures.process.BrokenProcessPool:
+            with self._process_pool_lock:
+                # Several dispatchers can see the same breakage; only the first replaces the pool.
+                if self._process_pool is pool and not self._shut_down:
+                    logger.warning("Resolver worker process died; starting a new process pool")
+                    self._process_pool = self._create_process_pool()
+                    pool.shutdown(wait=False)
+            raise
+
+    @property
+    def queue_depth(self):
+        """Number of jobs waiting for a free worker."""
+        return self._queue.qsize()
+
+    def _get_client(self, profile):
+        clients = getattr(self._local, 'clients', None)
+        if clients is None:
+            clients = self._local.clients = {}
+        client = clients.get(profile)
+        if client is None:
+            client = clients[profile] = self._client_factory(self._profile_options[profile])
+        return client
+
+    def _warm(self, barrier):
+        if self._process_pool is not None:
+            self._run_in_process(_process_ready)
+        else:
+            for profile in self._profile_options:
+                self._get_client(profile)
+        # Hold this worker until every worker has taken a warm-up job of its own.
+        try:
+            barrier.wait(timeout=WARMUP_BARRIER_TIMEOUT_SEC)
+        except threading.BrokenBarrierError:
+            logger.debug("Resolver warm-up barrier broken; a worker was busy with another job")
+        return True
+
+    def _run_job(self, profile, url):
+        if profile is None:
+            # Warm-up jobs carry their barrier in place of a URL.
+            return self._warm(url)
+        if self._process_pool is not None:
+            return self._run_in_process(_process_extract_info, profile, url)
+        return trim_info_dict(self._get_client(profile).extract_info(url, download=False))
+
+    def _emit(self, event_name, **kwargs):
+        if self._metric_callback is None:
+            return
+        try:
+            self._metric_callback(event_name, **kwargs)
+        except Exception as metric_exc:
+            logger.debug("Resolver pool metric callback failed: %s", metric_exc)
+
+    def _worker(self):
+        while True:
+            priority, _, job = self._queue.get()
+            if job is _STOP:
+                return
+
+            loop, future, profile, url, enqueued_perf = job
+            if future.cancelled():
+                continue
+
+            if profile is not None:
+                self._emit(
+                    "ytdl_pool_dequeue",
+                    priority=priority,
+                    profile=profile,
+                    wait_ms=int((time.perf_counter() - enqueued_perf) * 1000),
+                    queue_depth=self._queue.qsize(),
+                )
+            try:
+                result = self._run_job(profile, url)
+            except Exception as exc:
+                loop.call_soon_threadsafe(_resolve_future, future, None, exc)
+            else:
+                loop.call_soon_threadsafe(_resolve_future, future, result, None)
+
+    def _submit(self, priority, profile, url):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put((priority, next(self._sequence), (loop, future, profile, url, time.perf_counter())))
+        return future
+
+    def extract_info(self, url, priority=PRIORITY_SEARCH, profile='default'):
+        """Queue an extract_info(url, download=False) call and return an awaitable future.
+
+        Cancelling the future before a worker picks the job up drops it from the queue.
+        """
+        future = self._submit(priority, profile, url)
+        self._emit("ytdl_pool_enqueue", priority=priority, profile=profile, queue_depth=self._queue.qsize())
+        return future
+
+    def warm_up(self):
+        """Import yt-dlp and build clients ahead of the first real job; returns an awaitable.
+
+        One warm-up job per worker is queued ahead of everything else, so jobs
+        submitted meanwhile simply wait behind it. A barrier keeps each worker on
+        its own job until all of them have one, so every worker gets warmed (in
+        process mode the worker processes warm themselves in their initializer).
+        """
+        barrier = threading.Barrier(self.worker_count)
+        return asyncio.gather(*(self._submit(PRIORITY_WARMUP, None, barrier) for _ in range(self.worker_count)))
+
+    def shutdown(self):
+        """Stop all workers once the jobs already queued ahead of the stop markers finish."""
+        for _ in self._threads:
+            self._queue.put((float('inf'), next(self._sequence), _STOP))
+        with self._process_pool_lock:
+            self._shut_down = True
+            if self._process_pool is not None:
+                self._process_pool.shutdown(wait=False)
+
+
+def _resolve_future(future, result, exc):
+    if future.cancelled():
+        return
+    if exc is not None:
+        future.set_exception(exc)
+    else:
+        future.set_result(result)
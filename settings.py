@@ -1,6 +1,14 @@
+import atexit
+import copy
+import io
 import os
+import threading
+import types
 import yaml
 import logging
+from collections import namedtuple
+
+from config_writer import DebouncedWriter, atomic_write_text
 
 try:
     from ruamel.yaml import YAML
@@ -78,17 +86,56 @@ PLAYBACK_DEBUG_METRICS = _get_env_bool(
     _get_bool(_config.get('playback', {}).get('debug_metrics', _playback_debug_default), _playback_debug_default),
 )
 YT_STREAM_CACHE_TTL_SECONDS = int(_config.get('playback', {}).get('yt_stream_cache_ttl_seconds', 300))
+YT_PREFETCH_LEAD_SECONDS = int(_config.get('playback', {}).get('yt_prefetch_lead_seconds', 20))
+VOLUME_MODE = str(_config.get('playback', {}).get('volume_mode', 'transformer')).strip().lower()
+if VOLUME_MODE not in {'transformer', 'ffmpeg'}:
+    logger.warning("Invalid playback.volume_mode '%s' in config; falling back to 'transformer'", VOLUME_MODE)
+    VOLUME_MODE = 'transformer'
+GAPLESS_PRESPAWN_SECONDS = float(_config.get('playback', {}).get('gapless_prespawn_seconds', 3))
+CROSSFADE_MS = int(_config.get('playback', {}).get('crossfade_ms', 0))
+OPUS_PASSTHROUGH = _get_bool(_config.get('playback', {}).get('opus_passthrough', True), True)
+YT_PREFETCH_DEPTH = int(_config.get('playback', {}).get('yt_prefetch_depth', 1))
+PLAYBACK_RESUME_MAX_ATTEMPTS = int(_config.get('playback', {}).get('resume_max_attempts', 3))
 
 # --- Media and Storage ---
 MEDIA_FOLDER = _config.get('storage', {}).get('media_folder', 'media')
+CONFIG_SAVE_DELAY_SECONDS = float(_config.get('storage', {}).get('config_save_delay_seconds', 1.0))
+MEDIA_INDEX_POLL_SECONDS = float(_config.get('storage', {}).get('media_index_poll_seconds', 30))
+MEDIA_METADATA_CACHE_FILE = _config.get('storage', {}).get('media_metadata_cache_file', 'media_metadata.sqlite3')
+AUDIO_CACHE_DIR = _config.get('storage', {}).get('audio_cache_dir', '')
+AUDIO_CACHE_MAX_MB = int(_config.get('storage', {}).get('audio_cache_max_mb', 2048))
+AUDIO_CACHE_MIN_PLAYS = int(_config.get('storage', {}).get('audio_cache_min_plays', 3))
+AUDIO_CACHE_MAX_TRANSCODES = max(1, int(_config.get('storage', {}).get('audio_cache_max_transcodes', 1)))
+QUEUE_STATE_FILE = _config.get('storage', {}).get('queue_state_file', 'queue_state.sqlite3')
+QUEUE_SAVE_INTERVAL_SECONDS = float(_config.get('storage', {}).get('queue_save_interval_seconds', 2))
+QUEUE_RESTORE_MAX_AGE_SECONDS = float(_config.get('storage', {}).get('queue_restore_max_age_seconds', 1800))
+QUEUE_RESTORE_STAGGER_SECONDS = float(_config.get('storage', {}).get('queue_restore_stagger_seconds', 1.0))
+RESOLVER_CACHE_FILE = _config.get('storage', {}).get('resolver_cache_file', 'resolver_cache.sqlite3')
+RESOLVER_CACHE_TTL_SECONDS = int(_config.get('storage', {}).get('resolver_cache_ttl_seconds', 7 * 24 * 3600))
+RESOLVER_CACHE_MAX_ENTRIES = int(_config.get('storage', {}).get('resolver_cache_max_entries', 5000))
 LOG_FILE = os.getenv('MUSICBOT_LOG_FILE', _config.get('storage', {}).get('log_file', 'musicbot.log'))
 _default_log_level = 'DEBUG' if RUNTIME_MODE == 'debug' else 'INFO'
 LOG_LEVEL = os.getenv('MUSICBOT_LOG_LEVEL', _config.get('storage', {}).get('log_level', _default_log_level))
 
+# --- Metrics ---
+METRICS_ENABLED = _get_bool(_config.get('metrics', {}).get('enabled', True), True)
+METRICS_HOST = str(_config.get('metrics', {}).get('host', '127.0.0.1'))
+METRICS_PORT = int(_config.get('metrics', {}).get('port', 9108))
+
 # --- Message Settings ---
 DISCORD_MESSAGE_CHAR_LIMIT = _config.get('message', {}).get('embed_char_limit', 2000)
 MESSAGE_BUFFER = _config.get('message', {}).get('embed_buffer', 100)
 
+# --- YouTube Search Settings ---
+YT_SEARCH_PARALLELISM = int(_config.get('youtube', {}).get('search_parallelism', 3))
+YT_RESOLVER_WORKERS = int(_config.get('youtube', {}).get('resolver_workers', 4))
+YT_RESOLVER_MODE = str(_config.get('youtube', {}).get('resolver_mode', 'thread')).strip().lower()
+if YT_RESOLVER_MODE not in {'thread', 'process'}:
+    logger.warning("Invalid youtube.resolver_mode '%s' in config; falling back to 'thread'", YT_RESOLVER_MODE)
+    YT_RESOLVER_MODE = 'thread'
+YT_PLAYLIST_MAX_TRACKS = int(_config.get('youtube', {}).get('playlist_max_tracks', 100))
+YT_MAX_QUEUED_PER_USER = int(_config.get('youtube', {}).get('max_queued_per_user', 100))
+
 # --- YouTube Blacklist Patterns ---
 def get_blacklist_patterns():
     """Get YouTube blacklist regex patterns from config."""
@@ -135,13 +182,37 @@ def get_ytdl_options():
     return options
 
 # --- FFmpeg Options ---
-def get_ffmpeg_options():
-    """Build FFmpeg options from config."""
+def get_ffmpeg_options(volume=None, start_offset=0, remote=True, fade_sec=0, fade_out_at=None):
+    """Build FFmpeg options from config.
+
+    volume adds an FFmpeg volume filter, start_offset (seconds) seeks the input,
+    and remote=False drops the network reconnect options for local files.
+    fade_sec adds a fade-in, plus a fade-out starting fade_out_at seconds into the output.
+    """
     ffmpeg_cfg = _config.get('ffmpeg', {})
 
+    if remote:
+        before_options = ffmpeg_cfg.get('before_options', '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5')
+        options = ffmpeg_cfg.get('audio_only', '-vn')
+    else:
+        before_options = ''
+        options = '-vn'
+
+    if start_offset:
+        before_options = f"-ss {float(start_offset):.3f} {before_options}".strip()
+    filters = []
+    if volume is not None:
+        filters.append(f"volume={float(volume):.3f}")
+    if fade_sec:
+        filters.append(f"afade=t=in:d={float(fade_sec):.3f}")
+        if fade_out_at is not None:
+            filters.append(f"afade=t=out:st={float(fade_out_at):.3f}:d={float(fade_sec):.3f}")
+    if filters:
+        options = f"{options} -filter:a {','.join(filters)}"
+
     return {
-        'before_options': ffmpeg_cfg.get('before_options', '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5'),
-        'options': ffmpeg_cfg.get('audio_only', '-vn'),
+        'before_options': before_options,
+        'options': options,
     }
 
 # Legacy compatibility - pre-compute these
@@ -149,52 +220,100 @@ YTDL_OPTIONS = get_ytdl_options()
 FFMPEG_OPTIONS = get_ffmpeg_options()
 YT_BLACKLIST_PATTERNS = get_blacklist_patterns()
 
+# Guards _config between the event loop (update_*) and the config writer thread.
+_config_lock = threading.RLock()
+
+
+def _render_config():
+    """Serialize the current global _config to YAML text.
+
+    Only the snapshot is taken under _config_lock; the slow YAML dump runs
+    outside it so config updates on the event loop never wait for a save.
+    """
+    with _config_lock:
+        snapshot = copy.deepcopy(_config)
+    stream = io.StringIO()
+    if _yaml_rt is not None:
+        _yaml_rt.dump(snapshot, stream)
+    else:
+        yaml.safe_dump(snapshot, stream, default_flow_style=False, sort_keys=False, allow_unicode=True)
+    return stream.getvalue()
+
+
 def save_config():
-    """Save the current global _config to config.yaml."""
+    """Save the current global _config to config.yaml atomically (blocking)."""
     try:
-        with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-            if _yaml_rt is not None:
-                _yaml_rt.dump(_config, f)
-            else:
-                yaml.safe_dump(_config, f, default_flow_style=False, sort_keys=False, allow_unicode=True)
+        atomic_write_text(CONFIG_FILE, _render_config())
         return True
     except Exception as e:
         logger.error(f"Failed to save config: {e}")
         return False
 
 
+_config_writer = DebouncedWriter(save_config, delay_seconds=CONFIG_SAVE_DELAY_SECONDS, name='config-writer')
+
+
+def schedule_config_save():
+    """Queue a debounced background save of config.yaml; bursts of updates are written once.
+
+    Does not report whether the write succeeds; call flush_config() when the caller needs to know.
+    """
+    _config_writer.request()
+
+
+def flush_config():
+    """Write any pending config change to disk now (blocking)."""
+    return _config_writer.flush()
+
+
+def _flush_config_at_exit():
+    # Looks flush_config up at exit, so it always flushes the writer of the latest reload.
+    flush_config()
+
+
+# importlib.reload(settings) re-runs this module; register the exit hook only once.
+if not globals().get('_exit_flush_registered'):
+    atexit.register(_flush_config_at_exit)
+    _exit_flush_registered = True
+
+
 def update_blocked_user_ids(user_ids_list):
-    """Update blocked_user_ids in the config and save."""
-    if 'permissions' not in _config:
-        _config['permissions'] = {}
-    _config['permissions']['blocked_user_ids'] = list(user_ids_list)
-    return save_config()
+    """Update blocked_user_ids in the config (effective immediately) and schedule a save; see flush_config()."""
+    with _config_lock:
+        if 'permissions' not in _config:
+            _config['permissions'] = {}
+        _config['permissions']['blocked_user_ids'] = list(user_ids_list)
+        refresh_permissions_snapshot()
+    schedule_config_save()
 
 
 def update_allowed_user_ids(user_ids_list_or_none):
-    """Update allowed_user_ids in the config and save.
+    """Update allowed_user_ids in the config (effective immediately) and schedule a save; see flush_config().
 
     Accepts:
       - None: disable whitelist mode
       - Iterable: explicit whitelist values
     """
-    if 'permissions' not in _config:
-        _config['permissions'] = {}
+    with _config_lock:
+        if 'permissions' not in _config:
+            _config['permissions'] = {}
 
-    if user_ids_list_or_none is None:
-        _config['permissions']['allowed_user_ids'] = None
-    else:
-        _config['permissions']['allowed_user_ids'] = list(user_ids_list_or_none)
+        if user_ids_list_or_none is None:
+            _config['permissions']['allowed_user_ids'] = None
+        else:
+            _config['permissions']['allowed_user_ids'] = list(user_ids_list_or_none)
 
-    return save_config()
+        refresh_permissions_snapshot()
+    schedule_config_save()
 
 
 def update_blacklist_patterns(patterns_list):
-    """Update blacklist_patterns in the config and save."""
-    if 'youtube' not in _config:
-        _config['youtube'] = {}
-    _config['youtube']['blacklist_patterns'] = list(patterns_list)
-    return save_config()
+    """Update blacklist_patterns in the config (effective immediately) and schedule a save; see flush_config()."""
+    with _config_lock:
+        if 'youtube' not in _config:
+            _config['youtube'] = {}
+        _config['youtube']['blacklist_patterns'] = list(patterns_list)
+    schedule_config_save()
 
 
 # --- Permissions and Role Rules ---
@@ -218,19 +337,80 @@ def validate_permissions_identity_lists():
         raise ValueError("permissions.allowed_user_ids must be null or a list")
 
 
-def get_blocked_user_ids():
-    """Get blocked user IDs from config as a set of ints."""
-    permissions_cfg = get_permissions_config()
-    raw_ids = permissions_cfg.get('blocked_user_ids', []) or []
+COMMAND_MODES = frozenset({'open', 'admin_only', 'vote_if_non_admin'})
+
+PermissionsSnapshot = namedtuple(
+    'PermissionsSnapshot',
+    ['blocked_user_ids', 'allowed_user_ids', 'command_modes', 'skip_vote'],
+)
+PermissionsSnapshot.__doc__ = """Immutable, pre-parsed view of the permissions config.
 
-    blocked_ids = set()
+blocked_user_ids: frozenset of ints
+allowed_user_ids: None when whitelist mode is off, else frozenset of ints (may be empty)
+command_modes: read-only {command name: validated mode}; unlisted commands are 'open'
+skip_vote: read-only skip vote settings with defaults applied
+"""
+
+
+def _parse_user_ids(raw_ids, key):
+    user_ids = set()
     for raw_id in raw_ids:
         try:
-            blocked_ids.add(int(raw_id))
+            user_ids.add(int(raw_id))
         except (TypeError, ValueError):
-            logger.warning("Ignoring invalid blocked_user_ids entry: %r", raw_id)
+            logger.warning("Ignoring invalid %s entry: %r", key, raw_id)
+    return frozenset(user_ids)
 
-    return blocked_ids
+
+def build_permissions_snapshot(permissions_cfg):
+    """Parse a permissions config section into a PermissionsSnapshot."""
+    blocked_ids = _parse_user_ids(permissions_cfg.get('blocked_user_ids', []) or [], 'blocked_user_ids')
+
+    allowed_raw = permissions_cfg.get('allowed_user_ids', None)
+    allowed_ids = None if allowed_raw is None else _parse_user_ids(allowed_raw, 'allowed_user_ids')
+
+    commands_cfg = permissions_cfg.get('commands', {}) or {}
+    command_modes = {}
+    for command_name, command_cfg in commands_cfg.items():
+        mode = (command_cfg or {}).get('mode', 'open')
+        if mode not in COMMAND_MODES:
+            logger.warning("Invalid mode '%s' for command '%s', using 'open'", mode, command_name)
+            mode = 'open'
+        command_modes[command_name] = mode
+
+    skip_cfg = commands_cfg.get('skip', {}) or {}
+    vote_cfg = skip_cfg.get('vote', {}) or {}
+    skip_vote = {
+        'threshold_type': vote_cfg.get('threshold_type', 'ratio'),
+        'threshold_value': vote_cfg.get('threshold_value', 0.5),
+        'min_votes': vote_cfg.get('min_votes', 2),
+        'same_channel_only': vote_cfg.get('same_channel_only', True),
+        'force_vote_for_admin': vote_cfg.get('force_vote_for_admin', False),
+    }
+
+    return PermissionsSnapshot(
+        blocked_ids,
+        allowed_ids,
+        types.MappingProxyType(command_modes),
+        types.MappingProxyType(skip_vote),
+    )
+
+
+def refresh_permissions_snapshot():
+    """Rebuild the permissions snapshot from the current config (call after changing _config)."""
+    global _permissions_snapshot
+    _permissions_snapshot = build_permissions_snapshot(get_permissions_config())
+    return _permissions_snapshot
+
+
+def get_permissions_snapshot():
+    """Return the current immutable permissions snapshot."""
+    return _permissions_snapshot
+
+
+def get_blocked_user_ids():
+    """Get blocked user IDs from config as a (mutable copy) set of ints."""
+    return set(_permissions_snapshot.blocked_user_ids)
 
 
 def get_allowed_user_ids():
@@ -240,48 +420,24 @@ def get_allowed_user_ids():
       - None: whitelist disabled
       - set[int]: whitelist entries (may be empty)
     """
-    permissions_cfg = get_permissions_config()
-    raw_ids = permissions_cfg.get('allowed_user_ids', None)
-
-    if raw_ids is None:
-        return None
-
-    allowed_ids = set()
-    for raw_id in raw_ids:
-        try:
-            allowed_ids.add(int(raw_id))
-        except (TypeError, ValueError):
-            logger.warning("Ignoring invalid allowed_user_ids entry: %r", raw_id)
-
-    return allowed_ids
+    allowed_ids = _permissions_snapshot.allowed_user_ids
+    return None if allowed_ids is None else set(allowed_ids)
 
 
 def is_whitelist_enabled():
     """Return True only when whitelist has at least one explicit user ID."""
-    allowed_ids = get_allowed_user_ids()
-    return bool(allowed_ids)
+    return bool(_permissions_snapshot.allowed_user_ids)
 
 
 def get_command_permission_mode(command_name):
     """Get mode for a command. Modes: open, admin_only, vote_if_non_admin."""
-    commands_cfg = get_permissions_config().get('commands', {}) or {}
-    command_cfg = commands_cfg.get(command_name, {}) or {}
-    return command_cfg.get('mode', 'open')
+    return _permissions_snapshot.command_modes.get(command_name, 'open')
 
 
 def get_skip_vote_config():
     """Get vote settings for skip command with defaults."""
-    commands_cfg = get_permissions_config().get('commands', {}) or {}
-    skip_cfg = commands_cfg.get('skip', {}) or {}
-    vote_cfg = skip_cfg.get('vote', {}) or {}
-
-    return {
-        'threshold_type': vote_cfg.get('threshold_type', 'ratio'),
-        'threshold_value': vote_cfg.get('threshold_value', 0.5),
-        'min_votes': vote_cfg.get('min_votes', 2),
-        'same_channel_only': vote_cfg.get('same_channel_only', True),
-        'force_vote_for_admin': vote_cfg.get('force_vote_for_admin', False),
-    }
+    return dict(_permissions_snapshot.skip_vote)
 
 
 validate_permissions_identity_lists()
+_permissions_snapshot = build_permissions_snapshot(get_permissions_config())
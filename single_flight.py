@@ -0,0 +1,40 @@
+import asyncio
+
+
+class SingleFlight:
+    """Shares one in-flight coroutine between concurrent callers that ask for the same key.
+
+    The first caller for a key (the leader) starts factory() as a task; callers
+    arriving before it finishes await the same task instead of starting their
+    own. Once it finishes the key is forgotten, so later calls run again (this
+    is deduplication of concurrent work, not a cache). Each caller awaits
+    through asyncio.shield, so cancelling one caller never cancels the work the
+    others are waiting on.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def __len__(self):
+        return len(self._inflight)
+
+    def _forget(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # Mark as retrieved even if every caller was cancelled.
+
+    async def run(self, key, factory):
+        """Return (result, coalesced): the shared result and whether another caller started the work."""
+        task = self._inflight.get(key)
+        coalesced = task is not None
+        if coalesced:
+            self.coalesced += 1
+        else:
+            self.executions += 1
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task), coalesced
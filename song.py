@@ -0,0 +1,96 @@
+import time
+
+# Containers that carry Opus audio when no codec is reported (YouTube audio-only WebM is always Opus).
+OPUS_EXTENSIONS = ('webm', 'opus')
+
+# Fields that survive a restart; queue_id and enqueued_perf are process-local and reassigned on restore.
+PERSISTED_FIELDS = (
+    'type', 'title', 'webpage_url', 'video_id', 'stream_url', 'stream_expires_at', 'format_id', 'ext',
+    'acodec', 'duration', 'requester_id', 'requester_mention', 'requester_handle', 'start_offset',
+)
+
+
+class Song:
+    """Compact queue entry holding only what playback and queue display need.
+
+    webpage_url is what playback resolves: the YouTube page for 'youtube' songs,
+    the direct media URL for 'url' songs and the media-folder path for 'local' songs.
+    start_offset (seconds) makes the next playback of this song begin mid-track.
+    Full yt-dlp info dicts are never stored; callers project them with apply_stream_info.
+    """
+
+    __slots__ = (
+        'queue_id',
+        'type',
+        'title',
+        'webpage_url',
+        'video_id',
+        'stream_url',
+        'stream_expires_at',
+        'format_id',
+        'ext',
+        'acodec',
+        'duration',
+        'requester_id',
+        'requester_mention',
+        'requester_handle',
+        'enqueued_perf',
+        'start_offset',
+    )
+
+    def __init__(self, queue_id, song_type, title, webpage_url, requester_id=None, requester_mention='unknown',
+                 requester_handle='unknown', video_id=None, duration=None):
+        self.queue_id = queue_id
+        self.type = song_type
+        self.title = title
+        self.webpage_url = webpage_url
+        self.video_id = video_id
+        self.stream_url = None
+        self.stream_expires_at = None
+        self.format_id = None
+        self.ext = None
+        self.acodec = None
+        self.duration = duration
+        self.requester_id = requester_id
+        self.requester_mention = requester_mention
+        self.requester_handle = requester_handle
+        self.enqueued_perf = time.perf_counter()
+        self.start_offset = 0.0
+
+    def __repr__(self):
+        return f"Song(queue_id={self.queue_id!r}, type={self.type!r}, title={self.title!r})"
+
+    def stream_ttl_remaining(self):
+        """Return seconds until the cached stream URL expires, or None if nothing is cached."""
+        if not self.stream_url or not self.stream_expires_at:
+            return None
+        return float(self.stream_expires_at) - time.time()
+
+    def is_opus(self):
+        """Return True when the resolved stream is already Opus-encoded (e.g. YouTube WebM audio)."""
+        if self.acodec and self.acodec != 'none':
+            return self.acodec.startswith('opus')
+        return self.ext in OPUS_EXTENSIONS
+
+    def to_dict(self):
+        """Return the persisted fields as a plain dict (see from_dict)."""
+        return {field: getattr(self, field) for field in PERSISTED_FIELDS}
+
+    @classmethod
+    def from_dict(cls, queue_id, data):
+        """Rebuild a song saved with to_dict under a new queue_id."""
+        song = cls(queue_id, data['type'], data['title'], data['webpage_url'])
+        for field in PERSISTED_FIELDS:
+            if field in data:
+                setattr(song, field, data[field])
+        return song
+
+    def apply_stream_info(self, data, expires_at):
+        """Copy the stream fields of a (trimmed) yt-dlp info dict onto this song."""
+        self.stream_url = data['url']
+        self.stream_expires_at = expires_at
+        self.format_id = data.get('format_id')
+        self.ext = data.get('ext')
+        self.acodec = data.get('acodec')
+        if data.get('duration'):
+            self.duration = data.get('duration')
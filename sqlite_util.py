@@ -0,0 +1,24 @@
+import sqlite3
+import threading
+
+
+def open_sqlite(path, schema):
+    """Open a SQLite database shared across threads: autocommit, Row results, WAL, schema applied."""
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(schema)
+    return conn
+
+
+class SQLiteStore:
+    """Base for the bot's SQLite stores: one connection, serialized by self._lock."""
+
+    def __init__(self, path, schema):
+        self._lock = threading.Lock()
+        self._conn = open_sqlite(path, schema)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,38 @@
+import time
+
+
+class StartupProfiler:
+    """Collects wall-clock timings for the stages of bot startup.
+
+    mark(stage) closes a sequential stage that started at the previous mark.
+    record(stage, seconds) adds a stage that ran concurrently (e.g. a background
+    warm-up) and was timed separately.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self._clock = clock
+        self._started = clock()
+        self._last = self._started
+        self.stages = []  # (stage, duration_sec, finished_at_sec, concurrent)
+
+    def has(self, stage):
+        return any(name == stage for name, _, _, _ in self.stages)
+
+    def mark(self, stage):
+        """Record the time since the previous mark as `stage`."""
+        now = self._clock()
+        self.stages.append((stage, now - self._last, now - self._started, False))
+        self._last = now
+
+    def record(self, stage, duration_sec):
+        """Record a separately timed stage that overlapped the sequential ones."""
+        self.stages.append((stage, duration_sec, self._clock() - self._started, True))
+
+    def report(self):
+        """Return a plain-text table of all stages in the order they finished."""
+        width = max([len(name) for name, _, _, _ in self.stages] + [5])
+        lines = [f"{'stage':<{width}}  {'took ms':>9}  {'at ms':>9}"]
+        for name, duration_sec, finished_at_sec, concurrent in self.stages:
+            suffix = "  (background)" if concurrent else ""
+            lines.append(f"{name:<{width}}  {duration_sec * 1000:9.1f}  {finished_at_sec * 1000:9.1f}{suffix}")
+        return "\n".join(lines)
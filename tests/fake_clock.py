@@ -0,0 +1,10 @@
+class FakeClock:
+    """Stand-in for time.time: returns now, advanced by step on every call."""
+
+    def __init__(self, now=1000.0, step=0):
+        self.now = now
+        self.step = step
+
+    def __call__(self):
+        self.now += self.step
+        return self.now
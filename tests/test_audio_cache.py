@@ -0,0 +1,102 @@
+import os
+import tempfile
+import unittest
+
+from audio_cache import AudioCache
+from fake_clock import FakeClock
+
+
+class TestAudioCache(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self._tmp.name, 'audio_cache')
+        self.cache = AudioCache(self.directory, max_bytes=250, min_plays=2, clock=FakeClock(step=1))
+
+    def tearDown(self):
+        self.cache.close()
+        self._tmp.cleanup()
+
+    def _write_temp(self, key, size):
+        temp_path = self.cache.temp_path_for(key)
+        with open(temp_path, 'wb') as handle:
+            handle.write(b'\0' * size)
+        return temp_path
+
+    def _transcode(self, key, size):
+        return self.cache.store(key, self._write_temp(key, size))
+
+    def test_tracks_are_cached_only_after_min_plays(self):
+        self.cache.record_play('youtube:a')
+        self.cache.record_play('youtube:a')
+        self.assertFalse(self.cache.should_store('youtube:a'))
+        self.assertEqual(self.cache.record_play('youtube:a'), 3)
+        self.assertTrue(self.cache.should_store('youtube:a'))
+
+        self._transcode('youtube:a', 100)
+        path = self.cache.lookup('youtube:a')
+        self.assertTrue(path.endswith('.opus'))
+        self.assertEqual(os.path.getsize(path), 100)
+        self.assertFalse(self.cache.should_store('youtube:a'))
+        self.assertFalse(os.path.exists(self.cache.temp_path_for('youtube:a')))
+        self.assertIsNone(self.cache.lookup('youtube:b'))
+
+    def test_least_recently_played_files_are_evicted_over_size_cap(self):
+        self._transcode('youtube:a', 100)
+        self._transcode('youtube:b', 100)
+        self.cache.record_play('youtube:a')
+        evicted = self._transcode('youtube:c', 100)
+
+        self.assertEqual(evicted, ['youtube:b'])
+        self.assertIsNone(self.cache.lookup('youtube:b'))
+        self.assertIsNotNone(self.cache.lookup('youtube:a'))
+        self.assertEqual(self.cache.total_bytes(), 200)
+        self.assertEqual(len([name for name in os.listdir(self.directory) if name.endswith('.opus')]), 2)
+
+    def test_playing_and_undeletable_files_are_skipped_until_the_next_eviction(self):
+        self._transcode('youtube:a', 100)
+        self._transcode('youtube:b', 100)
+        self.assertEqual(self.cache.store('youtube:c', self._write_temp('youtube:c', 100), in_use={'youtube:a'}),
+                         ['youtube:b'])
+
+        # A file that cannot be removed yet (e.g. open on Windows) stays cached.
+        path_a = self.cache.lookup('youtube:a')
+        os.remove(path_a)
+        os.mkdir(path_a)
+        os.mkdir(os.path.join(path_a, 'busy'))
+        self.assertEqual(self._transcode('youtube:d', 100), ['youtube:c'])
+        self.assertEqual(self.cache.lookup('youtube:a'), path_a)
+
+        os.rmdir(os.path.join(path_a, 'busy'))
+        os.rmdir(path_a)
+        self.assertEqual(self._transcode('youtube:e', 100), ['youtube:a'])
+        self.assertIsNone(self.cache.lookup('youtube:a'))
+
+    def test_index_keeps_only_recent_uncached_tracks(self):
+        self.cache.max_index_entries = 10
+        self._transcode('youtube:cached', 10)
+        for index in range(11):
+            self.cache.record_play(f'youtube:{index}')
+        self.assertEqual(self.cache.play_count('youtube:0'), 0)
+        self.assertEqual(self.cache.play_count('youtube:10'), 1)
+        self.assertIsNotNone(self.cache.lookup('youtube:cached'))
+        self.cache.close()
+
+        self.cache = AudioCache(self.directory, max_bytes=250, min_plays=2)
+        self.assertEqual(self.cache.play_count('youtube:1'), 0)
+        self.assertEqual(self.cache.play_count('youtube:10'), 1)
+
+    def test_index_survives_restart_and_drops_missing_files(self):
+        self.cache.record_play('youtube:a')
+        self._transcode('youtube:a', 10)
+        self._transcode('youtube:b', 10)
+        os.remove(self.cache.lookup('youtube:b'))
+        self.cache.close()
+
+        self.cache = AudioCache(self.directory, max_bytes=250, min_plays=2)
+        self.assertEqual(self.cache.play_count('youtube:a'), 1)
+        self.assertIsNotNone(self.cache.lookup('youtube:a'))
+        self.assertIsNone(self.cache.lookup('youtube:b'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import re
+import unittest
+
+from blacklist_matcher import BlacklistMatcher, fold_title, required_literal, to_scoped_pattern
+
+
+class TestScopedPattern(unittest.TestCase):
+    def test_leading_flags_become_scoped(self):
+        self.assertEqual(to_scoped_pattern(r"(?i)\bcover\b"), r"(?i:\bcover\b)")
+        self.assertEqual(to_scoped_pattern(r"(?is)a.b"), r"(?is:a.b)")
+        self.assertEqual(to_scoped_pattern(r"live|remix"), r"(?:live|remix)")
+
+    def test_group_sensitive_patterns_are_not_embedded(self):
+        self.assertIsNone(to_scoped_pattern(r"(a)\1"))
+        self.assertIsNone(to_scoped_pattern(r"(?P<word>a)(?P=word)"))
+        self.assertIsNone(to_scoped_pattern(r"(?x) a b  # comment"))
+        self.assertIsNone(to_scoped_pattern(r"(?a)\w+"))
+
+
+class TestRequiredLiteral(unittest.TestCase):
+    def test_longest_mandatory_literal_is_found(self):
+        self.assertEqual(required_literal(r"(?i)\bkawaii\s*kutegomen\b"), "kutegomen")
+        self.assertEqual(required_literal(r"(?i)\bCOVER\b"), "cover")
+        self.assertEqual(required_literal(r"(?:intro)?outro"), "outro")
+        self.assertEqual(required_literal(r"(?:ab)+c"), "ab")
+
+    def test_patterns_without_mandatory_literal(self):
+        self.assertIsNone(required_literal(r"karaoke|beat"))
+        self.assertIsNone(required_literal(r"(?:remix)?[0-9]+"))
+        self.assertIsNone(required_literal(r"[unclosed"))
+
+    def test_fold_matches_ignorecase_equivalents(self):
+        self.assertIn("kawaii", fold_title("KAWAıİ"))
+        self.assertIn("sing", fold_title("ſING"))
+
+
+class TestBlacklistMatcher(unittest.TestCase):
+    PATTERNS = [
+        r"(?i)\bcover\b",
+        r"(?i)\brap\s*vi(?:e|ệ)t\b",
+        r"(live)\s+\1",
+        r"karaoke|beat",
+        r"[unclosed",
+    ]
+
+    def setUp(self):
+        self.matcher = BlacklistMatcher(self.PATTERNS)
+
+    def test_matches_same_titles_as_individual_patterns(self):
+        compiled = [re.compile(p, re.IGNORECASE) for p in self.PATTERNS if p != r"[unclosed"]
+        titles = [
+            "Song (Cover)", "Discover Weekly", "RAP VIỆT mùa 3", "live live session", "Live Session",
+            "Karaoke version", "BEAT drop", "Original Song", "COVERıNG", "Kawaii (COVER)", "",
+        ]
+        for title in titles:
+            expected = bool(title) and any(p.search(title) for p in compiled)
+            self.assertEqual(self.matcher.is_blacklisted(title), expected, title)
+
+    def test_invalid_and_fallback_patterns_are_reported(self):
+        self.assertEqual(len(self.matcher), 4)
+        self.assertEqual([pattern for pattern, _ in self.matcher.invalid], [r"[unclosed"])
+        self.assertEqual(sorted(self.matcher.prefiltered), ["cover", "live", "rap"])
+        self.assertEqual(self.matcher.fallback, [])
+        self.assertEqual(self.matcher.combined.pattern, "(?:karaoke|beat)")
+
+    def test_verdicts_are_cached_per_title(self):
+        self.matcher.is_blacklisted("Song (Cover)")
+        self.matcher.is_blacklisted("Song (Cover)")
+        info = self.matcher.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+
+    def test_empty_matcher_never_matches(self):
+        self.assertFalse(BlacklistMatcher([]).is_blacklisted("anything"))
+
+
+if __name__ == "__main__":
+    unittest.main()
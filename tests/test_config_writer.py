@@ -0,0 +1,71 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from config_writer import DebouncedWriter, atomic_write_text
+
+
+class TestAtomicWriteText(unittest.TestCase):
+    def test_replaces_file_and_leaves_no_temp_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'config.yaml')
+            atomic_write_text(path, "first: 1\n")
+            atomic_write_text(path, "second: 2\n")
+            with open(path, encoding='utf-8') as handle:
+                self.assertEqual(handle.read(), "second: 2\n")
+            self.assertEqual(os.listdir(directory), ['config.yaml'])
+
+    def test_failed_write_keeps_old_content(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'config.yaml')
+            atomic_write_text(path, "old: 1\n")
+            with self.assertRaises(UnicodeEncodeError):
+                atomic_write_text(path, "new: \udcff\n")
+            with open(path, encoding='utf-8') as handle:
+                self.assertEqual(handle.read(), "old: 1\n")
+            self.assertEqual(os.listdir(directory), ['config.yaml'])
+
+
+class TestDebouncedWriter(unittest.TestCase):
+    def test_burst_of_requests_is_written_once(self):
+        written = threading.Event()
+        calls = []
+
+        def write():
+            calls.append(1)
+            written.set()
+            return True
+
+        writer = DebouncedWriter(write, delay_seconds=0.05)
+        for _ in range(20):
+            writer.request()
+        self.assertTrue(writer.pending)
+        self.assertTrue(written.wait(2))
+        self.assertEqual(writer.flush(), True)
+        self.assertEqual(len(calls), 1)
+        self.assertFalse(writer.pending)
+
+    def test_flush_writes_immediately_and_cancels_timer(self):
+        calls = []
+        writer = DebouncedWriter(lambda: calls.append(1) or True, delay_seconds=60)
+        writer.request()
+        self.assertEqual(calls, [])
+        self.assertTrue(writer.flush())
+        self.assertEqual(calls, [1])
+        self.assertTrue(writer.flush())
+        self.assertEqual(calls, [1])
+
+    def test_failed_write_stays_pending(self):
+        results = [False, True]
+        writer = DebouncedWriter(lambda: results.pop(0), delay_seconds=60)
+        writer.request()
+        self.assertFalse(writer.flush())
+        self.assertTrue(writer.pending)
+        self.assertTrue(writer.flush())
+        self.assertFalse(writer.pending)
+        self.assertEqual(writer.writes, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
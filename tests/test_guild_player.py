@@ -0,0 +1,113 @@
+import unittest
+
+from guild_player import GuildPlayerRegistry, format_position, parse_seek_position
+from song import Song
+
+
+class FakeSource:
+    def __init__(self):
+        self.cleaned_up = False
+
+    def cleanup(self):
+        self.cleaned_up = True
+
+
+class TestGuildPlayer(unittest.TestCase):
+    def test_registry_returns_same_player_per_guild(self):
+        registry = GuildPlayerRegistry(0.5)
+        self.assertIs(registry.get(1), registry.get(1))
+        self.assertIsNot(registry.get(1), registry.get(2))
+        self.assertEqual(len(registry), 2)
+
+    def test_players_do_not_share_state(self):
+        registry = GuildPlayerRegistry(0.5)
+        first, second = registry.get(1), registry.get(2)
+        first.queue.append({'queue_id': 1})
+        first.volume = 0.9
+        self.assertEqual(second.queue, [])
+        self.assertEqual(second.volume, 0.5)
+        self.assertIsNot(first.lock, second.lock)
+
+    def test_votes_are_tracked_per_action(self):
+        player = GuildPlayerRegistry(0.5).get(1)
+        votes, already_voted = player.register_vote('skip', 10)
+        self.assertEqual(votes, {10})
+        self.assertFalse(already_voted)
+        _, already_voted = player.register_vote('skip', 10)
+        self.assertTrue(already_voted)
+
+        player.register_vote('remove:3', 11)
+        player.clear_votes(action_key='skip')
+        self.assertEqual(set(player.votes), {'remove:3'})
+        player.clear_votes()
+        self.assertEqual(player.votes, {})
+
+    def test_reset_clears_queue_and_current_song(self):
+        player = GuildPlayerRegistry(0.5).get(1)
+        player.queue.append({'queue_id': 1})
+        player.current_song = {'queue_id': 2}
+        player.register_vote('skip', 10)
+        player.reset()
+        self.assertEqual(player.queue, [])
+        self.assertIsNone(player.current_song)
+        self.assertEqual(player.votes, {})
+
+    def test_position_tracks_start_offset(self):
+        player = GuildPlayerRegistry(0.5).get(1)
+        self.assertIsNone(player.position())
+        player.current_song = {'queue_id': 1}
+        player.mark_track_started(100.0, start_offset=30.0)
+        self.assertAlmostEqual(player.position(now_perf=112.5), 42.5)
+        player.reset()
+        self.assertIsNone(player.position())
+
+    def test_prepared_source_is_returned_only_for_matching_song_and_volume(self):
+        player = GuildPlayerRegistry(0.5).get(1)
+        matching, stale_volume, other_song = FakeSource(), FakeSource(), FakeSource()
+
+        player.set_prepared_source(7, matching, 0.5)
+        self.assertIs(player.take_prepared_source(7, 0.5), matching)
+        self.assertFalse(matching.cleaned_up)
+
+        player.set_prepared_source(7, stale_volume, 0.5)
+        self.assertIsNone(player.take_prepared_source(7, 0.8))
+        self.assertTrue(stale_volume.cleaned_up)
+
+        player.set_prepared_source(8, other_song, 0.5)
+        player.reset()
+        self.assertTrue(other_song.cleaned_up)
+        self.assertIsNone(player.prepared_source)
+
+    def test_dropped_stream_is_resumed_but_deliberate_stops_are_not(self):
+        player = GuildPlayerRegistry(0.5).get(1)
+        song = Song(1, 'youtube', 'Song', 'https://youtu.be/abc', duration=300)
+        player.current_song = song
+        player.mark_track_started(100.0, start_offset=20.0)
+        self.assertEqual(player.resume_position(song, max_attempts=2, now_perf=130.0), 50.0)
+        self.assertEqual(player.resume_position(song, max_attempts=2, now_perf=140.0), 60.0)
+        self.assertIsNone(player.resume_position(song, max_attempts=2, now_perf=150.0))
+        self.assertIsNone(player.resume_position(song, max_attempts=5, now_perf=100.0 + 278.0))
+
+        class FakeVoiceClient:
+            def stop(self):
+                pass
+
+        player.mark_track_started(200.0)
+        player.stop(FakeVoiceClient())
+        self.assertIsNone(player.resume_position(song, max_attempts=5, now_perf=210.0))
+        player.current_song = Song(2, 'local', 'Local', 'a.mp3', duration=300)
+        player.mark_track_started(300.0)
+        self.assertIsNone(player.resume_position(player.current_song, max_attempts=5, now_perf=310.0))
+
+    def test_parse_seek_position(self):
+        self.assertEqual(parse_seek_position("90"), 90.0)
+        self.assertEqual(parse_seek_position("1:02:03"), 3723.0)
+        self.assertEqual(parse_seek_position("+15", current=10.0), 25.0)
+        self.assertEqual(parse_seek_position("-20", current=10.0), 0.0)
+        self.assertIsNone(parse_seek_position("1:75"))
+        self.assertIsNone(parse_seek_position("soon"))
+        self.assertEqual((format_position(65), format_position(3723)), ("1:05", "1:02:03"))
+
+
+if __name__ == "__main__":
+    unittest.main()
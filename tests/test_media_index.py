@@ -0,0 +1,127 @@
+import os
+import tempfile
+import unittest
+
+from media_index import MediaIndex
+
+
+class TestMediaIndex(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        self.index = MediaIndex(self.root)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _touch(self, rel_path):
+        path = os.path.join(self.root, *rel_path.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb'):
+            pass
+
+    def _bump_mtime(self, rel_dir=''):
+        # Directory mtime granularity can be coarse; force a visible change.
+        path = os.path.join(self.root, *rel_dir.split('/')) if rel_dir else self.root
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    def test_indexes_subdirectories_and_filters_extensions(self):
+        self._touch('Intro.mp3')
+        self._touch('albums/Blue Song.MP3')
+        self._touch('albums/live/Concert.mp4')
+        self._touch('albums/notes.txt')
+        self.assertTrue(self.index.refresh())
+        self.assertEqual(self.index.paths, ['albums/Blue Song.MP3', 'albums/live/Concert.mp4', 'Intro.mp3'])
+
+    def test_exact_then_partial_then_fuzzy(self):
+        self._touch('intro.mp3')
+        self._touch('albums/intro.mp3.mp4')
+        self._touch('albums/Blue Song.mp3')
+        self.index.refresh()
+
+        self.assertEqual(self.index.find('INTRO.mp3'), 'intro.mp3')
+        self.assertEqual(self.index.find('albums/blue song.mp3'), 'albums/Blue Song.mp3')
+        self.assertEqual(self.index.find('blue'), 'albums/Blue Song.mp3')
+        self.assertEqual(self.index.find('blu sogn.mp3'), 'albums/Blue Song.mp3')
+        self.assertIsNone(self.index.find('zzzzzzzzzzzzzzzz'))
+        self.assertIsNone(self.index.find(''))
+
+    def test_partial_match_does_not_span_entries(self):
+        self._touch('abc.mp3')
+        self._touch('def.mp3')
+        self.index.refresh()
+        self.assertEqual(self.index.find('def'), 'def.mp3')
+        self.assertIsNone(self.index.find('3\nd'))
+
+    def test_suggest_ranks_by_trigram_similarity(self):
+        self._touch('Moonlight Sonata.mp3')
+        self._touch('classical/Moonlight_Sonata (Live).mp3')
+        self._touch('Sunlight.mp3')
+        self._touch('Unrelated Track.mp3')
+        self.index.refresh()
+
+        suggestions = self.index.suggest('moonlite sonata', limit=3)
+        paths = [path for path, _ in suggestions]
+        self.assertEqual(paths[:2], ['Moonlight Sonata.mp3', 'classical/Moonlight_Sonata (Live).mp3'])
+        self.assertNotIn('Unrelated Track.mp3', paths)
+        scores = [score for _, score in suggestions]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertEqual(self.index.suggest('moonlight sonata.mp3', limit=1)[0], ('Moonlight Sonata.mp3', 1.0))
+        self.assertEqual(self.index.suggest('qqqq'), [])
+
+    def test_tags_are_searchable_alongside_file_names(self):
+        self._touch('track01.mp3')
+        self._touch('track02.mp3')
+        self.index.refresh()
+        self.assertEqual(self.index.suggest('moonlight sonata'), [])
+
+        self.index.set_tags({'track02.mp3': 'Beethoven Moonlight Sonata'})
+        self.assertEqual(self.index.suggest('moonlight sonata', limit=1)[0][0], 'track02.mp3')
+        self.assertEqual(self.index.find('beethoven moonlite sonata'), 'track02.mp3')
+
+        self._touch('track03.mp3')
+        self._bump_mtime()
+        self.index.refresh()
+        self.assertEqual(self.index.find('beethoven moonlight sonata'), 'track02.mp3')
+
+    def test_refresh_picks_up_added_and_removed_files(self):
+        self._touch('albums/one.mp3')
+        self.index.refresh()
+        self.assertFalse(self.index.refresh())
+
+        self._touch('albums/two.mp3')
+        self._bump_mtime('albums')
+        self.assertTrue(self.index.refresh())
+        self.assertEqual(self.index.find('two'), 'albums/two.mp3')
+
+        os.remove(os.path.join(self.root, 'albums', 'one.mp3'))
+        self._bump_mtime('albums')
+        self.assertTrue(self.index.refresh())
+        self.assertEqual(self.index.paths, ['albums/two.mp3'])
+
+    def test_changed_dirs_lists_only_relisted_and_removed_directories(self):
+        self._touch('albums/one.mp3')
+        self._touch('live/two.mp3')
+        self.index.refresh()
+        self.assertEqual(self.index.take_changed_dirs(), {'', 'albums', 'live'})
+        self.index.refresh()
+        self.assertEqual(self.index.take_changed_dirs(), set())
+
+        self._touch('albums/three.mp3')
+        self._bump_mtime('albums')
+        os.remove(os.path.join(self.root, 'live', 'two.mp3'))
+        os.rmdir(os.path.join(self.root, 'live'))
+        self._bump_mtime()
+        self.index.refresh()
+        self.assertEqual(self.index.take_changed_dirs(), {'', 'albums', 'live'})
+
+    def test_missing_root_yields_empty_index(self):
+        index = MediaIndex(os.path.join(self.root, 'missing'))
+        self.assertFalse(index.refresh())
+        self.assertEqual(len(index), 0)
+        self.assertIsNone(index.find('anything'))
+
+
+if __name__ == "__main__":
+    unittest.main()
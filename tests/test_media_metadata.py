@@ -0,0 +1,105 @@
+import json
+import os
+import tempfile
+import unittest
+
+from media_metadata import MediaMetadataCache, parse_ffprobe_output
+
+
+class RecordingProbe:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, path):
+        self.calls.append(os.path.basename(path))
+        if path.endswith('broken.mp3'):
+            raise RuntimeError("ffprobe failed")
+        return {'duration': 180.5, 'codec': 'mp3', 'bitrate': 320000, 'title': 'Song', 'artist': 'Band'}
+
+
+class TestParseFfprobeOutput(unittest.TestCase):
+    def test_reads_format_and_audio_stream_fields(self):
+        output = json.dumps({
+            'streams': [
+                {'codec_type': 'video', 'codec_name': 'mjpeg'},
+                {'codec_type': 'audio', 'codec_name': 'opus', 'bit_rate': '128000', 'tags': {'TITLE': 'Stream'}},
+            ],
+            'format': {'duration': '215.25', 'bit_rate': '131000', 'tags': {'title': 'Track', 'ARTIST': 'Artist'}},
+        })
+        self.assertEqual(parse_ffprobe_output(output), {
+            'duration': 215.25, 'codec': 'opus', 'bitrate': 128000, 'title': 'Track', 'artist': 'Artist',
+        })
+
+    def test_missing_fields_become_none(self):
+        self.assertEqual(parse_ffprobe_output('{}'), {
+            'duration': None, 'codec': None, 'bitrate': None, 'title': None, 'artist': None,
+        })
+
+
+class TestMediaMetadataCache(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self._tmp.name, 'media')
+        self.db_path = os.path.join(self._tmp.name, 'metadata.sqlite3')
+        os.makedirs(os.path.join(self.root, 'albums'))
+        self.probe = RecordingProbe()
+        self.cache = MediaMetadataCache(self.db_path, probe=self.probe)
+
+    def tearDown(self):
+        self.cache.close()
+        self._tmp.cleanup()
+
+    def _write(self, rel_path, data=b'x'):
+        with open(os.path.join(self.root, *rel_path.split('/')), 'wb') as handle:
+            handle.write(data)
+
+    def test_only_new_or_changed_files_are_probed(self):
+        self._write('one.mp3')
+        self._write('albums/two.mp3')
+        self.assertEqual(self.cache.scan(self.root, ['one.mp3', 'albums/two.mp3']), 2)
+        self.assertEqual(self.cache.get('albums/two.mp3')['duration'], 180.5)
+
+        self.assertEqual(self.cache.scan(self.root, ['one.mp3', 'albums/two.mp3']), 0)
+        self._write('one.mp3', b'longer content')
+        self.assertEqual(self.cache.scan(self.root, ['one.mp3', 'albums/two.mp3']), 1)
+        self.assertEqual(self.probe.calls, ['one.mp3', 'two.mp3', 'one.mp3'])
+
+    def test_removed_files_are_forgotten_and_failures_are_not_retried(self):
+        self._write('one.mp3')
+        self._write('broken.mp3')
+        self.cache.scan(self.root, ['one.mp3', 'broken.mp3'])
+        self.assertEqual(self.cache.get('broken.mp3')['duration'], None)
+        self.assertEqual(self.cache.search_tags(), {'one.mp3': 'Band Song'})
+
+        self.assertEqual(self.cache.scan(self.root, ['broken.mp3']), 1)
+        self.assertIsNone(self.cache.get('one.mp3'))
+        self.assertEqual(self.probe.calls, ['one.mp3', 'broken.mp3'])
+
+    def test_scan_limited_to_dirs_leaves_other_files_alone(self):
+        self._write('one.mp3')
+        self._write('albums/two.mp3')
+        self.cache.scan(self.root, ['one.mp3', 'albums/two.mp3'])
+        self._write('one.mp3', b'changed in place')
+        self._write('albums/three.mp3')
+
+        self.assertEqual(self.cache.scan(self.root, ['one.mp3', 'albums/three.mp3'], dirs={'albums'}), 2)
+        self.assertIsNotNone(self.cache.get('albums/three.mp3'))
+        self.assertIsNone(self.cache.get('albums/two.mp3'))
+        self.assertEqual(self.probe.calls, ['one.mp3', 'two.mp3', 'three.mp3'])
+
+    def test_results_persist_across_instances(self):
+        self._write('one.mp3')
+        self.cache.scan(self.root, ['one.mp3'])
+        self.cache.close()
+
+        reopened = MediaMetadataCache(self.db_path, probe=self.probe)
+        try:
+            self.assertEqual(reopened.get('one.mp3')['title'], 'Song')
+            self.assertEqual(reopened.scan(self.root, ['one.mp3']), 0)
+        finally:
+            reopened.close()
+        self.cache = MediaMetadataCache(self.db_path, probe=self.probe)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import asyncio
+import unittest
+
+from metrics import MetricsRegistry, PlaybackMetrics, start_metrics_server
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def test_histogram_renders_cumulative_buckets(self):
+        registry = MetricsRegistry()
+        histogram = registry.histogram('extract_ms', "Extract time.", (10, 100), ('guild',))
+        for value in (5, 10, 50, 500):
+            histogram.observe(value, ('1',))
+        lines = registry.render().splitlines()
+        self.assertEqual(lines[:2], ["# HELP extract_ms Extract time.", "# TYPE extract_ms histogram"])
+        self.assertEqual(lines[2:], [
+            'extract_ms_bucket{guild="1",le="10"} 2',
+            'extract_ms_bucket{guild="1",le="100"} 3',
+            'extract_ms_bucket{guild="1",le="+Inf"} 4',
+            'extract_ms_sum{guild="1"} 565',
+            'extract_ms_count{guild="1"} 4',
+        ])
+
+    def test_counter_escapes_labels_and_rejects_duplicates(self):
+        registry = MetricsRegistry()
+        counter = registry.counter('events_total', "Events.", ('event',))
+        counter.inc(('say "hi"\n',))
+        counter.inc(('say "hi"\n',), 2)
+        self.assertIn('events_total{event="say \\"hi\\"\\n"} 3', registry.render())
+        with self.assertRaises(ValueError):
+            registry.counter('events_total', "Again.")
+
+
+class TestPlaybackMetrics(unittest.TestCase):
+    def test_events_feed_labelled_histograms(self):
+        metrics = PlaybackMetrics()
+        metrics.record('source_created', {'guild_id': 42, 'source_type': 'youtube', 'init_ms': 80, 'queue_wait_ms': 3})
+        metrics.record('yt_stream_extract', {'queue_id': 7, 'extract_ms': None})
+        metrics.record('playback_finished', {'guild_id': 42, 'source_type': 'local', 'drift_ms': -20, 'error': 'x'})
+
+        registry = metrics.registry
+        self.assertEqual(registry.get('musicbot_source_init_ms').count(('42', 'youtube')), 1)
+        self.assertEqual(registry.get('musicbot_queue_wait_ms').count(('42', 'youtube')), 1)
+        self.assertEqual(registry.get('musicbot_extract_ms').count(('', '')), 0)
+        self.assertEqual(registry.get('musicbot_playback_drift_ms').count(('42', 'local')), 1)
+        self.assertEqual(metrics.errors.value(('42', 'local')), 1)
+        self.assertEqual(metrics.events.value(('yt_stream_extract',)), 1)
+
+    def test_yt_lookup_outcomes_are_counted(self):
+        metrics = PlaybackMetrics()
+        for outcome in ('extracted', 'coalesced', 'coalesced', 'cache_hit'):
+            metrics.record('yt_lookup', {'outcome': outcome, 'query_type': 'search'})
+        self.assertEqual(metrics.yt_lookups.value(('coalesced',)), 2)
+        self.assertIn('musicbot_yt_lookups_total{outcome="extracted"} 1', metrics.render())
+
+    def test_http_endpoint_serves_metrics(self):
+        metrics = PlaybackMetrics()
+        metrics.record('event_loop_lag', {'lag_ms': 12})
+
+        async def fetch(path):
+            server = await start_metrics_server(metrics.render, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+                await writer.drain()
+                response = await reader.read()
+                writer.close()
+                return response.decode()
+            finally:
+                server.close()
+                await server.wait_closed()
+
+        response = asyncio.run(fetch('/metrics'))
+        self.assertTrue(response.startswith("HTTP/1.1 200 OK"))
+        self.assertIn('musicbot_loop_lag_ms_bucket{le="25"} 1', response)
+        self.assertTrue(asyncio.run(fetch('/')).startswith("HTTP/1.1 404"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+import os
+import struct
+import tempfile
+import unittest
+
+from ogg_opus import (
+    OggError,
+    OggOpusFile,
+    is_discord_ready_ogg_opus,
+    iter_opus_packets,
+    iter_packets,
+    opus_packet_samples,
+)
+
+OPUS_HEAD = b'OpusHead' + bytes([1, 2]) + struct.pack('<HIhB', 312, 48000, 0, 0)
+OPUS_TAGS = b'OpusTags' + struct.pack('<I', 4) + b'test' + struct.pack('<I', 0)
+CELT_20MS = 0xF8  # config 31 (CELT, 20 ms), one frame
+CELT_10MS = 0xF0  # config 30 (CELT, 10 ms), one frame
+
+
+def build_page(segments, serial=1, sequence=0, header_type=0, granule=0):
+    """Build one Ogg page from raw lacing segments (CRC left as zero; the parser does not check it)."""
+    lacing = bytes(len(segment) for segment in segments)
+    header = struct.pack('<4sBBqIIIB', b'OggS', 0, header_type, granule, serial, sequence, 0, len(segments))
+    return header + lacing + b''.join(segments)
+
+
+def lace(packet):
+    """Split a packet into Ogg lacing segments."""
+    segments = [packet[i:i + 255] for i in range(0, len(packet), 255)]
+    if not segments or len(segments[-1]) == 255:
+        segments.append(b'')
+    return segments
+
+
+def build_ogg_opus(audio_packets, serial=1):
+    pages = [build_page(lace(OPUS_HEAD), serial, 0, header_type=2), build_page(lace(OPUS_TAGS), serial, 1)]
+    segments = [segment for packet in audio_packets for segment in lace(packet)]
+    pages.append(build_page(segments, serial, 2, header_type=4, granule=960 * len(audio_packets)))
+    return b''.join(pages)
+
+
+def build_paged_ogg_opus(audio_pages, serial=1):
+    """Build a stream from per-page lacing segments of 20 ms packets, with granule positions set."""
+    pages = [build_page(lace(OPUS_HEAD), serial, 0, header_type=2), build_page(lace(OPUS_TAGS), serial, 1)]
+    granule = 0
+    continued = False
+    for sequence, segments in enumerate(audio_pages, start=2):
+        granule += 960 * sum(1 for segment in segments if len(segment) < 255)
+        header_type = 1 if continued else 0
+        pages.append(build_page(segments, serial, sequence, header_type=header_type, granule=granule))
+        continued = len(segments[-1]) == 255
+    return b''.join(pages)
+
+
+class TestOggParsing(unittest.TestCase):
+    def test_packets_spanning_pages_and_255_byte_boundaries(self):
+        long_packet = bytes([CELT_20MS]) + b'a' * 299
+        exact_packet = bytes([CELT_20MS]) + b'b' * 254
+        segments = lace(long_packet)
+        data = (
+            build_page(segments[:1])
+            + build_page(segments[1:] + lace(exact_packet), sequence=1, header_type=1)
+        )
+        self.assertEqual(list(iter_packets(data)), [long_packet, exact_packet])
+
+    def test_other_logical_streams_are_ignored(self):
+        data = build_page([b'first']) + build_page([b'other'], serial=2) + build_page([b'second'], sequence=1)
+        self.assertEqual(list(iter_packets(data)), [b'first', b'second'])
+
+    def test_headers_are_validated_and_skipped(self):
+        packets = [bytes([CELT_20MS, i]) for i in range(3)]
+        self.assertEqual(list(iter_opus_packets(build_ogg_opus(packets))), packets)
+        with self.assertRaises(OggError):
+            list(iter_opus_packets(build_page([b'\x01vorbis'])))
+        with self.assertRaises(OggError):
+            list(iter_packets(b'NotOgg' + b'\0' * 40))
+
+    def test_opus_packet_samples(self):
+        self.assertEqual(opus_packet_samples(bytes([CELT_20MS])), 960)
+        self.assertEqual(opus_packet_samples(bytes([CELT_10MS])), 480)
+        self.assertEqual(opus_packet_samples(bytes([CELT_10MS | 0x01])), 960)  # two 10 ms frames
+        self.assertEqual(opus_packet_samples(bytes([(3 << 3) | 0x03, 3])), 3 * 2880)  # three 60 ms SILK frames
+        self.assertEqual(opus_packet_samples(b''), 0)
+
+
+class TestOggOpusFile(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _write(self, name, data):
+        path = os.path.join(self._tmp.name, name)
+        with open(path, 'wb') as handle:
+            handle.write(data)
+        return path
+
+    def test_reads_packets_from_memory_map_and_seeks_to_start_offset(self):
+        packets = [bytes([CELT_20MS, i]) for i in range(10)]
+        path = self._write('track.opus', build_ogg_opus(packets))
+
+        reader = OggOpusFile(path)
+        try:
+            reader.seek(0.1)  # five 20 ms packets
+            self.assertEqual(reader.read_packet(), packets[5])
+            remaining = iter(reader.read_packet, None)
+            self.assertEqual(list(remaining), packets[6:])
+            self.assertIsNone(reader.read_packet())
+        finally:
+            reader.close()
+
+    def test_empty_packets_do_not_end_the_stream(self):
+        packets = [bytes([CELT_20MS]), b'', bytes([CELT_20MS, 1])]
+        path = self._write('dtx.opus', build_ogg_opus(packets))
+
+        reader = OggOpusFile(path)
+        try:
+            self.assertEqual(list(iter(reader.read_packet, None)), packets)
+        finally:
+            reader.close()
+        self.assertTrue(is_discord_ready_ogg_opus(path))
+
+    def test_seek_jumps_by_page_granule_positions(self):
+        packets = [bytes([CELT_20MS, i]) + b'x' * (297 if i == 9 else 0) for i in range(15)]
+        split = lace(packets[9])
+        audio_pages = [
+            [segment for packet in packets[0:5] for segment in lace(packet)],
+            [segment for packet in packets[5:9] for segment in lace(packet)] + split[:1],  # ends mid-packet
+            split[1:] + [segment for packet in packets[10:15] for segment in lace(packet)],
+        ]
+        path = self._write('paged.opus', build_paged_ogg_opus(audio_pages))
+
+        reader = OggOpusFile(path)
+        try:
+            self.assertEqual(reader.pre_skip, 312)
+            # Target granule 312 + 8640 lies inside packet 9, which starts on the page that ends mid-packet.
+            reader.seek(0.18)
+            self.assertEqual(list(iter(reader.read_packet, None)), packets[9:])
+            reader.seek(0.26)  # granule 12792, on the last page
+            self.assertEqual(reader.read_packet(), packets[13])
+            reader.seek(0.1)  # granule 5112 is inside packet 5 (samples 4800-5760)
+            self.assertEqual(reader.read_packet(), packets[5])
+            reader.seek(60)
+            self.assertIsNone(reader.read_packet())
+        finally:
+            reader.close()
+
+    def test_discord_ready_check(self):
+        self.assertTrue(is_discord_ready_ogg_opus(self._write('ok.opus', build_ogg_opus([bytes([CELT_20MS])] * 3))))
+        self.assertFalse(is_discord_ready_ogg_opus(self._write('10ms.opus', build_ogg_opus([bytes([CELT_10MS])]))))
+        self.assertFalse(is_discord_ready_ogg_opus(self._write('vorbis.ogg', build_page([b'\x01vorbis']))))
+        self.assertFalse(is_discord_ready_ogg_opus(self._write('empty.ogg', b'')))
+        self.assertFalse(is_discord_ready_ogg_opus(os.path.join(self._tmp.name, 'missing.opus')))
+
+
+if __name__ == "__main__":
+    unittest.main()
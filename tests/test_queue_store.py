@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+
+from fake_clock import FakeClock
+from queue_store import QueueStore
+
+
+def song(title, duration=None):
+    return {'type': 'youtube', 'title': title, 'webpage_url': f'https://youtu.be/{title}', 'duration': duration}
+
+
+class TestQueueStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'queue_state.sqlite3')
+        self.clock = FakeClock()
+        self.store = QueueStore(self.path, clock=self.clock)
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def reopen(self):
+        self.store.close()
+        self.store = QueueStore(self.path, clock=self.clock)
+
+    def test_restores_queue_and_position_at_last_heartbeat(self):
+        self.store.save(1, 10, 20, 0.8, [song('a', 200), song('b')], started_at=950.0)
+        self.clock.now = 1030.0
+        self.store.touch()
+        self.clock.now = 1100.0  # Down for 70 s; the position stops at the heartbeat.
+        self.reopen()
+
+        [saved] = self.store.load_all(max_age_seconds=600)
+        self.assertEqual((saved['guild_id'], saved['voice_channel_id'], saved['text_channel_id']), (1, 10, 20))
+        self.assertEqual(saved['volume'], 0.8)
+        self.assertEqual([entry['title'] for entry in saved['songs']], ['a', 'b'])
+        self.assertEqual(saved['position'], 80.0)
+
+    def test_finished_current_track_is_dropped(self):
+        self.store.save(1, 10, None, 0.5, [song('a', 60), song('b')], started_at=900.0)
+        self.store.save(2, 11, None, 0.5, [song('c', 60)], started_at=900.0)
+        self.store.save(3, 12, None, 0.5, [song('d')])
+        queues = {saved['guild_id']: saved for saved in self.store.load_all(max_age_seconds=600)}
+        self.assertEqual(sorted(queues), [1, 3])
+        self.assertEqual(([entry['title'] for entry in queues[1]['songs']], queues[1]['position']), (['b'], None))
+        self.assertIsNone(queues[3]['position'])
+
+    def test_delete_and_stale_state(self):
+        self.store.save(1, 10, None, 0.5, [song('a')])
+        self.store.save(2, 10, None, 0.5, [song('b')])
+        self.store.delete(1)
+        self.assertEqual(len(self.store), 1)
+        self.clock.now += 3600
+        self.assertEqual(self.store.load_all(max_age_seconds=600), [])
+        self.assertEqual(len(self.store), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
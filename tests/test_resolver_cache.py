@@ -0,0 +1,81 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from fake_clock import FakeClock
+from resolver_cache import ResolverCache
+
+
+class TestResolverCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = ResolverCache(":memory:", ttl_seconds=60, max_entries=2, clock=self.clock)
+
+    def tearDown(self):
+        self.cache.close()
+
+    def test_lookup_by_query_and_video_id(self):
+        self.cache.put("abc", "Song", 200, "https://youtu.be/abc", blacklisted=False, query="song lyrics")
+        by_query = self.cache.get_by_query("song lyrics")
+        self.assertEqual(by_query['id'], "abc")
+        self.assertEqual(by_query['title'], "Song")
+        self.assertIs(by_query['blacklisted'], False)
+        self.assertEqual(self.cache.get_by_video_id("abc"), by_query)
+        self.assertIsNone(self.cache.get_by_query("other lyrics"))
+
+    def test_entries_expire_after_ttl(self):
+        self.cache.put("abc", "Song", 200, "https://youtu.be/abc", query="song lyrics")
+        self.clock.now += 61
+        self.assertIsNone(self.cache.get_by_query("song lyrics"))
+        self.assertIsNone(self.cache.get_by_video_id("abc"))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.cache.put("a", "A", 1, "https://youtu.be/a", query="a lyrics")
+        self.clock.now += 1
+        self.cache.put("b", "B", 1, "https://youtu.be/b")
+        self.clock.now += 1
+        self.cache.get_by_video_id("a")
+        self.clock.now += 1
+        self.cache.put("c", "C", 1, "https://youtu.be/c")
+        self.assertIsNone(self.cache.get_by_video_id("b"))
+        self.assertIsNotNone(self.cache.get_by_query("a lyrics"))
+        self.assertIsNotNone(self.cache.get_by_video_id("c"))
+
+    def test_blacklist_verdicts_can_be_reset(self):
+        self.cache.put("abc", "Song", 200, "https://youtu.be/abc", blacklisted=True)
+        self.cache.reset_blacklist_verdicts()
+        self.assertIsNone(self.cache.get_by_video_id("abc")['blacklisted'])
+        self.cache.set_blacklisted("abc", False)
+        self.assertIs(self.cache.get_by_video_id("abc")['blacklisted'], False)
+
+    def test_streams_are_stored_separately_with_expiry(self):
+        self.cache.put_stream("abc", "https://stream/abc", "251", "webm", expires_at=self.clock.now + 10, acodec="opus")
+        stream = self.cache.get_stream("abc")
+        self.assertEqual(stream['url'], "https://stream/abc")
+        self.assertEqual(stream['format_id'], "251")
+        self.assertEqual(stream['acodec'], "opus")
+        self.assertIsNone(self.cache.get_by_video_id("abc"))
+        self.clock.now += 10
+        self.assertIsNone(self.cache.get_stream("abc"))
+
+    def test_existing_stream_table_gains_acodec_column(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cache.sqlite3')
+            conn = sqlite3.connect(path)
+            conn.execute(
+                "CREATE TABLE streams (video_id TEXT PRIMARY KEY, stream_url TEXT NOT NULL, "
+                "format_id TEXT, ext TEXT, expires_at REAL NOT NULL)"
+            )
+            conn.execute("INSERT INTO streams VALUES ('abc', 'https://stream/abc', '251', 'webm', 2000)")
+            conn.commit()
+            conn.close()
+            cache = ResolverCache(path, ttl_seconds=60, max_entries=2, clock=self.clock)
+            try:
+                self.assertIsNone(cache.get_stream("abc")['acodec'])
+            finally:
+                cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+import asyncio
+import os
+import threading
+import unittest
+from concurrent.futures.process import BrokenProcessPool
+
+from resolver_pool import PRIORITY_PLAYBACK, PRIORITY_SEARCH, ResolverPool, trim_info_dict
+
+
+class RecordingClient:
+    def __init__(self, calls, gate=None):
+        self.calls = calls
+        self.gate = gate
+        self.thread = threading.current_thread().name
+
+    def extract_info(self, url, download=False):
+        if self.gate is not None and url == "block":
+            self.gate.wait(timeout=5)
+        if url == "fail":
+            raise ValueError("unavailable")
+        self.calls.append(url)
+        return {'url': url, 'title': self.thread, 'formats': [{}] * 50}
+
+
+class EchoClient:
+    """Picklable-by-reference client for process mode."""
+
+    def __init__(self, options):
+        self.prefix = options['prefix']
+
+    def extract_info(self, url, download=False):
+        if url == "crash":
+            os._exit(1)
+        return {'id': url, 'title': self.prefix + url, 'thumbnails': [{}] * 10}
+
+
+class TestResolverPool(unittest.TestCase):
+    def test_playback_jobs_run_before_queued_searches(self):
+        calls = []
+        gate = threading.Event()
+        metrics = []
+        pool = ResolverPool(
+            1,
+            {'default': {}},
+            client_factory=lambda options: RecordingClient(calls, gate),
+            metric_callback=lambda name, **kwargs: metrics.append((name, kwargs)),
+        )
+
+        async def scenario():
+            blocker = pool.extract_info("block")
+            await asyncio.sleep(0.05)
+            search = pool.extract_info("search", priority=PRIORITY_SEARCH)
+            playback = pool.extract_info("playback", priority=PRIORITY_PLAYBACK)
+            self.assertEqual(pool.queue_depth, 2)
+            gate.set()
+            await asyncio.gather(blocker, search, playback)
+
+        asyncio.run(scenario())
+        pool.shutdown()
+        self.assertEqual(calls, ["block", "playback", "search"])
+        dequeues = [kwargs for name, kwargs in metrics if name == "ytdl_pool_dequeue"]
+        self.assertEqual(len(dequeues), 3)
+        self.assertTrue(all('wait_ms' in kwargs and 'queue_depth' in kwargs for kwargs in dequeues))
+
+    def test_cancelled_job_is_dropped_and_errors_propagate(self):
+        calls = []
+        gate = threading.Event()
+        pool = ResolverPool(1, {'default': {}}, client_factory=lambda options: RecordingClient(calls, gate))
+
+        async def scenario():
+            blocker = pool.extract_info("block")
+            await asyncio.sleep(0.05)
+            dropped = pool.extract_info("dropped")
+            failing = pool.extract_info("fail")
+            dropped.cancel()
+            gate.set()
+            await blocker
+            with self.assertRaises(ValueError):
+                await failing
+
+        asyncio.run(scenario())
+        pool.shutdown()
+        self.assertEqual(calls, ["block"])
+
+    def test_warm_up_builds_clients_before_queued_jobs(self):
+        built = []
+        calls = []
+
+        def factory(options):
+            built.append(options['name'])
+            return RecordingClient(calls)
+
+        pool = ResolverPool(1, {'default': {'name': 'default'}, 'search': {'name': 'search'}}, client_factory=factory)
+
+        async def scenario():
+            job = pool.extract_info("track")
+            await pool.warm_up()
+            await job
+
+        asyncio.run(scenario())
+        pool.shutdown()
+        self.assertEqual(built, ['default', 'search'])
+        self.assertEqual(calls, ["track"])
+
+    def test_warm_up_reaches_every_worker(self):
+        built = []
+
+        def factory(options):
+            built.append(threading.current_thread().name)
+            return RecordingClient([])
+
+        pool = ResolverPool(3, {'default': {}}, client_factory=factory)
+
+        async def scenario():
+            await pool.warm_up()
+
+        asyncio.run(scenario())
+        pool.shutdown()
+        self.assertEqual(sorted(built), ["ytdl-resolver-0", "ytdl-resolver-1", "ytdl-resolver-2"])
+
+    def test_each_worker_builds_its_own_client_per_profile(self):
+        created = []
+
+        def factory(options):
+            created.append(threading.current_thread().name)
+            return RecordingClient([])
+
+        pool = ResolverPool(2, {'default': {}, 'search': {}}, client_factory=factory)
+
+        async def scenario():
+            return await asyncio.gather(*(pool.extract_info(str(i)) for i in range(8)),
+                                        pool.extract_info("s", profile='search'))
+
+        results = asyncio.run(scenario())
+        pool.shutdown()
+        for result in results:
+            self.assertIn(result['title'], created)
+            self.assertNotIn('formats', result)
+        # At most one client per (worker, profile) pair.
+        self.assertLessEqual(len(created), 4)
+        self.assertTrue(all(name.startswith("ytdl-resolver-") for name in created))
+
+    def test_process_mode_returns_trimmed_results(self):
+        pool = ResolverPool(1, {'default': {'prefix': 'p:'}}, mode='process', client_factory=EchoClient)
+
+        async def scenario():
+            return await pool.extract_info("abc")
+
+        try:
+            result = asyncio.run(scenario())
+        finally:
+            pool.shutdown()
+        self.assertEqual(result, {'id': 'abc', 'title': 'p:abc'})
+
+    def test_process_pool_is_recreated_after_a_worker_dies(self):
+        pool = ResolverPool(1, {'default': {'prefix': 'p:'}}, mode='process', client_factory=EchoClient)
+
+        async def scenario():
+            with self.assertRaises(BrokenProcessPool):
+                await pool.extract_info("crash")
+            return await pool.extract_info("abc")
+
+        try:
+            result = asyncio.run(scenario())
+        finally:
+            pool.shutdown()
+        self.assertEqual(result['title'], 'p:abc')
+
+    def test_trim_info_dict_recurses_into_entries(self):
+        info = {'id': 'list', 'formats': [], 'entries': [None, {'id': 'a', 'url': 'u', 'subtitles': {}}]}
+        self.assertEqual(trim_info_dict(info), {'id': 'list', 'entries': [None, {'id': 'a', 'url': 'u'}]})
+
+
+if __name__ == "__main__":
+    unittest.main()
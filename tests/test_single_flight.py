@@ -0,0 +1,62 @@
+import asyncio
+import unittest
+
+from single_flight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def resolve():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {'id': 'abc'}
+
+        async def main():
+            results = await asyncio.gather(*(flight.run('abc', resolve) for _ in range(5)))
+            again = await flight.run('abc', resolve)
+            return results, again
+
+        results, again = asyncio.run(main())
+        self.assertEqual(len(calls), 2)
+        self.assertEqual([coalesced for _, coalesced in results], [False, True, True, True, True])
+        self.assertTrue(all(result is results[0][0] for result, _ in results))
+        self.assertEqual(again, ({'id': 'abc'}, False))
+        self.assertEqual((flight.executions, flight.coalesced), (2, 4))
+        self.assertEqual(len(flight), 0)
+
+    def test_errors_reach_every_waiter(self):
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("unavailable")
+
+        async def main():
+            return await asyncio.gather(*(flight.run('x', fail) for _ in range(3)), return_exceptions=True)
+
+        results = asyncio.run(main())
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+
+    def test_cancelling_the_leader_does_not_cancel_followers(self):
+        flight = SingleFlight()
+
+        async def resolve():
+            await asyncio.sleep(0.02)
+            return 'done'
+
+        async def main():
+            leader = asyncio.ensure_future(flight.run('k', resolve))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(flight.run('k', resolve))
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await follower
+
+        self.assertEqual(asyncio.run(main()), ('done', True))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import time
+import unittest
+
+from song import Song
+
+
+class TestSong(unittest.TestCase):
+    def test_song_uses_slots(self):
+        song = Song(1, 'youtube', "Title", "https://youtu.be/abc")
+        self.assertFalse(hasattr(song, '__dict__'))
+        with self.assertRaises(AttributeError):
+            song.data = {}
+
+    def test_stream_ttl_remaining(self):
+        song = Song(1, 'youtube', "Title", "https://youtu.be/abc")
+        self.assertIsNone(song.stream_ttl_remaining())
+        song.apply_stream_info({'url': "https://stream", 'format_id': '251', 'ext': 'webm'}, time.time() + 100)
+        self.assertGreater(song.stream_ttl_remaining(), 90)
+        self.assertEqual(song.format_id, '251')
+        self.assertEqual(song.ext, 'webm')
+
+    def test_apply_stream_info_keeps_known_duration(self):
+        song = Song(1, 'youtube', "Title", "https://youtu.be/abc", duration=120)
+        song.apply_stream_info({'url': "https://stream", 'duration': None}, time.time() + 100)
+        self.assertEqual(song.duration, 120)
+
+    def test_is_opus_prefers_reported_codec(self):
+        song = Song(1, 'youtube', "Title", "https://youtu.be/abc")
+        song.apply_stream_info({'url': "u", 'ext': 'webm', 'acodec': 'opus'}, time.time() + 100)
+        self.assertTrue(song.is_opus())
+        song.apply_stream_info({'url': "u", 'ext': 'webm', 'acodec': 'vorbis'}, time.time() + 100)
+        self.assertFalse(song.is_opus())
+        song.apply_stream_info({'url': "u", 'ext': 'm4a'}, time.time() + 100)
+        self.assertFalse(song.is_opus())
+        song.apply_stream_info({'url': "u", 'ext': 'webm'}, time.time() + 100)
+        self.assertTrue(song.is_opus())
+
+    def test_dict_round_trip_assigns_new_queue_id(self):
+        song = Song(3, 'youtube', 'Song', 'https://youtu.be/abc', requester_id=7, video_id='abc', duration=200)
+        song.apply_stream_info({'url': 'https://stream', 'ext': 'webm'}, 123.0)
+        song.start_offset = 42.5
+        restored = Song.from_dict(9, song.to_dict())
+        self.assertEqual(restored.queue_id, 9)
+        self.assertEqual(restored.to_dict(), song.to_dict())
+
+
+if __name__ == "__main__":
+    unittest.main()
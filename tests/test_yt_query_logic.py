@@ -1,6 +1,14 @@
 import unittest
 
-from yt_query_logic import is_probable_url, is_youtube_link, normalize_yt_search_term
+from resolver_pool import trim_info_dict
+from yt_query_logic import (
+    extract_youtube_video_id,
+    is_probable_url,
+    is_youtube_link,
+    make_search_cache_key,
+    normalize_yt_search_term,
+    playlist_track,
+)
 
 
 class TestYtQueryLogic(unittest.TestCase):
@@ -29,6 +37,45 @@ class TestYtQueryLogic(unittest.TestCase):
         self.assertEqual(query, "into the unknown Lyrics")
         self.assertFalse(added)
 
+    def test_extract_youtube_video_id(self):
+        self.assertEqual(extract_youtube_video_id("https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=1"), "dQw4w9WgXcQ")
+        self.assertEqual(extract_youtube_video_id("https://youtu.be/dQw4w9WgXcQ"), "dQw4w9WgXcQ")
+        self.assertEqual(extract_youtube_video_id("https://youtube.com/shorts/dQw4w9WgXcQ"), "dQw4w9WgXcQ")
+        self.assertIsNone(extract_youtube_video_id("https://vimeo.com/watch?v=dQw4w9WgXcQ"))
+        self.assertIsNone(extract_youtube_video_id("https://www.youtube.com/playlist?list=PL123"))
+
+    def test_make_search_cache_key_ignores_case_and_spacing(self):
+        self.assertEqual(make_search_cache_key("  Into  the Unknown lyrics "), "into the unknown lyrics")
+
+    def test_playlist_track_keeps_page_url_for_lazy_resolution(self):
+        entry = {
+            'id': 'dQw4w9WgXcQ', 'title': 'Song', 'duration': 212,
+            'url': 'https://www.youtube.com/watch?v=dQw4w9WgXcQ', 'ie_key': 'Youtube',
+        }
+        self.assertEqual(
+            playlist_track(entry),
+            ('Song', 'https://www.youtube.com/watch?v=dQw4w9WgXcQ', 'dQw4w9WgXcQ', 212),
+        )
+        self.assertEqual(
+            playlist_track({'url': 'dQw4w9WgXcQ', 'ie_key': 'Youtube', 'title': 'Bare'})[1:3],
+            ('https://www.youtube.com/watch?v=dQw4w9WgXcQ', 'dQw4w9WgXcQ'),
+        )
+
+    def test_playlist_track_reads_bare_ids_from_trimmed_listing(self):
+        listing = trim_info_dict({
+            'id': 'PL1', 'entries': [{'url': 'dQw4w9WgXcQ', 'ie_key': 'Youtube', 'title': 'Bare', 'thumbnails': []}],
+        })
+        self.assertEqual(
+            playlist_track(listing['entries'][0]),
+            ('Bare', 'https://www.youtube.com/watch?v=dQw4w9WgXcQ', 'dQw4w9WgXcQ', None),
+        )
+
+    def test_playlist_track_skips_unplayable_entries(self):
+        self.assertIsNone(playlist_track(None))
+        self.assertIsNone(playlist_track({'title': '[Private video]', 'url': 'https://youtu.be/dQw4w9WgXcQ'}))
+        self.assertIsNone(playlist_track({'title': 'No URL'}))
+        self.assertEqual(playlist_track({'url': 'https://example.com/a.mp3'})[0], 'https://example.com/a.mp3')
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -20,3 +20,37 @@ def normalize_yt_search_term(query):
     if has_lyrics:
         return stripped_query, False
     return f"{stripped_query} lyrics", True
+
+
+def extract_youtube_video_id(url):
+    """Return the 11-character video ID from a YouTube URL, or None."""
+    if not is_youtube_link(url):
+        return None
+    match = re.search(r'(?:[?&]v=|youtu\.be/|/shorts/|/embed/|/live/)([A-Za-z0-9_-]{11})', url.strip())
+    return match.group(1) if match else None
+
+
+def make_search_cache_key(search_term):
+    """Case- and whitespace-insensitive cache key for a normalized search term."""
+    return " ".join((search_term or "").lower().split())
+
+
+# Titles yt-dlp gives flat playlist entries that can no longer be played.
+UNAVAILABLE_PLAYLIST_TITLES = frozenset({'[Private video]', '[Deleted video]', '[Unavailable video]'})
+
+
+def playlist_track(entry):
+    """Reduce a flat playlist entry to (title, page URL, video ID, duration), or None if unplayable.
+
+    Flat entries carry the watch-page URL in 'url' (not a stream URL), so the
+    stream is resolved later, just before the track plays.
+    """
+    if not entry:
+        return None
+    title = entry.get('title')
+    page_url = entry.get('webpage_url') or entry.get('url')
+    if not page_url or title in UNAVAILABLE_PLAYLIST_TITLES:
+        return None
+    if entry.get('ie_key') == 'Youtube' and not is_probable_url(page_url):
+        page_url = f"https://www.youtube.com/watch?v={page_url}"  # Older yt-dlp lists bare video IDs.
+    return title or page_url, page_url, extract_youtube_video_id(page_url), entry.get('duration')